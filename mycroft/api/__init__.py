@@ -12,11 +12,15 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-from copy import copy
+import re
+import time
+from collections import OrderedDict
+from copy import copy, deepcopy
+from threading import Event, Lock, get_ident
 
-import json
 import requests
 from requests import HTTPError, RequestException
+from requests.adapters import HTTPAdapter
 
 from mycroft.configuration import Configuration
 from mycroft.configuration.config import DEFAULT_CONFIG, SYSTEM_CONFIG, \
@@ -27,6 +31,13 @@ from mycroft.util import get_arch, connected, LOG
 
 _paired_cache = False
 
+_session = None
+_session_lock = Lock()
+
+# Device and skill uuids in paths are replaced in the latency endpoints
+_UUID = re.compile('[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-'
+                   '[0-9a-f]{12}')
+
 
 class BackendDown(RequestException):
     pass
@@ -36,16 +47,87 @@ class InternetDown(RequestException):
     pass
 
 
+def get_session(pool_size=10):
+    """ Keep-alive session shared by the backend Apis of this process.
+
+    Args:
+        pool_size (int): connections kept alive per host, only used when
+                         the session is created
+
+    Returns:
+        requests.Session
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=pool_size)
+            _session.mount('http://', adapter)
+            _session.mount('https://', adapter)
+        return _session
+
+
+class ETagCache(object):
+    """ LRU cache of the decoded bodies of responses with an ETag.
+
+    Args:
+        size (int): number of responses kept
+    """
+
+    def __init__(self, size=64):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        """ Get the (etag, body) cached for a request or None. """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key, etag, body):
+        """ Cache the body of a response, dropping the least recently used
+        response if the cache is full.
+        """
+        with self.lock:
+            self.entries[key] = (etag, deepcopy(body))
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class _InFlight(object):
+    """ A GET request other threads can wait for. """
+
+    def __init__(self):
+        self.thread = get_ident()
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
 class Api(object):
     """ Generic object to wrap web APIs """
-    params_to_etag = {}
-    etag_to_response = {}
+    etag_cache = ETagCache()
+    # Endpoint -> Histogram of the request latencies
+    latency = {}
+    _latency_lock = Lock()
+    # Identical GET requests currently sent by a thread
+    _in_flight = {}
+    _in_flight_lock = Lock()
 
     def __init__(self, path):
         self.path = path
 
         # Load the config, skipping the REMOTE_CONFIG since we are
-        # getting the info needed to get to it!
+        # getting the info needed to get to it! The files are only read
+        # again when they change.
         config = Configuration.get([DEFAULT_CONFIG,
                                     SYSTEM_CONFIG,
                                     USER_CONFIG],
@@ -53,6 +135,8 @@ class Api(object):
         config_server = config.get("server")
         self.url = config_server.get("url")
         self.version = config_server.get("version")
+        self.coalesce = config_server.get("coalesce_requests", True)
+        self.session = get_session(config_server.get("pool_size", 10))
         self.identity = IdentityManager.get()
 
     def request(self, params):
@@ -84,39 +168,116 @@ class Api(object):
         Arguments:
             params (dict): request parameters
 
+        Concurrent identical GET requests share a single request to the
+        backend unless server.coalesce_requests is disabled.
+
         Returns:
-            Requests response object.
+            The data of the response.
         """
-        query_data = frozenset(params.get('query', {}).items())
-        params_key = (params.get('path'), query_data)
-        etag = self.params_to_etag.get(params_key)
-
         method = params.get("method", "GET")
         headers = self.build_headers(params)
         data = self.build_data(params)
         json_body = self.build_json(params)
         query = self.build_query(params)
         url = self.build_url(params)
+        if method != "GET" or not self.coalesce:
+            return self._send(params, method, url, headers, query, data,
+                              json_body)
+
+        # Concurrent identical GET requests share the result of a single
+        # request to the backend, including a retry after a token refresh
+        key = (url, frozenset((query or {}).items()),
+               frozenset(headers.items()))
+        with Api._in_flight_lock:
+            call = Api._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = Api._in_flight[key] = _InFlight()
+        if not leader:
+            if call.thread == get_ident():
+                # Retry of this thread's request after a token refresh
+                return self._send(params, method, url, headers, query, data,
+                                  json_body)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return deepcopy(call.result)
+
+        try:
+            call.result = self._send(params, method, url, headers, query,
+                                     data, json_body)
+            return deepcopy(call.result)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with Api._in_flight_lock:
+                del Api._in_flight[key]
+            call.done.set()
+
+    def _send(self, params, method, url, headers, query, data, json_body):
+        """ Send the request, handling Etags and expired tokens.
 
+        Returns:
+            The data of the response.
+        """
         # For an introduction to the Etag feature check out:
         # https://en.wikipedia.org/wiki/HTTP_ETag
-        if etag:
-            headers['If-None-Match'] = etag
-
-        response = requests.request(
-            method, url, headers=headers, params=query,
-            data=data, json=json_body, timeout=(3.05, 15)
-        )
-        if response.status_code == 304:
+        cached = None
+        if method == "GET":
+            query_data = frozenset((query or {}).items())
+            params_key = (params.get('path'), query_data)
+            cached = self.etag_cache.get(params_key)
+            if cached:
+                headers['If-None-Match'] = cached[0]
+
+        response = self._timed_request(method, url, headers, query, data,
+                                       json_body, params.get('path', ''))
+        if response.status_code == 304 and cached:
             LOG.debug('Etag matched. Nothing changed for: ' + params['path'])
-            response = self.etag_to_response[etag]
-        elif 'ETag' in response.headers:
-            etag = response.headers['ETag'].strip('"')
+            return deepcopy(cached[1])
+
+        body = self.get_response(response)
+        if (method == "GET" and 200 <= response.status_code < 300 and
+                'ETag' in response.headers):
             LOG.debug('Updating etag for: ' + params['path'])
-            self.params_to_etag[params_key] = etag
-            self.etag_to_response[etag] = response
+            self.etag_cache.put(params_key,
+                                response.headers['ETag'].strip('"'), body)
+        return body
 
-        return self.get_response(response)
+    def _timed_request(self, method, url, headers, query, data, json_body,
+                       path):
+        start = time.monotonic()
+        try:
+            return self.session.request(
+                method, url, headers=headers, params=query,
+                data=data, json=json_body, timeout=(3.05, 15)
+            )
+        finally:
+            endpoint = method + ' ' + _UUID.sub('{uuid}', path.split('?')[0])
+            Api.record_latency(endpoint, time.monotonic() - start)
+
+    @staticmethod
+    def record_latency(endpoint, seconds):
+        # mycroft.metrics imports this module
+        from mycroft.metrics import Histogram
+        with Api._latency_lock:
+            if endpoint not in Api.latency:
+                Api.latency[endpoint] = Histogram()
+            histogram = Api.latency[endpoint]
+        histogram.add(seconds)
+
+    @staticmethod
+    def latency_stats():
+        """ Latency of the requests sent by this process per endpoint.
+
+        Returns:
+            dict: endpoint ("<method> <path>") -> histogram summary
+        """
+        with Api._latency_lock:
+            latency = dict(Api.latency)
+        return {endpoint: histogram.to_dict()
+                for endpoint, histogram in latency.items()}
 
     def get_response(self, response):
         data = self.get_data(response)
@@ -153,13 +314,14 @@ class Api(object):
         return params.get("data")
 
     def build_json(self, params):
-        json = params.get("json")
-        if json and params["headers"]["Content-Type"] == "application/json":
-            for k, v in json.items():
+        json_body = params.get("json")
+        if (json_body and
+                params["headers"]["Content-Type"] == "application/json"):
+            for k, v in json_body.items():
                 if v == "":
-                    json[k] = None
-            params["json"] = json
-        return json
+                    json_body[k] = None
+            params["json"] = json_body
+        return json_body
 
     def build_query(self, params):
         return params.get("query")
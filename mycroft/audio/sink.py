@@ -0,0 +1,198 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import wave
+from queue import Queue, Empty
+from threading import Condition, Event, Thread
+
+import pyaudio
+
+from mycroft.util.log import LOG
+
+
+class AudioStream(object):
+    """
+        WAV data arriving in chunks, for example from an engine still
+        synthesizing the rest of the sentence.
+
+        The producer writes chunks and closes the stream when done, the
+        AudioSink reads it like a file, waiting for the data not yet
+        written.
+    """
+    def __init__(self):
+        self.condition = Condition()
+        self.buffer = bytearray()
+        self.closed = False
+
+    def write(self, data):
+        with self.condition:
+            self.buffer.extend(data)
+            self.condition.notify_all()
+
+    def close(self):
+        """ End of the data, readers get the rest of the buffer. """
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def read(self, size=-1):
+        with self.condition:
+            while not self.closed and (size < 0 or len(self.buffer) < size):
+                self.condition.wait()
+            if size < 0:
+                size = len(self.buffer)
+            data = bytes(self.buffer[:size])
+            del self.buffer[:size]
+            return data
+
+
+class SinkPlayback(object):
+    """
+        Handle for a sound played by an AudioSink.
+
+        Mimics the subset of subprocess.Popen used for the play_wav
+        processes so it can be used in their place.
+    """
+    def __init__(self, data):
+        self.data = data
+        self.done = Event()
+        self.stopped = False
+        self.failed = False
+
+    def terminate(self):
+        self.stopped = True
+
+    kill = terminate
+
+    def wait(self, timeout=None):
+        self.done.wait(timeout)
+        return self.poll()
+
+    def communicate(self):
+        self.wait()
+        return None, None
+
+    def poll(self):
+        return 0 if self.done.is_set() else None
+
+
+class AudioSink(Thread):
+    """
+        In-process audio output.
+
+        Keeps a PCM output stream open between sounds, removing the start
+        up of a player process from every sound. An AudioStream is played
+        while it is still being written. The output stream is reopened if
+        the audio format changes and closed after idle_timeout seconds
+        without sound, releasing the device for other programs.
+
+        Args:
+            device_index (int): output device, None for the default
+            chunk_frames (int): frames written to the stream at a time,
+                                also the granularity of stopping a sound
+            idle_timeout (float): seconds before an unused output stream
+                                  is closed
+    """
+    def __init__(self, device_index=None, chunk_frames=1024,
+                 idle_timeout=2.0):
+        super(AudioSink, self).__init__()
+        self.daemon = True
+        self.device_index = device_index
+        self.chunk_frames = chunk_frames
+        self.idle_timeout = idle_timeout
+        self.queue = Queue()
+        self.audio = None
+        self.stream = None
+        self.stream_format = None
+        self._terminated = False
+        self.start()
+
+    def play(self, data):
+        """
+            Queue a sound for playback.
+
+            Args:
+                data: WAV file name, file object or AudioStream
+
+            Returns:
+                SinkPlayback: handle to wait for or stop the sound
+        """
+        playback = SinkPlayback(data)
+        self.queue.put(playback)
+        return playback
+
+    def run(self):
+        while not self._terminated:
+            try:
+                playback = self.queue.get(timeout=self.idle_timeout)
+            except Empty:
+                self._close_stream()
+                continue
+            if playback is None:
+                break
+            try:
+                if not playback.stopped:
+                    self._play(playback)
+            except Exception:
+                LOG.exception('Error playing audio')
+                playback.failed = True
+                self._close_stream()
+            finally:
+                playback.done.set()
+        self._close_stream()
+
+    def _play(self, playback):
+        wav = wave.open(playback.data, 'rb')
+        try:
+            self._open_stream(wav.getframerate(), wav.getnchannels(),
+                              wav.getsampwidth())
+            chunk = wav.readframes(self.chunk_frames)
+            while chunk and not playback.stopped:
+                self.stream.write(chunk)
+                chunk = wav.readframes(self.chunk_frames)
+        finally:
+            wav.close()
+
+    def _open_stream(self, rate, channels, sample_width):
+        stream_format = (rate, channels, sample_width)
+        if self.stream and self.stream_format == stream_format:
+            return
+        self._close_stream()
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+        self.stream = self.audio.open(
+            format=self.audio.get_format_from_width(sample_width),
+            channels=channels, rate=rate, output=True,
+            output_device_index=self.device_index,
+            frames_per_buffer=self.chunk_frames)
+        self.stream_format = stream_format
+
+    def _close_stream(self):
+        if self.stream:
+            try:
+                self.stream.stop_stream()
+                self.stream.close()
+            except Exception:
+                pass
+            self.stream = None
+            self.stream_format = None
+
+    def close(self):
+        """ Stop the sink, closing the output stream. """
+        self._terminated = True
+        self.queue.put(None)
+        self.join()
+        if self.audio:
+            self.audio.terminate()
+            self.audio = None
@@ -14,19 +14,22 @@
 #
 import re
 import time
-from threading import Lock
+from threading import Event, Lock
 
 from mycroft.configuration import Configuration
 from mycroft.metrics import report_timing, Stopwatch
 from mycroft.tts import TTSFactory
+from mycroft.tts.presynth import DialogUsage, PreSynthesizer
 from mycroft.util import create_signal, check_for_signal
 from mycroft.util.log import LOG
 
 ws = None  # TODO:18.02 - Rename to "messagebus"
 config = None
 tts = None
-tts_hash = None
+tts_changed = Event()  # Set when the tts config changes
 lock = Lock()
+dialog_usage = None
+presynthesizer = None
 
 _last_stop_signal = 0
 
@@ -42,7 +45,6 @@ def handle_speak(event):
     """
         Handle "speak" message
     """
-    config = Configuration.get()
     Configuration.init(ws)
     global _last_stop_signal
 
@@ -52,6 +54,12 @@ def handle_speak(event):
     else:
         ident = 'unknown'
 
+    if presynthesizer:
+        presynthesizer.activity()
+    dialog_file = event.data.get('meta', {}).get('dialog_file')
+    if dialog_usage and dialog_file:
+        dialog_usage.record(dialog_file)
+
     with lock:
         stopwatch = Stopwatch()
         stopwatch.start()
@@ -61,37 +69,65 @@ def handle_speak(event):
             # at the end of the next bit of spoken audio.
             ws.once('recognizer_loop:audio_output_end', _start_listener)
 
-        # This is a bit of a hack for Picroft.  The analog audio on a Pi blocks
-        # for 30 seconds fairly often, so we don't want to break on periods
-        # (decreasing the chance of encountering the block).  But we will
-        # keep the split for non-Picroft installs since it give user feedback
-        # faster on longer phrases.
-        #
-        # TODO: Remove or make an option?  This is really a hack, anyway,
-        # so we likely will want to get rid of this when not running on Mimic
-        if (config.get('enclosure', {}).get('platform') != "picroft" and
-                len(re.findall('<[^>]*>', utterance)) == 0):
-            start = time.time()
-            chunks = re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s',
-                              utterance)
-            for chunk in chunks:
-                try:
-                    mute_and_speak(chunk, ident)
-                except KeyboardInterrupt:
-                    raise
-                except Exception:
-                    LOG.error('Error in mute_and_speak', exc_info=True)
-                if (_last_stop_signal > start or
-                        check_for_signal('buttonPress')):
-                    break
-        else:
-            mute_and_speak(utterance, ident)
+        start = time.time()
+        for chunk in split_utterance(utterance):
+            try:
+                mute_and_speak(chunk, ident)
+            except KeyboardInterrupt:
+                raise
+            except Exception:
+                LOG.error('Error in mute_and_speak', exc_info=True)
+            if (_last_stop_signal > start or
+                    check_for_signal('buttonPress')):
+                # Drop the sentence queued while the stop was handled
+                tts.playback.clear_queue()
+                break
 
         stopwatch.stop()
     report_timing(ident, 'speech', stopwatch, {'utterance': utterance,
                                                'tts': tts.__class__.__name__})
 
 
+def split_utterance(utterance):
+    """
+        Split an utterance into the sentences handed to the tts engine.
+
+        Args:
+            utterance:  The text to be spoken
+
+        Returns:
+            list: sentences of the utterance
+    """
+    # This is a bit of a hack for Picroft.  The analog audio on a Pi blocks
+    # for 30 seconds fairly often, so we don't want to break on periods
+    # (decreasing the chance of encountering the block).  But we will
+    # keep the split for non-Picroft installs since it give user feedback
+    # faster on longer phrases.
+    #
+    # TODO: Remove or make an option?  This is really a hack, anyway,
+    # so we likely will want to get rid of this when not running on Mimic
+    if (config.get('enclosure', {}).get('platform') != "picroft" and
+            len(re.findall('<[^>]*>', utterance)) == 0):
+        return re.split(r'(?<!\w\.\w.)(?<![A-Z][a-z]\.)(?<=\.|\?)\s',
+                        utterance)
+    return [utterance]
+
+
+def start_presynthesis():
+    """
+        Start pre-synthesizing popular dialog with the current tts engine
+    """
+    global presynthesizer
+    if presynthesizer:
+        presynthesizer.stop()
+        presynthesizer = None
+    presynth_config = config.get('tts', {}).get('presynthesis', {})
+    if presynth_config.get('enabled', False):
+        presynthesizer = PreSynthesizer(tts, dialog_usage, presynth_config,
+                                        split_utterance)
+        presynthesizer.start()
+
+
 def mute_and_speak(utterance, ident):
     """
         Mute mic and start speaking the utterance using selected tts backend.
@@ -100,10 +136,9 @@ def mute_and_speak(utterance, ident):
             utterance:  The sentence to be spoken
             ident:      Ident tying the utterance to the source query
     """
-    global tts_hash
-
     # update TTS object if configuration has changed
-    if tts_hash != hash(str(config.get('tts', ''))):
+    if tts_changed.is_set():
+        tts_changed.clear()
         global tts
         # Stop tts playback thread
         tts.playback.stop()
@@ -111,13 +146,10 @@ def mute_and_speak(utterance, ident):
         # Create new tts instance
         tts = TTSFactory.create()
         tts.init(ws)
-        tts_hash = hash(str(config.get('tts', '')))
+        start_presynthesis()
 
     LOG.info("Speak: " + utterance)
-    try:
-        tts.execute(utterance, ident)
-    finally:
-        lock.release()
+    tts.execute(utterance, ident)
 
 
 def handle_stop(event):
@@ -138,8 +170,8 @@ def init(websocket):
 
     global ws
     global tts
-    global tts_hash
     global config
+    global dialog_usage
 
     ws = websocket
     Configuration.init(ws)
@@ -151,10 +183,14 @@ def init(websocket):
 
     tts = TTSFactory.create()
     tts.init(ws)
-    tts_hash = config.get('tts')
+    Configuration.on_change('tts', lambda value: tts_changed.set())
+    dialog_usage = DialogUsage()
+    start_presynthesis()
 
 
 def shutdown():
+    if presynthesizer:
+        presynthesizer.stop()
     if tts:
         tts.playback.stop()
         tts.playback.join()
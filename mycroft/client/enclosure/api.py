@@ -216,6 +216,17 @@ class EnclosureAPI:
         self.ws.emit(Message("enclosure.mouth.viseme", {'code': code,
                                                         'until': time_until}))
 
+    def mouth_viseme_list(self, start, visemes):
+        """Send a timeline of viseme mouth shapes for synched speech
+        Args:
+            start (float): time.time() when the speech audio starts
+            visemes (list): (code, end) pairs, the viseme code as described
+                            in mouth_viseme() and the time in seconds
+                            since start when the shape ends
+        """
+        self.ws.emit(Message("enclosure.mouth.viseme_list",
+                             {'start': start, 'visemes': visemes}))
+
     def mouth_text(self, text=""):
         """Display text (scrolling as needed)
         Args:
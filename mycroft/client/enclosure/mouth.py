@@ -13,6 +13,7 @@
 # limitations under the License.
 #
 import time
+from threading import Event, Thread
 
 
 class EnclosureMouth:
@@ -26,6 +27,7 @@ class EnclosureMouth:
         self.ws = ws
         self.writer = writer
         self.is_timer_on = False
+        self.viseme_stop = Event()
         self.__init_events()
 
     def __init_events(self):
@@ -35,10 +37,12 @@ class EnclosureMouth:
         self.ws.on('enclosure.mouth.listen', self.listen)
         self.ws.on('enclosure.mouth.smile', self.smile)
         self.ws.on('enclosure.mouth.viseme', self.viseme)
+        self.ws.on('enclosure.mouth.viseme_list', self.viseme_list)
         self.ws.on('enclosure.mouth.text', self.text)
         self.ws.on('enclosure.mouth.display', self.display)
 
     def reset(self, event=None):
+        self.stop_visemes()
         self.writer.write("mouth.reset")
 
     def talk(self, event=None):
@@ -63,6 +67,45 @@ class EnclosureMouth:
             if code and (not time_until or time.time() < time_until):
                 self.writer.write("mouth.viseme=" + code)
 
+    def viseme_list(self, event=None):
+        if event and event.data:
+            self.stop_visemes()
+            self.viseme_stop = Event()
+            t = Thread(target=self.play_visemes,
+                       args=(event.data['start'], event.data['visemes'],
+                             self.viseme_stop))
+            t.daemon = True
+            t.start()
+
+    def play_visemes(self, start, visemes, stop):
+        """
+        Show a timeline of visemes.
+
+        Args:
+            start (float): time.time() when the speech audio started
+            visemes (list): (code, end) pairs, end being the time in seconds
+                            since start when the shape ends
+            stop (Event): set to end the animation
+        """
+        # Time against the monotonic clock so clock adjustments during
+        # the sentence don't affect the animation
+        offset = time.time() - start
+        mono_start = time.monotonic() - offset
+        for code, end in visemes:
+            elapsed = time.monotonic() - mono_start
+            # Skip visemes whose time has passed, e.g. because the
+            # message was delayed on the bus
+            if elapsed >= end:
+                continue
+            if stop.is_set():
+                break
+            self.writer.write("mouth.viseme=" + str(code))
+            if stop.wait(end - elapsed):
+                break
+
+    def stop_visemes(self):
+        self.viseme_stop.set()
+
     def text(self, event=None):
         text = ""
         if event and event.data:
@@ -0,0 +1,306 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+    Offline replay of recorded audio through the listener.
+
+    WAV files are fed through MutableStream and ResponsiveRecognizer.listen
+    exactly like microphone audio, without a microphone or network and
+    faster than real time. The run reports wake word and end of speech
+    detection latency as well as false accepts and rejects.
+
+    Expected detections can be described in a json file next to each
+    recording (e.g. hey_mycroft.json for hey_mycroft.wav):
+
+        {"wake_word": true, "wake_word_end": 1.2, "speech_end": 3.5}
+
+    Times are in seconds from the start of the recording. Without a json
+    file the directory given on the command line decides if the recording
+    contains the wake word.
+
+    Usage:
+        python -m mycroft.client.speech.benchmark -p with_wake_word_dir \\
+            -n without_wake_word_dir
+"""
+import json
+import time
+import wave
+from argparse import ArgumentParser
+from glob import glob
+from os.path import basename, isfile, join, splitext
+
+import pyaudio
+from pyee import EventEmitter
+from speech_recognition import AudioSource
+
+from mycroft.client.speech.hotword_factory import HotWordFactory
+from mycroft.client.speech.mic import MutableStream, ResponsiveRecognizer
+from mycroft.configuration import Configuration
+from mycroft.metrics import Histogram
+
+
+class WavStream(object):
+    """
+        Stream reading a WAV file, mimics the pyaudio input stream.
+
+        Args:
+            file_name (str): WAV file to read
+            speed (float): playback speed relative to real time, 0 reads
+                           as fast as possible
+    """
+    def __init__(self, file_name, speed=0.0):
+        self.file = wave.open(file_name, 'rb')
+        self.sample_rate = self.file.getframerate()
+        self.sample_width = self.file.getsampwidth()
+        self.num_frames = self.file.getnframes()
+        self.speed = speed
+        self.start_time = None
+
+    @property
+    def position(self):
+        """ Seconds of audio read so far. """
+        return float(self.file.tell()) / self.sample_rate
+
+    def get_read_available(self):
+        if self.file.tell() >= self.num_frames:
+            raise EOFError
+        return self.num_frames - self.file.tell()
+
+    def read(self, num_frames, exception_on_overflow=False):
+        if self.speed > 0:
+            if self.start_time is None:
+                self.start_time = time.time()
+            delay = (self.start_time + self.position / self.speed -
+                     time.time())
+            if delay > 0:
+                time.sleep(delay)
+        return self.file.readframes(num_frames)
+
+    def get_input_latency(self):
+        return 0.0
+
+    def is_stopped(self):
+        return False
+
+    def stop_stream(self):
+        pass
+
+    def close(self):
+        self.file.close()
+
+
+class WavSource(AudioSource):
+    """
+        AudioSource replaying a WAV file through a MutableStream.
+    """
+    def __init__(self, file_name, speed=0.0, chunk_size=1024):
+        self.wav = WavStream(file_name, speed)
+        self.stream = MutableStream(self.wav, pyaudio.paInt16)
+        self.SAMPLE_RATE = self.wav.sample_rate
+        self.SAMPLE_WIDTH = self.wav.sample_width
+        self.CHUNK = chunk_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.wav.close()
+
+
+class ReplayResult(object):
+    """
+        Detections made while replaying a single recording.
+    """
+    def __init__(self, file_name, labels):
+        self.file_name = file_name
+        self.labels = labels
+        self.detections = []
+        self.recording_ends = []
+        self.process_time = 0.0
+        self.duration = 0.0
+
+    @property
+    def has_wake_word(self):
+        return self.labels.get('wake_word', False)
+
+    @property
+    def false_accepts(self):
+        if self.has_wake_word:
+            return max(len(self.detections) - 1, 0)
+        return len(self.detections)
+
+    @property
+    def false_reject(self):
+        return self.has_wake_word and not self.detections
+
+    @property
+    def wake_word_latency(self):
+        if self.detections and 'wake_word_end' in self.labels:
+            return self.detections[0] - self.labels['wake_word_end']
+        return None
+
+    @property
+    def speech_end_latency(self):
+        if self.recording_ends and 'speech_end' in self.labels:
+            return self.recording_ends[0] - self.labels['speech_end']
+        return None
+
+
+class ListenerBenchmark(object):
+    """
+        Replays recordings through the listener and collects statistics.
+
+        Args:
+            wake_word_recognizer (HotWordEngine): engine to benchmark,
+                                                  defaults to the
+                                                  configured wake word
+            speed (float): replay speed relative to real time, 0 replays
+                           as fast as possible. Engines processing audio
+                           asynchronously (precise) need 1.0.
+    """
+    def __init__(self, wake_word_recognizer=None, speed=0.0):
+        config = Configuration.get()
+        if wake_word_recognizer is None:
+            word = config['listener'].get('wake_word', 'hey mycroft')
+            wake_word_recognizer = HotWordFactory.create_hotword(
+                word, lang=config.get('lang', 'en-us'))
+        self.wake_word_recognizer = wake_word_recognizer
+        self.speed = speed
+        self.recognizer = ResponsiveRecognizer(wake_word_recognizer)
+        # Never play sounds, save or upload samples while benchmarking
+        config = dict(config, opt_in=False, confirm_listening=False)
+        config['listener'] = dict(config['listener'],
+                                  record_wake_words=False,
+                                  record_utterances=False)
+        config['listener']['wake_word_upload'] = dict(
+            config['listener']['wake_word_upload'], enable=False)
+        self.recognizer.update_config(config)
+        self.results = []
+
+    @staticmethod
+    def load_labels(file_name, has_wake_word=None):
+        labels = {}
+        label_file = splitext(file_name)[0] + '.json'
+        if isfile(label_file):
+            with open(label_file) as f:
+                labels = json.load(f)
+        if 'wake_word' not in labels and has_wake_word is not None:
+            labels['wake_word'] = has_wake_word
+        return labels
+
+    def replay(self, file_name, has_wake_word=None):
+        """
+            Run a recording through the listener.
+
+            Args:
+                file_name (str): WAV file to replay
+                has_wake_word (bool): if the recording contains the wake
+                                      word, overridden by a label file
+
+            Returns:
+                ReplayResult: detections made in the recording
+        """
+        result = ReplayResult(file_name,
+                              self.load_labels(file_name, has_wake_word))
+        emitter = EventEmitter()
+        start = time.time()
+        with WavSource(file_name, self.speed) as source:
+            emitter.on('recognizer_loop:record_begin',
+                       lambda: result.detections.append(
+                           source.wav.position))
+            emitter.on('recognizer_loop:record_end',
+                       lambda: result.recording_ends.append(
+                           source.wav.position))
+            try:
+                while True:
+                    self.recognizer.listen(source, emitter)
+            except EOFError:
+                pass
+            result.duration = float(source.wav.num_frames) / \
+                source.wav.sample_rate
+        result.process_time = time.time() - start
+        self.results.append(result)
+        return result
+
+    def replay_folder(self, folder, has_wake_word):
+        for file_name in sorted(glob(join(folder, '*.wav'))):
+            self.replay(file_name, has_wake_word)
+
+    def report(self):
+        """
+            Summarize the replayed recordings.
+
+            Returns:
+                dict: counts and latency histograms of all replays
+        """
+        ww_latency = Histogram()
+        end_latency = Histogram()
+        for result in self.results:
+            if result.wake_word_latency is not None:
+                ww_latency.add(result.wake_word_latency)
+            if result.speech_end_latency is not None:
+                end_latency.add(result.speech_end_latency)
+        audio_time = sum(r.duration for r in self.results)
+        process_time = sum(r.process_time for r in self.results)
+        return {
+            'files': len(self.results),
+            'with_wake_word': len([r for r in self.results
+                                   if r.has_wake_word]),
+            'detections': sum(len(r.detections) for r in self.results),
+            'false_accepts': sum(r.false_accepts for r in self.results),
+            'false_rejects': len([r for r in self.results
+                                  if r.false_reject]),
+            'wake_word_latency': ww_latency.to_dict(),
+            'speech_end_latency': end_latency.to_dict(),
+            'audio_time': audio_time,
+            'process_time': process_time,
+            'real_time_factor': (process_time / audio_time
+                                 if audio_time else None)
+        }
+
+
+def main():
+    parser = ArgumentParser(description='Replay recordings through the '
+                                        'listener and report accuracy and '
+                                        'latency')
+    parser.add_argument('-p', '--positive', action='append', default=[],
+                        help='folder of recordings with the wake word')
+    parser.add_argument('-n', '--negative', action='append', default=[],
+                        help='folder of recordings without the wake word')
+    parser.add_argument('-s', '--speed', type=float, default=0.0,
+                        help='replay speed, 1.0 is real time and 0 '
+                             '(default) is as fast as possible')
+    parser.add_argument('files', nargs='*',
+                        help='labelled recordings to replay')
+    args = parser.parse_args()
+
+    benchmark = ListenerBenchmark(speed=args.speed)
+    for folder in args.positive:
+        benchmark.replay_folder(folder, True)
+    for folder in args.negative:
+        benchmark.replay_folder(folder, False)
+    for file_name in args.files:
+        benchmark.replay(file_name)
+
+    for result in benchmark.results:
+        print('{}: {} detection(s), wake word latency: {}, '
+              'end of speech latency: {}'.format(
+                  basename(result.file_name), len(result.detections),
+                  result.wake_word_latency, result.speech_end_latency))
+    print(json.dumps(benchmark.report(), indent=4))
+    benchmark.wake_word_recognizer.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -16,6 +16,7 @@ import tempfile
 import time
 
 import sys
+from collections import deque
 from tempfile import NamedTemporaryFile
 
 import os
@@ -26,8 +27,9 @@ from time import time as get_time
 
 from mycroft.configuration import Configuration
 from subprocess import Popen, PIPE, call
-from threading import Thread
+from threading import Thread, Lock, Condition
 
+from mycroft.metrics import Histogram
 from mycroft.util.log import LOG
 
 
@@ -52,6 +54,14 @@ class HotWordEngine(object):
     def update(self, chunk):
         pass
 
+    def stop(self):
+        """ Perform any actions needed to shut down the hot word engine.
+
+            This may include things such as unload loaded data or shutdown
+            external processes.
+        """
+        pass
+
 
 class PocketsphinxHotWord(HotWordEngine):
     def __init__(self, key_phrase="hey mycroft", config=None, lang="en-us"):
@@ -109,7 +119,133 @@ class PocketsphinxHotWord(HotWordEngine):
         return hyp and self.key_phrase in hyp.hypstr.lower()
 
 
+class PocketsphinxMultiHotWord(PocketsphinxHotWord):
+    """
+        Pocketsphinx engine spotting several key phrases with one decoder.
+
+        All phrases are searched for in a single pass over the audio so
+        checking N wake words costs a single decode.
+
+        Args:
+            configs (dict): hotword configs keyed by key phrase
+            lang (str): language of the acoustic model
+    """
+    def __init__(self, configs, lang="en-us"):
+        self.configs = {str(k).lower(): v for k, v in configs.items()}
+        self.key_phrases = sorted(self.configs)
+        HotWordEngine.__init__(self, self.key_phrases[0],
+                               self.configs[self.key_phrases[0]], lang)
+        from pocketsphinx import Decoder
+        self.phonemes = {phrase: c.get("phonemes", "")
+                         for phrase, c in self.configs.items()}
+        self.num_phonemes = max(len(p.split())
+                                for p in self.phonemes.values())
+        self.threshold = {phrase: c.get("threshold", 1e-90)
+                          for phrase, c in self.configs.items()}
+        self.sample_rate = self.listener_config.get("sample_rate", 1600)
+        self.found_phrase = None
+        self.kws_name = self.create_kws(self.threshold)
+        dict_name = self.create_multi_dict(self.phonemes)
+        config = self.create_config(dict_name, Decoder.default_config())
+        self.decoder = Decoder(config)
+
+    def create_config(self, dict_name, config):
+        model_file = join(RECOGNIZER_DIR, 'model', self.lang, 'hmm')
+        if not exists(model_file):
+            LOG.error('PocketSphinx model not found at ' + str(model_file))
+        config.set_string('-hmm', model_file)
+        config.set_string('-dict', dict_name)
+        config.set_string('-kws', self.kws_name)
+        config.set_float('-samprate', self.sample_rate)
+        config.set_int('-nfft', 2048)
+        config.set_string('-logfn', '/dev/null')
+        return config
+
+    def create_multi_dict(self, phonemes):
+        (fd, file_name) = tempfile.mkstemp()
+        words = {}
+        for key_phrase, phoneme in phonemes.items():
+            for word, group in zip(key_phrase.split(), phoneme.split('.')):
+                words[word] = group.strip()
+        with os.fdopen(fd, 'w') as f:
+            for word in sorted(words):
+                f.write(word + ' ' + words[word] + '\n')
+        return file_name
+
+    def create_kws(self, thresholds):
+        (fd, file_name) = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as f:
+            for key_phrase in sorted(thresholds):
+                threshold = float(thresholds[key_phrase])
+                f.write('{} /{}/\n'.format(key_phrase, threshold))
+        return file_name
+
+    def found_wake_word(self, frame_data):
+        hyp = self.transcribe(frame_data)
+        self.found_phrase = None
+        if hyp:
+            heard = hyp.hypstr.lower()
+            for key_phrase in self.key_phrases:
+                if key_phrase in heard:
+                    self.found_phrase = key_phrase
+                    self.key_phrase = key_phrase
+                    return True
+        return False
+
+
+class HotWordManager(HotWordEngine):
+    """
+        Runs several hotword engines over the same audio stream.
+
+        Every chunk is passed on to all engines and a check succeeds when
+        any of them heard its wake word. After a detection key_phrase is
+        the phrase that was heard.
+
+        Args:
+            engines (list): HotWordEngine instances to run
+    """
+    def __init__(self, engines):
+        self.engines = engines
+        self.key_phrase = engines[0].key_phrase
+        self.key_phrases = [p for e in engines
+                            for p in getattr(e, 'key_phrases',
+                                             [e.key_phrase])]
+        self.num_phonemes = max(e.num_phonemes for e in engines)
+        self.config = engines[0].config
+        self.listener_config = engines[0].listener_config
+        self.lang = engines[0].lang
+        self.found_phrase = None
+
+    def found_wake_word(self, frame_data):
+        for engine in self.engines:
+            if engine.found_wake_word(frame_data):
+                self.found_phrase = engine.key_phrase
+                self.key_phrase = engine.key_phrase
+                return True
+        self.found_phrase = None
+        return False
+
+    def update(self, chunk):
+        for engine in self.engines:
+            engine.update(chunk)
+
+    def stop(self):
+        for engine in self.engines:
+            engine.stop()
+
+
 class PreciseHotword(HotWordEngine):
+    """
+        Wake word engine hosting a precise-stream process.
+
+        Audio chunks are buffered and written to the process from a
+        dedicated writer thread so the listener never blocks on the pipe.
+        The process is restarted if it dies and can be swapped for one
+        running a newer model without interrupting the listener.
+    """
+    # Bytes consumed by precise-stream for each prediction (1024 samples)
+    CHUNK_BYTES = 2048
+
     def __init__(self, key_phrase="hey mycroft", config=None, lang="en-us"):
         super(PreciseHotword, self).__init__(key_phrase, config, lang)
         self.update_freq = 24  # in hours
@@ -118,20 +254,110 @@ class PreciseHotword(HotWordEngine):
         self.dist_url = precise_config['dist_url']
         self.models_url = precise_config['models_url']
         self.exe_name = 'precise-stream'
+        self.threshold = self.config.get('threshold', 0.5)
+        self.max_buffered_chunks = self.config.get('max_buffered_chunks', 32)
+        self.restart_delay = self.config.get('restart_delay', 1.0)
 
-        model_name, model_path = self.get_model_info()
-
-        exe_file = self.find_download_exe()
-        LOG.info('Found precise executable: ' + exe_file)
-        self.update_model(model_name, model_path)
-
-        args = [exe_file, model_path, '1024']
-        self.proc = Popen(args, stdin=PIPE, stdout=PIPE)
         self.has_found = False
         self.cooldown = 20
-        t = Thread(target=self.check_stdout)
+        self.detect_lock = Lock()
+
+        self.proc = None
+        self.proc_lock = Lock()
+        self.running = True
+        self.restarts = 0
+
+        # Chunks waiting to be written and timestamps of written audio
+        # waiting for a prediction
+        self.buffer = deque()
+        self.buffer_cond = Condition()
+        self.dropped_chunks = 0
+        self.pending = deque()
+        self.pending_lock = Lock()
+        self.latency = Histogram()
+
+        self.model_name, self.model_path = self.get_model_info()
+
+        self.exe_file = self.find_download_exe()
+        LOG.info('Found precise executable: ' + self.exe_file)
+
+        if isfile(self.model_path):
+            # Refresh an existing model in the background
+            self.start_thread(self.refresh_model)
+        else:
+            self.update_model(self.model_name, self.model_path)
+
+        self.start_process()
+        self.start_thread(self.write_loop)
+
+    @staticmethod
+    def start_thread(target, *args):
+        t = Thread(target=target, args=args)
         t.daemon = True
         t.start()
+        return t
+
+    def start_process(self):
+        """
+            Start a new precise-stream process, replacing the current one.
+        """
+        with self.proc_lock:
+            old_proc = self._replace_process()
+        if old_proc:
+            self.kill_process(old_proc)
+
+    def _replace_process(self):
+        """
+            Start a new precise-stream process, proc_lock must be held.
+
+            Returns:
+                Popen: the replaced process, to be killed by the caller
+        """
+        args = [self.exe_file, self.model_path, str(self.CHUNK_BYTES // 2)]
+        old_proc = self.proc
+        self.proc = Popen(args, stdin=PIPE, stdout=PIPE)
+        with self.pending_lock:
+            self.pending.clear()
+        self.start_thread(self.check_stdout, self.proc)
+        return old_proc
+
+    @staticmethod
+    def kill_process(proc):
+        try:
+            proc.stdin.close()
+        except (OSError, ValueError):
+            pass
+        if proc.poll() is None:
+            proc.terminate()
+
+    def restart(self, proc):
+        """
+            Restart precise-stream after it stopped unexpectedly.
+
+            Args:
+                proc (Popen): the process that failed, ignored if it has
+                              already been replaced
+
+            Both the reader and the writer thread notice a failure, the
+            check and the replacement are done under one proc_lock
+            acquisition so the process is only restarted once.
+        """
+        with self.proc_lock:
+            if not self.running or proc is not self.proc:
+                return
+        time.sleep(self.restart_delay)
+        with self.proc_lock:
+            if not self.running or proc is not self.proc:
+                return
+            LOG.warning('precise-stream stopped (code {}), restarting...'
+                        .format(proc.poll()))
+            self.restarts += 1
+            try:
+                self._replace_process()
+            except OSError:
+                LOG.exception('Could not restart precise-stream')
+                return
+        self.kill_process(proc)
 
     def get_model_info(self):
         ww = Configuration.get()['listener']['wake_word']
@@ -192,38 +418,143 @@ class PreciseHotword(HotWordEngine):
         from urllib.request import urlopen
         LOG.info('Downloading: ' + url)
         req = urlopen(url)
-        with open(filename, 'wb') as fp:
+        # Download next to the target and move into place so a running
+        # process never sees a partially written file
+        tmp_file = filename + '.part'
+        with open(tmp_file, 'wb') as fp:
             shutil.copyfileobj(req, fp)
+        os.rename(tmp_file, filename)
         LOG.info('Download complete.')
 
     def update_model(self, name, file_name):
+        """
+            Download the model if the local copy is missing or outdated.
+
+            Returns:
+                bool: True if a new model was downloaded
+        """
         if isfile(file_name):
             stat = os.stat(file_name)
             if get_time() - stat.st_mtime < self.update_freq * 60 * 60:
-                return
+                return False
         name = name.replace(' ', '%20')
         url = self.models_url + name
-        self.download(url, file_name)
         self.download(url + '.params', file_name + '.params')
+        self.download(url, file_name)
+        return True
+
+    def refresh_model(self):
+        """
+            Update the model and hot swap the running process if needed.
+        """
+        try:
+            if self.update_model(self.model_name, self.model_path):
+                self.swap_model(self.model_path)
+        except Exception:
+            LOG.exception('Could not update precise model')
+
+    def swap_model(self, model_path):
+        """
+            Switch to a different model without stopping the listener.
+
+            A new process is started with the model and replaces the
+            current one, audio buffered meanwhile goes to the new process.
+
+            Args:
+                model_path (str): path to the model to load
+        """
+        LOG.info('Loading precise model ' + model_path)
+        self.model_path = model_path
+        with self.detect_lock:
+            self.has_found = False
+            self.cooldown = 20
+        self.start_process()
 
-    def check_stdout(self):
+    def check_stdout(self, proc):
         while True:
-            line = self.proc.stdout.readline()
+            line = proc.stdout.readline()
+            if not line:
+                # Process closed its output, it has stopped
+                self.restart(proc)
+                return
+            try:
+                prob = float(line)
+            except ValueError:
+                LOG.warning('Invalid output from precise: ' + repr(line))
+                continue
+            self.record_latency()
+            self.on_prediction(prob)
+
+    def record_latency(self):
+        """
+            Measure the time from audio being received to its prediction.
+        """
+        remaining = self.CHUNK_BYTES
+        stamp = None
+        with self.pending_lock:
+            while remaining > 0 and self.pending:
+                stamp, num_bytes = self.pending.popleft()
+                if num_bytes > remaining:
+                    self.pending.appendleft((stamp, num_bytes - remaining))
+                remaining -= num_bytes
+        if stamp is not None:
+            self.latency.add(time.time() - stamp)
+
+    def on_prediction(self, prob):
+        with self.detect_lock:
             if self.cooldown > 0:
                 self.cooldown -= 1
                 self.has_found = False
+                return
+            self.has_found = prob > self.threshold
+
+    def write_loop(self):
+        """
+            Write buffered audio to the process in batches.
+        """
+        while self.running:
+            with self.buffer_cond:
+                while not self.buffer and self.running:
+                    self.buffer_cond.wait()
+                batch = list(self.buffer)
+                self.buffer.clear()
+            if not batch:
                 continue
-            self.has_found = float(line) > 0.5
+
+            proc = self.proc
+            with self.pending_lock:
+                self.pending.extend((stamp, len(chunk))
+                                    for stamp, chunk in batch)
+            try:
+                proc.stdin.write(b''.join(chunk for _, chunk in batch))
+                proc.stdin.flush()
+            except (OSError, ValueError):
+                self.restart(proc)
 
     def update(self, chunk):
-        self.proc.stdin.write(chunk)
-        self.proc.stdin.flush()
+        with self.buffer_cond:
+            if len(self.buffer) >= self.max_buffered_chunks:
+                # The process is not keeping up, drop the oldest audio
+                self.buffer.popleft()
+                self.dropped_chunks += 1
+            self.buffer.append((time.time(), chunk))
+            self.buffer_cond.notify()
 
     def found_wake_word(self, frame_data):
-        if self.has_found and self.cooldown == 0:
-            self.cooldown = 20
-            return True
-        return False
+        with self.detect_lock:
+            if self.has_found and self.cooldown == 0:
+                self.cooldown = 20
+                return True
+            return False
+
+    def stop(self):
+        self.running = False
+        with self.buffer_cond:
+            self.buffer_cond.notify()
+        with self.proc_lock:
+            proc = self.proc
+        if proc:
+            self.kill_process(proc)
 
 
 class SnowboyHotWord(HotWordEngine):
@@ -272,3 +603,49 @@ class HotWordFactory(object):
         except Exception:
             LOG.exception('Could not create hotword. Falling back to default.')
             return HotWordFactory.CLASSES['pocketsphinx']()
+
+    @staticmethod
+    def create_hotwords(hotwords, config=None, lang="en-us"):
+        """
+            Create an engine listening for all the given hotwords.
+
+            Pocketsphinx hotwords sharing a language are combined into a
+            single decoder so they are all found with one decode, other
+            engines run side by side.
+
+            Args:
+                hotwords (list): key phrases to listen for
+                config (dict): hotword configurations by key phrase
+                lang (str): default language
+
+            Returns:
+                HotWordEngine: engine for all of the hotwords
+        """
+        if not config:
+            config = Configuration.get().get("hotwords", {})
+        if len(hotwords) == 1:
+            return HotWordFactory.create_hotword(hotwords[0], config, lang)
+
+        sphinx_words = {}
+        engines = []
+        for hotword in hotwords:
+            word_config = config.get(hotword, {"module": "pocketsphinx"})
+            if word_config.get("module", "pocketsphinx") == "pocketsphinx":
+                word_lang = str(word_config.get("lang", lang)).lower()
+                sphinx_words.setdefault(word_lang, {})[hotword] = word_config
+            else:
+                engines.append(
+                    HotWordFactory.create_hotword(hotword, config, lang))
+
+        for word_lang, configs in sphinx_words.items():
+            try:
+                engines.append(PocketsphinxMultiHotWord(configs, word_lang))
+            except Exception:
+                LOG.exception('Could not combine hotwords, creating them '
+                              'separately.')
+                engines += [HotWordFactory.create_hotword(w, config, lang)
+                            for w in configs]
+
+        if len(engines) == 1:
+            return engines[0]
+        return HotWordManager(engines)
@@ -12,8 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-import time
-from threading import Thread
+from threading import Event, Thread
 import sys
 import speech_recognition as sr
 from pyee import EventEmitter
@@ -25,6 +24,7 @@ from mycroft.client.speech.hotword_factory import HotWordFactory
 from mycroft.client.speech.mic import MutableMicrophone, ResponsiveRecognizer
 from mycroft.configuration import Configuration
 from mycroft.metrics import MetricsAggregator, Stopwatch, report_timing
+from mycroft.metrics.trace import trace_span
 from mycroft.session import SessionManager
 from mycroft.stt import STTFactory
 from mycroft.util import connected
@@ -151,6 +151,10 @@ class AudioConsumer(Thread):
                 self.metrics.attr('utterances', [transcription])
             else:
                 ident = str(stopwatch.timestamp)
+            # Recording ended right before the transcription started
+            duration = self._audio_length(audio)
+            trace_span(ident, 'record', stopwatch.timestamp - duration,
+                       duration)
             # Report timing metrics
             report_timing(ident, 'stt', stopwatch,
                           {'transcription': transcription,
@@ -210,18 +214,38 @@ class RecognizerLoop(EventEmitter):
         recognizer and remote general speech recognition.
     """
 
+    # Configuration sections used by the listener, changes in other
+    # sections don't affect it
+    CONFIG_SECTIONS = ('lang', 'listener', 'hotwords', 'stt')
+    # Listener settings which require the microphone to be reopened
+    MIC_SETTINGS = ('device_index', 'sample_rate', 'channels')
+    # Listener settings used when creating the hotword engines
+    HOTWORD_SETTINGS = ('wake_word', 'additional_wake_words',
+                        'stand_up_word', 'phonemes', 'threshold')
+
     def __init__(self):
         super(RecognizerLoop, self).__init__()
         self.mute_calls = 0
+        self._config_changed = Event()
+        for section in self.CONFIG_SECTIONS:
+            Configuration.on_change(section, self._on_config_change)
         self._load_config()
 
+    def _on_config_change(self, value):
+        self._config_changed.set()
+
+    @staticmethod
+    def _hash_sections(config):
+        return {section: hash(str(config.get(section)))
+                for section in RecognizerLoop.CONFIG_SECTIONS}
+
     def _load_config(self):
         """
             Load configuration parameters from configuration
         """
         config = Configuration.get()
         self.config_core = config
-        self._config_hash = hash(str(config))
+        self._config_hashes = self._hash_sections(config)
         self.lang = config.get('lang')
         self.config = config.get('listener')
         rate = self.config.get('sample_rate')
@@ -255,6 +279,13 @@ class RecognizerLoop(EventEmitter):
             config[word]["threshold"] = thresh
         if phonemes is None or thresh is None:
             config = None
+
+        # Additional wake words are all checked along with the main one
+        extra_words = [w for w in self.config.get("additional_wake_words", [])
+                       if w != word]
+        if extra_words:
+            return HotWordFactory.create_hotwords([word] + extra_words,
+                                                  config, self.lang)
         return HotWordFactory.create_hotword(word, config, self.lang)
 
     def create_wakeup_recognizer(self):
@@ -283,6 +314,8 @@ class RecognizerLoop(EventEmitter):
         # wait for threads to shutdown
         self.producer.join()
         self.consumer.join()
+        self.wakeword_recognizer.stop()
+        self.wakeup_recognizer.stop()
 
     def mute(self):
         """
@@ -327,9 +360,8 @@ class RecognizerLoop(EventEmitter):
         self.start_async()
         while self.state.running:
             try:
-                time.sleep(1)
-                if self._config_hash != hash(
-                        str(Configuration().get())):
+                if self._config_changed.wait(1):
+                    self._config_changed.clear()
                     LOG.debug('Config has changed, reloading...')
                     self.reload()
             except KeyboardInterrupt as e:
@@ -339,10 +371,54 @@ class RecognizerLoop(EventEmitter):
 
     def reload(self):
         """
-            Reload configuration and restart consumer and producer
+            Apply configuration changes to the running loop.
+
+            Only the components affected by the change are replaced, the
+            audio threads are restarted only if the microphone settings
+            changed.
         """
-        self.stop()
-        # load config
-        self._load_config()
-        # restart
-        self.start_async()
+        config = Configuration.get()
+        hashes = self._hash_sections(config)
+        changed = [s for s in hashes if hashes[s] != self._config_hashes[s]]
+        old_config = self.config
+        new_config = config.get('listener')
+
+        if any(old_config.get(k) != new_config.get(k)
+               for k in self.MIC_SETTINGS):
+            LOG.info('Microphone settings changed, restarting listener')
+            self.stop()
+            self._load_config()
+            self.start_async()
+            return
+
+        self.config_core = config
+        self._config_hashes = hashes
+        self.lang = config.get('lang')
+        self.config = new_config
+
+        if 'listener' in changed:
+            self.responsive_recognizer.update_config(config)
+
+        if ('lang' in changed or 'hotwords' in changed or
+                any(old_config.get(k) != new_config.get(k)
+                    for k in self.HOTWORD_SETTINGS)):
+            self.reload_hotwords()
+
+        if 'lang' in changed or 'stt' in changed:
+            LOG.info('Reloading STT engine')
+            self.consumer.stt = STTFactory.create()
+
+    def reload_hotwords(self):
+        """
+            Create new hotword engines and swap them into the running loop.
+        """
+        LOG.info('Reloading hotword engines')
+        old_engines = [self.wakeword_recognizer, self.wakeup_recognizer]
+        self.wakeword_recognizer = self.create_wake_word_recognizer()
+        self.wakeup_recognizer = self.create_wakeup_recognizer()
+        self.responsive_recognizer.set_wake_word_recognizer(
+            self.wakeword_recognizer)
+        self.consumer.wakeword_recognizer = self.wakeword_recognizer
+        self.consumer.wakeup_recognizer = self.wakeup_recognizer
+        for engine in old_engines:
+            engine.stop()
@@ -18,21 +18,21 @@ import datetime
 from hashlib import md5
 import shutil
 from tempfile import gettempdir
-from threading import Thread, Lock
+from threading import Thread
 from time import sleep, time as get_time
 
 import os
 import pyaudio
 import speech_recognition
-from os import mkdir
-from os.path import isdir, join, expanduser, isfile
+from os.path import join, expanduser, isfile
 from speech_recognition import (
     Microphone,
     AudioSource,
     AudioData
 )
 import requests
-from subprocess import check_output, Popen, PIPE
+from queue import Queue, Empty, Full
+from subprocess import Popen, PIPE
 
 from mycroft.api import DeviceApi
 from mycroft.configuration import Configuration
@@ -43,6 +43,7 @@ from mycroft.util import (
     resolve_resource_file,
     play_wav
 )
+from mycroft.util.cache import get_cache_janitor
 from mycroft.util.log import LOG
 
 
@@ -151,6 +152,145 @@ def get_silence(num_bytes):
     return b'\0' * num_bytes
 
 
+class WakeWordSampleWriter(Thread):
+    """
+        Saves and uploads wake word samples in the background.
+
+        Samples are queued by the listener and written to disk by this
+        thread. Saved files are uploaded in batches, failed uploads are
+        retried with an increasing delay. If the queue is full new samples
+        are dropped so the listener never waits.
+
+        Args:
+            folder (str): folder to save samples in
+            get_account_id (callable): returns the account id used in the
+                                       sample names
+            get_model_hash (callable): returns the hash of the wake word
+                                       model ending the sample names
+            max_queued (int): maximum number of samples waiting to be saved
+    """
+    # Maximum number of files sent with a single scp command
+    UPLOAD_BATCH_SIZE = 10
+    # Delay in seconds before retrying a failed upload, doubled after each
+    # failure up to MAX_RETRY_DELAY
+    RETRY_DELAY = 10
+    MAX_RETRY_DELAY = 60 * 60
+
+    def __init__(self, folder, get_account_id, get_model_hash=None,
+                 max_queued=10):
+        super(WakeWordSampleWriter, self).__init__()
+        self.daemon = True
+        self.folder = folder
+        self.get_account_id = get_account_id
+        self.get_model_hash = get_model_hash or (lambda: '0')
+        self.queue = Queue(max_queued)
+        self.upload_config = None
+        self.filenames_to_upload = []
+        self.retry_delay = self.RETRY_DELAY
+        self.next_upload = 0
+        self.dropped = 0
+
+    def save(self, audio, name_parts, upload_config=None):
+        """
+            Queue a sample to be saved, never blocks.
+
+            Args:
+                audio (AudioData): wake word audio
+                name_parts (list): components of the file name, the
+                                   account id and model hash are appended
+                                   when saving
+                upload_config (dict): wake_word_upload settings to upload
+                                      the sample with, None to only save it
+        """
+        try:
+            self.queue.put_nowait((audio, name_parts, upload_config))
+        except Full:
+            self.dropped += 1
+            LOG.warning('Wake word sample queue full, dropping sample')
+
+    def run(self):
+        while True:
+            timeout = None
+            if self.filenames_to_upload:
+                timeout = max(self.next_upload - get_time(), 0)
+            try:
+                item = self.queue.get(timeout=timeout)
+            except Empty:
+                item = None
+            while item:
+                self._write(*item)
+                try:
+                    item = self.queue.get_nowait()
+                except Empty:
+                    item = None
+            if self.filenames_to_upload and get_time() >= self.next_upload:
+                self._upload_pending()
+
+    def _write(self, audio, name_parts, upload_config):
+        name_parts = name_parts + [self.get_account_id(),
+                                   self.get_model_hash()]
+        fn = join(self.folder, '.'.join(name_parts) + '.wav')
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            with open(fn, 'wb') as f:
+                f.write(audio.get_wav_data())
+        except (IOError, OSError):
+            LOG.exception('Could not save wake word sample')
+            return
+        janitor = get_cache_janitor(
+            Configuration.get().get('cache_janitor'))
+        janitor.watch(self.folder, 'wake_words')
+        if upload_config:
+            # Removed once uploaded
+            janitor.protect(fn)
+            self.upload_config = upload_config
+            self.filenames_to_upload.append(fn)
+        janitor.record(fn)
+
+    def _get_keyfile(self):
+        keyfile = resolve_resource_file('wakeword_rsa')
+        userfile = expanduser('~/.mycroft/wakeword_rsa')
+
+        if not isfile(userfile):
+            shutil.copy2(keyfile, userfile)
+            os.chmod(userfile, 0o600)
+            keyfile = userfile
+        return keyfile
+
+    def _upload_pending(self):
+        config = self.upload_config
+        batch = self.filenames_to_upload[:self.UPLOAD_BATCH_SIZE]
+        address = '{}@{}:{}'.format(
+            config['user'], config['server'], config['folder']
+        )
+        LOG.debug('Uploading {} wake word(s)...'.format(len(batch)))
+        try:
+            for fn in batch:
+                os.chmod(fn, 0o666)
+            scp_status = Popen([
+                'scp', '-o', 'StrictHostKeyChecking=no', '-P',
+                str(config['port']), '-i', self._get_keyfile()
+            ] + batch + [address], stdout=PIPE, stderr=PIPE).wait()
+        except OSError:
+            LOG.exception('Could not upload wake words')
+            scp_status = -1
+
+        if scp_status == 0:
+            janitor = get_cache_janitor()
+            for fn in batch:
+                os.remove(fn)
+                janitor.unprotect(fn)
+            del self.filenames_to_upload[:len(batch)]
+            self.retry_delay = self.RETRY_DELAY
+            self.next_upload = 0
+        else:
+            LOG.debug('Failed to upload wake word to metrics server, '
+                      'retrying in {}s'.format(self.retry_delay))
+            self.next_upload = get_time() + self.retry_delay
+            self.retry_delay = min(self.retry_delay * 2,
+                                   self.MAX_RETRY_DELAY)
+
+
 class ResponsiveRecognizer(speech_recognition.Recognizer):
     # Padding of silence when feeding to pocketsphinx
     SILENCE_SEC = 0.01
@@ -175,42 +315,70 @@ class ResponsiveRecognizer(speech_recognition.Recognizer):
     SEC_BETWEEN_WW_CHECKS = 0.2
 
     def __init__(self, wake_word_recognizer):
+        speech_recognition.Recognizer.__init__(self)
+        self.wake_word_recognizer = wake_word_recognizer
+        self.wake_word_name = wake_word_recognizer.key_phrase
+        self.audio = pyaudio.PyAudio()
+        self.update_config(Configuration.get())
 
-        self.config = Configuration.get()
+        self.save_wake_words_dir = join(gettempdir(), 'mycroft_wake_words')
+        self._sample_writer = None
+        self._model_hash = (None, None, '0')
+        self.mic_level_file = os.path.join(get_ipc_directory(), "mic_level")
+        self._stop_signaled = False
+        self._account_id = None
+
+    @property
+    def account_id(self):
+        """ Account id for wake word samples, fetched when first needed. """
+        if self._account_id is None:
+            try:
+                self._account_id = DeviceApi().get()['user']['uuid']
+            except (requests.RequestException, AttributeError):
+                self._account_id = '0'
+        return self._account_id
+
+    def update_config(self, config):
+        """
+            Apply listener settings, takes effect from the next chunk or
+            wake word check without reopening the audio stream.
+
+            Args:
+                config (dict): complete mycroft configuration
+        """
+        self.config = config
         listener_config = self.config.get('listener')
         self.upload_config = listener_config.get('wake_word_upload')
-        self.wake_word_name = wake_word_recognizer.key_phrase
-
         self.overflow_exc = listener_config.get('overflow_exception', False)
-
-        speech_recognition.Recognizer.__init__(self)
-        self.wake_word_recognizer = wake_word_recognizer
-        self.audio = pyaudio.PyAudio()
         self.multiplier = listener_config.get('multiplier')
         self.energy_ratio = listener_config.get('energy_ratio')
-        # check the config for the flag to save wake words.
 
+        # check the config for the flag to save wake words.
         self.save_utterances = listener_config.get('record_utterances', False)
         self.save_wake_words = listener_config.get('record_wake_words') \
             or self.upload_config['enable'] or self.config['opt_in']
-        self.upload_lock = Lock()
-        self.save_wake_words_dir = join(gettempdir(), 'mycroft_wake_words')
-        self.filenames_to_upload = []
-        self.mic_level_file = os.path.join(get_ipc_directory(), "mic_level")
-        self._stop_signaled = False
+        self._update_wake_word_duration()
 
+    def set_wake_word_recognizer(self, wake_word_recognizer):
+        """
+            Replace the wake word engine, used from the next wake word check.
+
+            Args:
+                wake_word_recognizer (HotWordEngine): new engine
+        """
+        self.wake_word_recognizer = wake_word_recognizer
+        self.wake_word_name = wake_word_recognizer.key_phrase
+        self._update_wake_word_duration()
+
+    def _update_wake_word_duration(self):
         # The maximum audio in seconds to keep for transcribing a phrase
         # The wake word must fit in this time
-        num_phonemes = wake_word_recognizer.num_phonemes
+        listener_config = self.config.get('listener')
+        num_phonemes = self.wake_word_recognizer.num_phonemes
         len_phoneme = listener_config.get('phoneme_duration', 120) / 1000.0
         self.TEST_WW_SEC = num_phonemes * len_phoneme
         self.SAVED_WW_SEC = 3 if self.save_wake_words else self.TEST_WW_SEC
 
-        try:
-            self.account_id = DeviceApi().get()['user']['uuid']
-        except (requests.RequestException, AttributeError):
-            self.account_id = '0'
-
     def record_sound_chunk(self, source):
         return source.stream.read(source.CHUNK, self.overflow_exc)
 
@@ -337,36 +505,51 @@ class ResponsiveRecognizer(speech_recognition.Recognizer):
         """
         self._stop_signaled = True
 
-    def _upload_file(self, filename):
-        server = self.upload_config['server']
-        keyfile = resolve_resource_file('wakeword_rsa')
-        userfile = expanduser('~/.mycroft/wakeword_rsa')
-
-        if not isfile(userfile):
-            shutil.copy2(keyfile, userfile)
-            os.chmod(userfile, 0o600)
-            keyfile = userfile
-
-        address = '{}@{}:{}'.format(
-            self.upload_config['user'], server, self.upload_config['folder']
-        )
-
-        with self.upload_lock:
-            self.filenames_to_upload.append(filename)
-            for i, fn in enumerate(self.filenames_to_upload):
-                LOG.debug('Uploading wake word...')
-                os.chmod(fn, 0o666)
-                scp_status = Popen([
-                    'scp', '-o', 'StrictHostKeyChecking=no', '-P',
-                    str(self.upload_config['port']), '-i', keyfile,
-                    fn, address
-                ], stdout=PIPE, stderr=PIPE).wait()
-                if scp_status == 0:
-                    del self.filenames_to_upload[i]
-                    os.remove(fn)
-                else:
-                    LOG.debug('Failed to upload wake word to metrics server')
-                    break
+    @property
+    def sample_writer(self):
+        """ Background writer for wake word samples, started on first use """
+        if self._sample_writer is None:
+            self._sample_writer = WakeWordSampleWriter(
+                self.save_wake_words_dir, lambda: self.account_id,
+                self._get_model_hash)
+            self._sample_writer.start()
+        return self._sample_writer
+
+    def _get_model_hash(self):
+        """
+            Hash of the precise model in use, recalculated only when the
+            model file changes. Called by the sample writer thread.
+        """
+        if self.wake_word_recognizer.__class__.__name__ != 'PreciseHotword':
+            return '0'
+        _, model_path = self.wake_word_recognizer.get_model_info()
+        try:
+            mtime = os.path.getmtime(model_path)
+        except OSError:
+            return '0'
+        if self._model_hash[:2] != (model_path, mtime):
+            model_hash = md5()
+            with open(model_path, 'rb') as f:
+                for block in iter(lambda: f.read(65536), b''):
+                    model_hash.update(block)
+            self._model_hash = (model_path, mtime, model_hash.hexdigest())
+        return self._model_hash[2]
+
+    def _save_wake_word(self, byte_data, source, ww_module):
+        """
+            Queue the wake word audio to be saved (and uploaded) by the
+            background writer.
+        """
+        components = [
+            self.wake_word_recognizer.key_phrase.replace(' ', '-'),
+            md5(ww_module.encode('utf-8')).hexdigest(),
+            str(int(1000 * get_time())),
+            SessionManager.get().session_id
+        ]
+        upload = self.upload_config['enable'] or self.config['opt_in']
+        self.sample_writer.save(self._create_audio_data(byte_data, source),
+                                components,
+                                self.upload_config if upload else None)
 
     def _wait_until_wake_word(self, source, sec_per_buffer):
         """Listen continuously on source until a wake word is spoken
@@ -401,11 +584,6 @@ class ResponsiveRecognizer(speech_recognition.Recognizer):
         energy_avg_samples = int(5 / sec_per_buffer)  # avg over last 5 secs
 
         ww_module = self.wake_word_recognizer.__class__.__name__
-        if ww_module == 'PreciseHotword':
-            _, model_path = self.wake_word_recognizer.get_model_info()
-            model_hash = check_output(['md5sum', model_path]).split()[0]
-        else:
-            model_hash = '0'
         counter = 0
 
         while not said_wake_word and not self._stop_signaled:
@@ -460,31 +638,10 @@ class ResponsiveRecognizer(speech_recognition.Recognizer):
                 audio_data = chopped + silence
                 said_wake_word = \
                     self.wake_word_recognizer.found_wake_word(audio_data)
-                # if a wake word is success full then record audio in temp
-                # file.
+                # if a wake word is successful then save the audio in
+                # the background
                 if self.save_wake_words and said_wake_word:
-                    audio = self._create_audio_data(byte_data, source)
-
-                    if not isdir(self.save_wake_words_dir):
-                        mkdir(self.save_wake_words_dir)
-                    dr = self.save_wake_words_dir
-
-                    components = [
-                        self.wake_word_name.replace(' ', '-'),
-                        md5(ww_module.encode('utf-8')).hexdigest(),
-                        str(int(1000 * get_time())),
-                        SessionManager.get().session_id,
-                        self.account_id,
-                        str(model_hash)
-                    ]
-                    fn = join(dr, '.'.join(components) + '.wav')
-                    with open(fn, 'wb') as f:
-                        f.write(audio.get_wav_data())
-
-                    if self.upload_config['enable'] or self.config['opt_in']:
-                        t = Thread(target=self._upload_file, args=(fn,))
-                        t.daemon = True
-                        t.start()
+                    self._save_wake_word(byte_data, source, ww_module)
 
     @staticmethod
     def _create_audio_data(raw_data, source):
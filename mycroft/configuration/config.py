@@ -17,7 +17,11 @@
 import re
 import json
 import inflection
+from copy import deepcopy
+from collections import Counter
+from os import stat
 from os.path import exists, isfile, join, dirname, expanduser
+from threading import RLock
 from requests import RequestException
 
 from mycroft.util.json_helper import load_commented_json
@@ -102,6 +106,8 @@ class LocalConf(dict):
     """
         Config dict from file.
     """
+    reads = Counter()  # Number of times each file was read by this process
+
     def __init__(self, path):
         super(LocalConf, self).__init__()
         if path:
@@ -118,6 +124,7 @@ class LocalConf(dict):
         if exists(path) and isfile(path):
             try:
                 config = load_commented_json(path)
+                LocalConf.reads[path] += 1
                 for key in config:
                     self.__setitem__(key, config[key])
 
@@ -194,9 +201,30 @@ USER_CONFIG = join(expanduser('~'), '.mycroft/mycroft.conf')
 REMOTE_CONFIG = "mycroft.ai"
 
 
+def _file_stamp(path):
+    """ Modification time and size of a file, None if it doesn't exist. """
+    try:
+        info = stat(path)
+        return info.st_mtime, info.st_size
+    except OSError:
+        return None
+
+
+def _content_stamp(config):
+    """ Stamp of a config fetched from the server. """
+    return hash(json.dumps(config, sort_keys=True, default=str))
+
+
 class Configuration(object):
     __config = {}  # Cached config
     __patch = {}  # Patch config that skills can update to override config
+    __patch_version = 0
+    __files = {}  # Path -> (stamp, LocalConf) of the config files read
+    # Layers of the default stack, [name, stamp, config, merged up to here]
+    __layers = []
+    __callbacks = {}  # Section -> functions called when it changes
+    __lock = RLock()
+    version = 0  # Incremented each time the cached config changes
 
     @staticmethod
     def get(configs=None, cache=True):
@@ -214,39 +242,156 @@ class Configuration(object):
             return Configuration.load_config_stack(configs, cache)
 
     @staticmethod
-    def load_config_stack(configs=None, cache=False):
+    def load_config_stack(configs=None, cache=False, remote=False):
         """
             load a stack of config dicts into a single dict
 
+            The default stack (default, remote, system, user and patch
+            configs) is loaded layer by layer. Layers are kept with the
+            mtime of their file and only the layers that changed, and the
+            ones above them, are merged again.
+
             Args:
                 configs (list): list of dicts to load
                 cache (boolean): True if result should be cached
+                remote (boolean): fetch the remote config again
 
             Returns: merged dict of all configuration files
         """
-        if not configs:
-            configs = [LocalConf(DEFAULT_CONFIG), RemoteConf(),
-                       LocalConf(SYSTEM_CONFIG), LocalConf(USER_CONFIG),
-                       Configuration.__patch]
-        else:
-            # Handle strings in stack
-            for index, item in enumerate(configs):
-                if isinstance(item, str):
-                    configs[index] = LocalConf(item)
-
-        # Merge all configs into one
-        base = {}
-        for c in configs:
-            merge_dict(base, c)
-
-        # copy into cache
-        if cache:
-            Configuration.__config.clear()
-            for key in base:
-                Configuration.__config[key] = base[key]
-            return Configuration.__config
+        with Configuration.__lock:
+            if not configs:
+                base = Configuration._merge_layers(remote)
+            else:
+                # Handle strings in stack, copied as merging modifies
+                # the nested dicts
+                for index, item in enumerate(configs):
+                    if isinstance(item, str):
+                        configs[index] = deepcopy(
+                            Configuration._load_file(item))
+
+                # Merge all configs into one
+                base = {}
+                for c in configs:
+                    merge_dict(base, c)
+                if cache:
+                    # The cache no longer reflects the default stack
+                    Configuration.__layers = []
+                    Configuration.__files = {}
+
+            if not cache:
+                return base
+
+            # copy into cache
+            config = Configuration.__config
+            changed = [section for section in set(config) | set(base)
+                       if config.get(section) != base.get(section)]
+            if changed:
+                config.clear()
+                for key in base:
+                    config[key] = base[key]
+                Configuration.version += 1
+        Configuration._notify(changed)
+        return Configuration.__config
+
+    @staticmethod
+    def _merge_layers(remote):
+        """
+            Merge the default stack, loading only the layers that changed.
+
+            Args:
+                remote (boolean): fetch the remote config again
+        """
+        layers = Configuration.__layers
+        stamps = [('default', _file_stamp(DEFAULT_CONFIG)),
+                  ('remote', None),
+                  ('system', _file_stamp(SYSTEM_CONFIG)),
+                  ('user', _file_stamp(USER_CONFIG)),
+                  ('patch', Configuration.__patch_version)]
+
+        merged = {}
+        reload_all = False
+        for index, (name, stamp) in enumerate(stamps):
+            cached = layers[index] if index < len(layers) else None
+            if name == 'remote':
+                if remote or cached is None:
+                    config = RemoteConf()
+                    stamp = _content_stamp(config)
+                else:
+                    config, stamp = cached[2], cached[1]
+            elif cached is None or cached[1] != stamp:
+                config = Configuration._load_layer(name)
+            else:
+                config = cached[2]
+
+            if reload_all or cached is None or cached[1] != stamp:
+                reload_all = True
+                merged = deepcopy(merged)
+                merge_dict(merged, deepcopy(config))
+                layer = [name, stamp, config, merged]
+                if cached is None:
+                    layers.append(layer)
+                else:
+                    layers[index] = layer
+            else:
+                merged = cached[3]
+        return deepcopy(merged)
+
+    @staticmethod
+    def _load_layer(name):
+        if name == 'default':
+            return Configuration._load_file(DEFAULT_CONFIG)
+        elif name == 'system':
+            return Configuration._load_file(SYSTEM_CONFIG)
+        elif name == 'user':
+            return Configuration._load_file(USER_CONFIG)
         else:
-            return base
+            return deepcopy(Configuration.__patch)
+
+    @staticmethod
+    def _load_file(path):
+        """
+            Load a config file, reusing the last read while the file is
+            unchanged. The returned LocalConf is shared, don't modify it.
+        """
+        with Configuration.__lock:
+            stamp = _file_stamp(path)
+            cached = Configuration.__files.get(path)
+            if cached is None or cached[0] != stamp:
+                cached = (stamp, LocalConf(path))
+                Configuration.__files[path] = cached
+            return cached[1]
+
+    @staticmethod
+    def on_change(section, callback):
+        """
+            Register a function called when a config section changes.
+
+            Args:
+                section (str): top level key of the config, e.g. "tts"
+                callback: function called with the new value of the section
+        """
+        with Configuration.__lock:
+            Configuration.__callbacks.setdefault(section, []).append(
+                callback)
+
+    @staticmethod
+    def remove_on_change(section, callback):
+        """ Remove a function registered with on_change. """
+        with Configuration.__lock:
+            callbacks = Configuration.__callbacks.get(section, [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    @staticmethod
+    def _notify(sections):
+        for section in sections:
+            with Configuration.__lock:
+                callbacks = list(Configuration.__callbacks.get(section, []))
+            for callback in callbacks:
+                try:
+                    callback(Configuration.__config.get(section))
+                except Exception:
+                    LOG.exception('Error in configuration change callback')
 
     @staticmethod
     def init(ws):
@@ -265,7 +410,7 @@ class Configuration(object):
             handler for configuration.updated, triggers an update
             of cached config.
         """
-        Configuration.load_config_stack(cache=True)
+        Configuration.load_config_stack(cache=True, remote=True)
 
     @staticmethod
     def patch(message):
@@ -277,5 +422,7 @@ class Configuration(object):
                          in the data payload.
         """
         config = message.data.get("config", {})
-        merge_dict(Configuration.__patch, config)
+        with Configuration.__lock:
+            merge_dict(Configuration.__patch, config)
+            Configuration.__patch_version += 1
         Configuration.load_config_stack(cache=True)
@@ -34,6 +34,7 @@ class MustacheDialogRenderer(object):
 
     def __init__(self):
         self.templates = {}
+        self.files = {}
 
     def load_template_file(self, template_name, filename):
         """
@@ -43,6 +44,7 @@ class MustacheDialogRenderer(object):
             template_name (str): a unique identifier for a group of templates
             filename (str): a fully qualified filename of a mustache template.
         """
+        self.files[template_name] = filename
         with open(filename, 'r') as f:
             for line in f:
                 template_text = line.strip()
@@ -87,6 +89,19 @@ class MustacheDialogRenderer(object):
         line = line.format(**context)
         return line
 
+    def static_lines(self, template_name):
+        """
+        Get the templates of a group that render without a context
+
+        Args:
+            template_name (str): the name of a template group.
+
+        Returns:
+            list: the templates without placeholders
+        """
+        return [t for t in self.templates.get(template_name, [])
+                if t and '{' not in t]
+
 
 class DialogLoader(object):
     """
@@ -12,15 +12,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import itertools
 import json
+import os
 import threading
 import time
+import weakref
+from bisect import bisect_left
+from queue import Queue, Empty, Full
 
 import requests
 
 from mycroft.api import DeviceApi, is_paired
 from mycroft.configuration import Configuration
+from mycroft.metrics.trace import trace_span
 from mycroft.session import SessionManager
+from mycroft.util import get_cache_directory
+from mycroft.util.cache import get_cache_janitor
 from mycroft.util.log import LOG
 from mycroft.util.setup_base import get_version
 from copy import copy
@@ -46,12 +54,19 @@ def report_timing(ident, system, timing, additional_data=None):
     """
         Create standardized message for reporting timing.
 
+        The timing is also recorded as a span of the interaction's local
+        trace.
+
         ident (str):            identifier of user interaction
         system (str):           system the that's generated the report
         timing (stopwatch):     Stopwatch object with recorded timing
         additional_data (dict): dictionary with related data
     """
     additional_data = additional_data or {}
+    # Speech not caused by an utterance is reported as 'unknown'
+    if ident != 'unknown':
+        trace_span(ident, system, timing.timestamp, timing.time,
+                   additional_data)
     report = copy(additional_data)
     report['id'] = ident
     report['system'] = system
@@ -110,75 +125,298 @@ class Stopwatch(object):
             return 'Not started'
 
 
+class Histogram(object):
+    """
+        Fixed-memory histogram of measurements.
+
+        Values are counted into buckets with the given upper bounds, so the
+        memory used doesn't grow with the number of measurements.
+
+        Args:
+            bounds (list): sorted upper bounds of the buckets, any value
+                           above the last bound goes into an overflow bucket
+    """
+    # Default bounds suitable for latencies measured in seconds
+    DEFAULT_BOUNDS = [0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5,
+                      1.0, 2.0, 5.0, 10.0]
+
+    def __init__(self, bounds=None):
+        self.bounds = list(bounds or Histogram.DEFAULT_BOUNDS)
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self.buckets = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
+
+    def add(self, value):
+        """
+            Count a measurement into the histogram.
+
+            Args:
+                value (float): measured value
+        """
+        index = bisect_left(self.bounds, value)
+        with self.lock:
+            self.buckets[index] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, percent):
+        """
+            Estimate a percentile from the bucket counts.
+
+            Args:
+                percent (float): percentile to estimate (0 - 100)
+
+            Returns:
+                float: upper bound of the bucket containing the percentile
+                       or None if nothing has been measured
+        """
+        with self.lock:
+            if self.count == 0:
+                return None
+            target = self.count * percent / 100.0
+            seen = 0
+            for index, count in enumerate(self.buckets):
+                seen += count
+                if seen >= target and count > 0:
+                    if index < len(self.bounds):
+                        return min(self.bounds[index], self.max)
+                    return self.max
+            return self.max
+
+    def to_dict(self):
+        """
+            Summary of the histogram suitable for json serialization.
+        """
+        with self.lock:
+            count = self.count
+            summary = {
+                'count': count,
+                'sum': self.total,
+                'min': self.min,
+                'max': self.max,
+                'mean': self.total / count if count else None,
+                'buckets': dict(zip([str(b) for b in self.bounds] + ['inf'],
+                                    self.buckets))
+            }
+        summary['p50'] = self.percentile(50)
+        summary['p90'] = self.percentile(90)
+        summary['p99'] = self.percentile(99)
+        return summary
+
+
 class MetricsAggregator(object):
     """
-    MetricsAggregator is not threadsafe, and multiple clients writing the
-    same metric "concurrently" may result in data loss.
+    Thread safe collection of counters, timers, levels and attributes.
+
+    Updates only hold a lock for the update itself and timers are counted
+    into fixed-memory Histograms, so the aggregator can be used from hot
+    paths in any thread. Values since the last flush() are sent by the
+    background MetricsPublisher, running totals are dumped as json to the
+    metrics cache directory.
+
+    Args:
+        name (str): name of the dump file, defaults to metrics-<pid>-<n>
+                    where n numbers the aggregators of the process
     """
+    _ids = itertools.count()
 
-    def __init__(self):
-        self._counters = {}
-        self._timers = {}
-        self._levels = {}
-        self._attributes = {}
-        self.attr("version", get_version())
+    def __init__(self, name=None):
+        self.name = name or 'metrics-{}-{}'.format(os.getpid(),
+                                                   next(self._ids))
+        self.lock = threading.Lock()
+        self._total_counters = {}
+        self._total_timers = {}
+        self.clear()
+        get_publisher().register(self)
 
     def increment(self, name, value=1):
-        cur = self._counters.get(name, 0)
-        self._counters[name] = cur + value
+        with self.lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+            self._total_counters[name] = (self._total_counters.get(name, 0) +
+                                          value)
 
     def timer(self, name, value):
-        cur = self._timers.get(name)
-        if not cur:
-            self._timers[name] = []
-            cur = self._timers[name] = []
-        cur.append(value)
+        with self.lock:
+            if name not in self._timers:
+                self._timers[name] = Histogram()
+            if name not in self._total_timers:
+                self._total_timers[name] = Histogram()
+            self._timers[name].add(value)
+            self._total_timers[name].add(value)
 
     def level(self, name, value):
-        self._levels[name] = value
+        with self.lock:
+            self._levels[name] = value
 
     def clear(self):
+        with self.lock:
+            self._clear()
+
+    def _clear(self):
         self._counters = {}
         self._timers = {}
         self._levels = {}
-        self._attributes = {}
-        self.attr("version", get_version())
+        self._attributes = {"version": get_version()}
 
     def attr(self, name, value):
-        self._attributes[name] = value
+        with self.lock:
+            self._attributes[name] = value
 
     def flush(self):
-        publisher = MetricsPublisher()
-        payload = {
-            'counters': self._counters,
-            'timers': self._timers,
-            'levels': self._levels,
-            'attributes': self._attributes
-        }
-        self.clear()
+        """ Queue the metrics since the last flush for publishing. """
+        with self.lock:
+            payload = {
+                'counters': self._counters,
+                'timers': self._timers,
+                'levels': self._levels,
+                'attributes': self._attributes
+            }
+            self._clear()
+        payload['timers'] = {name: histogram.to_dict()
+                             for name, histogram in payload['timers'].items()}
         count = (len(payload['counters']) + len(payload['timers']) +
                  len(payload['levels']))
         if count > 0:
             LOG.debug(json.dumps(payload))
+            get_publisher().publish(payload)
 
-            def publish():
-                publisher.publish(payload)
+    def totals(self):
+        """ Running totals since the aggregator was created. """
+        with self.lock:
+            counters = dict(self._total_counters)
+            timers = dict(self._total_timers)
+            levels = dict(self._levels)
+            attributes = dict(self._attributes)
+        return {
+            'counters': counters,
+            'timers': {name: histogram.to_dict()
+                       for name, histogram in timers.items()},
+            'levels': levels,
+            'attributes': attributes
+        }
 
-            threading.Thread(target=publish).start()
+    def dump(self, directory=None):
+        """
+        Write the running totals to <directory>/<name>.json
 
+        Args:
+            directory (str): defaults to the metrics cache directory
+        """
+        directory = directory or get_cache_directory('metrics')
+        filename = os.path.join(directory, self.name + '.json')
+        with open(filename + '.tmp', 'w') as f:
+            json.dump(self.totals(), f, indent=2)
+        os.rename(filename + '.tmp', filename)
+        get_cache_janitor().record(filename)
 
-class MetricsPublisher(object):
-    def __init__(self, url=None, enabled=False):
-        conf = Configuration().get()['server']
-        self.url = url or conf['url']
-        self.enabled = enabled or conf['metrics']
+
+class MetricsPublisher(threading.Thread):
+    """
+    Single background thread publishing the metrics of the process.
+
+    Every interval seconds the registered aggregators are flushed and
+    dumped, and the queued payloads are posted one after the other over a
+    kept alive connection. Payloads are dropped if the queue is full.
+
+    The configuration is read again before each flush, so enabling or
+    disabling the metrics takes effect without a restart.
+    """
+    def __init__(self, url=None, enabled=False, interval=None,
+                 max_queued=100):
+        super(MetricsPublisher, self).__init__()
+        self.daemon = True
+        self._url = url
+        self._enabled = enabled
+        self._interval = interval
+        self.update_config()
+        self.queue = Queue(max_queued)
+        self.aggregators = weakref.WeakSet()
+        self.session = requests.Session()
+        self.dropped = 0
+        self._terminated = threading.Event()
+
+    def update_config(self):
+        """ Read the settings not given to the constructor from the config.
+        """
+        config = Configuration.get()
+        conf = config['server']
+        self.url = self._url or conf['url']
+        self.enabled = self._enabled or conf['metrics']
+        metrics_config = config.get('metrics', {})
+        self.interval = self._interval or metrics_config.get('interval', 60)
+        self.dump_enabled = metrics_config.get('dump', True)
+
+    def register(self, aggregator):
+        self.aggregators.add(aggregator)
 
     def publish(self, events):
+        """ Queue events for publishing, never blocks. """
+        if not self.enabled:
+            return
+        try:
+            self.queue.put_nowait(events)
+        except Full:
+            self.dropped += 1
+
+    def run(self):
+        while not self._terminated.wait(self.interval):
+            self.process()
+
+    def process(self):
+        self.update_config()
+        for aggregator in list(self.aggregators):
+            aggregator.flush()
+            if self.dump_enabled:
+                try:
+                    aggregator.dump()
+                except (IOError, OSError):
+                    LOG.warning('Could not dump metrics')
+        batch = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except Empty:
+                break
+        for events in batch:
+            try:
+                self.send(events)
+            except requests.RequestException as e:
+                LOG.warning('Could not publish metrics ({})'.format(e))
+
+    def send(self, events):
         if 'session_id' not in events:
             session_id = SessionManager.get().session_id
             events['session_id'] = session_id
         if self.enabled:
-            requests.post(
+            self.session.post(
                 self.url,
                 headers={'Content-Type': 'application/json'},
                 data=json.dumps(events), verify=False)
+
+    def stop(self):
+        self._terminated.set()
+
+
+_publisher = None
+_publisher_lock = threading.Lock()
+
+
+def get_publisher():
+    """ The metrics publisher of this process, started on first use. """
+    global _publisher
+    with _publisher_lock:
+        if _publisher is None:
+            _publisher = MetricsPublisher()
+            _publisher.start()
+        return _publisher
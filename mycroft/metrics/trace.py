@@ -0,0 +1,264 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+    Local tracing of user interactions.
+
+    Every process records the time spent in each stage of an interaction
+    (recording, stt, intent_service, skill_handler, speech, ...) as spans
+    tagged with the interaction's ident, the trace id carried in the
+    Message.context from the listener to the audio service. The latest
+    spans are kept in a ring buffer and written by a background thread to
+    the trace folder in the cache as Chrome trace events, one per line.
+
+    Show the last interactions as a waterfall:
+
+        python -m mycroft.metrics.trace -n 3
+
+    or export them for chrome://tracing or https://ui.perfetto.dev:
+
+        python -m mycroft.metrics.trace -n 10 -o trace.json
+"""
+import json
+import os
+import threading
+from argparse import ArgumentParser
+from collections import deque, OrderedDict
+from glob import glob
+from os.path import join
+
+import mycroft.util
+from mycroft.configuration import Configuration
+from mycroft.util.cache import get_cache_janitor
+from mycroft.util.log import LOG
+
+
+class Tracer(threading.Thread):
+    """
+        Records spans of this process.
+
+        Recording only appends to memory, the new spans are written to the
+        trace file every flush_interval seconds.
+
+        Args:
+            directory (str): folder for the trace files
+            max_spans (int): number of spans kept in the ring buffer and
+                             the trace file
+            flush_interval (float): seconds between writes of the file
+    """
+    def __init__(self, directory, max_spans=1000, flush_interval=1.0):
+        super(Tracer, self).__init__()
+        self.daemon = True
+        self.spans = deque(maxlen=max_spans)
+        self.filename = join(directory, 'trace-{}.json'.format(os.getpid()))
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = []
+        self._lines = 0
+        self._terminated = threading.Event()
+        # Shrunk by the tracer itself
+        get_cache_janitor().protect(self.filename)
+
+    def record(self, trace_id, name, start, duration, args=None):
+        """
+            Record a span.
+
+            Args:
+                trace_id (str): id of the interaction
+                name (str): stage of the interaction
+                start (float): time.time() when the stage started
+                duration (float): time spent in seconds
+                args (dict): additional information about the stage
+        """
+        span_args = dict(args or {})
+        span_args['trace_id'] = trace_id
+        event = {
+            'name': name,
+            'cat': 'mycroft',
+            'ph': 'X',
+            'ts': int(start * 1000000),
+            'dur': int(duration * 1000000),
+            'pid': os.getpid(),
+            'tid': threading.current_thread().ident,
+            'args': span_args
+        }
+        with self.lock:
+            self.spans.append(event)
+            self._pending.append(event)
+
+    def run(self):
+        while not self._terminated.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """ Write the spans recorded since the last flush to the file. """
+        with self._write_lock:
+            with self.lock:
+                pending = self._pending
+                self._pending = []
+                spans = list(self.spans)
+            if not pending:
+                return
+            try:
+                self._write(pending, spans)
+                get_cache_janitor().record(self.filename)
+            except (IOError, OSError, TypeError, ValueError):
+                LOG.warning('Could not write trace spans')
+
+    def _write(self, pending, spans):
+        if self._lines + len(pending) > 2 * self.spans.maxlen:
+            # Shrink the file to the ring buffer
+            with open(self.filename + '.tmp', 'w') as f:
+                f.writelines(json.dumps(e) + '\n' for e in spans)
+            os.rename(self.filename + '.tmp', self.filename)
+            self._lines = len(spans)
+        else:
+            with open(self.filename, 'a') as f:
+                f.writelines(json.dumps(e) + '\n' for e in pending)
+            self._lines += len(pending)
+
+    def stop(self):
+        self._terminated.set()
+        self.flush()
+
+
+_tracer = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer():
+    """ The tracer of this process, None if tracing is disabled. """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            config = Configuration.get().get('tracing', {})
+            if not config.get('enabled', True):
+                return None
+            _tracer = Tracer(mycroft.util.get_cache_directory('trace'),
+                             config.get('max_spans', 1000),
+                             config.get('flush_interval', 1.0))
+            _tracer.start()
+        return _tracer
+
+
+def trace_span(trace_id, name, start, duration, args=None):
+    """
+        Record a span of an interaction if tracing is enabled.
+
+        Args:
+            trace_id (str): id of the interaction
+            name (str): stage of the interaction
+            start (float): time.time() when the stage started
+            duration (float): time spent in seconds
+            args (dict): additional information about the stage
+    """
+    if not trace_id or start is None or duration is None:
+        return
+    tracer = get_tracer()
+    if tracer:
+        tracer.record(trace_id, name, start, duration, args)
+
+
+def load_spans(directory):
+    """ Read the spans of all processes from the trace files. """
+    events = []
+    for filename in glob(join(directory, 'trace-*.json')):
+        try:
+            with open(filename) as f:
+                for line in f:
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        pass  # Partially written line
+        except IOError:
+            pass
+    return events
+
+
+def last_interactions(events, count):
+    """
+        Group spans by interaction.
+
+        Args:
+            events (list): spans as loaded by load_spans()
+            count (int): number of interactions to return
+
+        Returns:
+            OrderedDict: trace id -> spans sorted by start, for the last
+                         count interactions in order of their start
+    """
+    traces = {}
+    for event in events:
+        trace_id = event.get('args', {}).get('trace_id')
+        traces.setdefault(trace_id, []).append(event)
+    ordered = sorted(traces.items(),
+                     key=lambda t: min(e['ts'] for e in t[1]))
+    return OrderedDict((trace_id, sorted(spans, key=lambda e: e['ts']))
+                       for trace_id, spans in ordered[-count:])
+
+
+def waterfall(trace_id, spans, width=50):
+    """
+        Render the spans of an interaction as a text waterfall.
+
+        Returns:
+            str: one line per span, offsets and durations in seconds
+    """
+    start = min(e['ts'] for e in spans)
+    end = max(e['ts'] + e['dur'] for e in spans)
+    total = max(end - start, 1)
+    lines = ['{} ({:.3f} s)'.format(trace_id, total / 1000000.0)]
+    for e in spans:
+        begin = int(round((e['ts'] - start) * width / float(total)))
+        length = max(int(round(e['dur'] * width / float(total))), 1)
+        begin = min(begin, width - length)
+        bar = ' ' * begin + '#' * length + ' ' * (width - begin - length)
+        lines.append('  {:<18}|{}| {:7.3f} +{:.3f} s'.format(
+            e['name'], bar, (e['ts'] - start) / 1000000.0,
+            e['dur'] / 1000000.0))
+    return '\n'.join(lines)
+
+
+def export(traces, filename):
+    """ Write interactions to a Chrome trace event file. """
+    events = [e for spans in traces.values() for e in spans]
+    with open(filename, 'w') as f:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+
+
+def main():
+    parser = ArgumentParser(description='Show where the time of the last '
+                                        'interactions was spent')
+    parser.add_argument('-n', '--count', type=int, default=5,
+                        help='number of interactions to show')
+    parser.add_argument('-o', '--output',
+                        help='export the interactions to this Chrome trace '
+                             'event file')
+    parser.add_argument('-d', '--directory',
+                        help='folder of the trace files, defaults to the '
+                             'trace cache directory')
+    args = parser.parse_args()
+
+    directory = args.directory or mycroft.util.get_cache_directory('trace')
+    traces = last_interactions(load_spans(directory), args.count)
+    for trace_id, spans in traces.items():
+        print(waterfall(trace_id, spans))
+        print('')
+    if args.output:
+        export(traces, args.output)
+
+
+if __name__ == '__main__':
+    main()
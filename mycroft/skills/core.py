@@ -126,6 +126,7 @@ def load_skill(skill_descriptor, emitter, skill_id, BLACKLISTED_SKILLS=None):
             # Set up intent handlers
             skill.initialize()
             skill._register_decorated()
+            skill.settings.start_sync()
             LOG.info("Loaded " + name)
 
             # The very first time a skill is run, speak the intro
@@ -596,7 +597,8 @@ class MycroftSkill(object):
                         handler()
                     else:
                         handler(message)
-                    self.settings.store()  # Store settings if they've changed
+                # Store settings if they've changed
+                self.settings.schedule_store()
 
             except Exception as e:
                 # Convert "MyFancySkill" to "My Fancy Skill" for speaking
@@ -839,7 +841,7 @@ class MycroftSkill(object):
         re.compile(regex)  # validate regex
         self.emitter.emit(Message('register_vocab', {'regex': regex}))
 
-    def speak(self, utterance, expect_response=False):
+    def speak(self, utterance, expect_response=False, meta=None):
         """
             Speak a sentence.
 
@@ -848,11 +850,15 @@ class MycroftSkill(object):
                 expect_response (bool): set to True if Mycroft should listen
                                         for a response immediately after
                                         speaking the utterance.
+                meta (dict):            information about the source of the
+                                        utterance, e.g. the dialog file
         """
         # registers the skill as being active
         self.enclosure.register(self.name)
         data = {'utterance': utterance,
                 'expect_response': expect_response}
+        if meta:
+            data['meta'] = meta
         message = dig_for_message()
         if message:
             self.emitter.emit(message.reply("speak", data))
@@ -871,7 +877,10 @@ class MycroftSkill(object):
                                         speaking the utterance.
         """
         data = data or {}
-        self.speak(self.dialog_renderer.render(key, data), expect_response)
+        meta = {'skill': self.name, 'dialog': key,
+                'dialog_file': self.dialog_renderer.files.get(key)}
+        self.speak(self.dialog_renderer.render(key, data), expect_response,
+                   meta)
 
     def init_dialog(self, root_directory):
         dialog_dir = join(root_directory, 'dialog', self.lang)
@@ -60,7 +60,8 @@
 
 import json
 import hashlib
-from threading import Timer
+import os
+from threading import Event, Lock, Thread, Timer
 from os.path import isfile, join, expanduser
 
 from mycroft.api import DeviceApi, is_paired
@@ -72,10 +73,17 @@ class SkillSettings(dict):
     """ A dictionary that can easily be save to a file, serialized as json. It
         also syncs to the backend for skill settings
 
+        Changes are tracked so storing unchanged settings doesn't serialize
+        or write anything. Reading a list or dict value, also through
+        values(), items() or copy(), counts as a change since it can be
+        modified in place.
+
         Args:
             directory (str): Path to storage directory
             name (str):      user readable name associated with the settings
     """
+    # Seconds schedule_store() waits to coalesce writes
+    STORE_DELAY = 0.5
 
     def __init__(self, directory, name):
         super(SkillSettings, self).__init__()
@@ -92,29 +100,51 @@ class SkillSettings(dict):
         self._settings_path = join(directory, 'settings.json')
         self._meta_path = join(directory, 'settingsmeta.json')
         self.is_alive = True
-        self.loaded_hash = hash(json.dumps(self, sort_keys=True))
+        self._dirty = False
+        self._stored_json = json.dumps(dict(self), sort_keys=True)
+        self._store_lock = Lock()
+        self._store_timer = None
         self._complete_intialization = False
         self._device_identity = None
         self._api_path = None
         self._user_identity = None
         self.changed_callback = None
-        self._poll_timer = None
+        self._remote_hash = None
         self._is_alive = True
 
-        # if settingsmeta exist
+    def start_sync(self):
+        """ Start syncing with the server if the skill has settingsmeta.
+
+            Called once the skill is loaded, so a sync doesn't race with
+            loading the settings file and initializing the skill.
+        """
         if isfile(self._meta_path):
-            self._poll_skill_settings()
+            get_settings_sync().add(self)
 
-    def run_poll(self, _=None):
-        """Immediately poll the web for new skill settings"""
-        if self._poll_timer:
-            self._poll_timer.cancel()
-            self._poll_skill_settings()
+    def run_poll(self, message=None):
+        """ Immediately poll the web for new skill settings.
+
+            Settings pushed in the message data ("settings": list of skill
+            settings) are applied without polling the backend.
+        """
+        data = getattr(message, 'data', None) or {}
+        if 'settings' in data and self._complete_intialization:
+            pushed = {skill['identifier']: skill
+                      for skill in data['settings'] if skill}
+            settings_meta = self._load_settings_meta()
+            if settings_meta is None:
+                return
+            skill_settings = pushed.get(self._get_meta_hash(settings_meta))
+            if skill_settings:
+                # Compared by store() to find local changes to upload
+                self._remote_settings = skill_settings
+                self._notify_changes(self._apply_remote, skill_settings)
+        else:
+            get_settings_sync().schedule()
 
     def stop_polling(self):
         self._is_alive = False
-        if self._poll_timer:
-            self._poll_timer.cancel()
+        get_settings_sync().remove(self)
 
     def set_changed_callback(self, callback):
         """
@@ -174,19 +204,69 @@ class SkillSettings(dict):
                     self.save_skill_settings(settings)
         self._complete_intialization = True
 
-    @property
-    def _is_stored(self):
-        return hash(json.dumps(self, sort_keys=True)) == self.loaded_hash
+    def _track(self, value):
+        """ Mark the settings as changed if value can be modified in place.
+        """
+        if isinstance(value, (list, dict)):
+            self._dirty = True
+        return value
+
+    def _track_all(self):
+        """ Mark the settings as changed if any value can be modified in
+            place.
+        """
+        for value in super(SkillSettings, self).values():
+            self._track(value)
 
     def __getitem__(self, key):
         """ Get key """
-        return super(SkillSettings, self).__getitem__(key)
+        return self._track(super(SkillSettings, self).__getitem__(key))
+
+    def get(self, key, default=None):
+        return self._track(super(SkillSettings, self).get(key, default))
+
+    def values(self):
+        self._track_all()
+        return super(SkillSettings, self).values()
+
+    def items(self):
+        self._track_all()
+        return super(SkillSettings, self).items()
+
+    def copy(self):
+        self._track_all()
+        return super(SkillSettings, self).copy()
 
     def __setitem__(self, key, value):
         """ Add/Update key. """
         if self.allow_overwrite or key not in self:
+            self._dirty = True
             return super(SkillSettings, self).__setitem__(key, value)
 
+    def __delitem__(self, key):
+        self._dirty = True
+        super(SkillSettings, self).__delitem__(key)
+
+    def update(self, *args, **kwargs):
+        self._dirty = True
+        super(SkillSettings, self).update(*args, **kwargs)
+
+    def pop(self, *args):
+        self._dirty = True
+        return super(SkillSettings, self).pop(*args)
+
+    def popitem(self):
+        self._dirty = True
+        return super(SkillSettings, self).popitem()
+
+    def setdefault(self, key, default=None):
+        self._dirty = True
+        return super(SkillSettings, self).setdefault(key, default)
+
+    def clear(self):
+        self._dirty = True
+        super(SkillSettings, self).clear()
+
     def _load_settings_meta(self):
         """ Loads settings metadata from skills path. """
         if isfile(self._meta_path):
@@ -286,7 +366,7 @@ class SkillSettings(dict):
                 if 'name' in field:
                     if field["name"] in self:
                         sections[i]['fields'][j]['value'] = \
-                            str(self.__getitem__(field['name']))
+                            str(dict.get(self, field['name']))
         meta['skillMetadata']['sections'] = sections
         return meta
 
@@ -360,8 +440,14 @@ class SkillSettings(dict):
             return False if current_hash == str(hashed_meta) else True
         return True
 
-    def update_remote(self):
-        """ update settings state from server """
+    def update_remote(self, device_settings=None):
+        """ update settings state from server
+
+            Args:
+                device_settings (dict): settings of all skills on this
+                                        device by identifier, requested
+                                        from the server if None
+        """
         skills_settings = None
         settings_meta = self._load_settings_meta()
         if settings_meta is None:
@@ -370,48 +456,59 @@ class SkillSettings(dict):
         if self.get('not_owner'):
             skills_settings = self._request_other_settings(hashed_meta)
         if not skills_settings:
-            skills_settings = self._request_my_settings(hashed_meta)
+            if device_settings is None:
+                skills_settings = self._request_my_settings(hashed_meta)
+            else:
+                skills_settings = device_settings.get(hashed_meta)
+                if skills_settings is not None:
+                    self._remote_settings = skills_settings
 
         if skills_settings is not None:
-            self.save_skill_settings(skills_settings)
-            self.store()
+            self._apply_remote(skills_settings)
         else:
-            settings_meta = self._load_settings_meta()
             self._upload_meta(settings_meta, hashed_meta)
 
-    def _poll_skill_settings(self):
-        """ If identifier exists for this skill poll to backend to
-            request settings and store it if it changes
-            TODO: implement as websocket
+    def _apply_remote(self, skill_settings):
+        """ Save the settings from the server if they changed since they
+            were last applied.
+
+            Args:
+                skill_settings (dict): settings of this skill on the server
+        """
+        remote_hash = self.hash(json.dumps(skill_settings, sort_keys=True))
+        if remote_hash != self._remote_hash:
+            self.save_skill_settings(skill_settings)
+            self.store()
+            self._remote_hash = remote_hash
+
+    def _sync(self, device_settings):
+        """ Sync with the server, called by the SettingsSync service.
+
+            Args:
+                device_settings (dict): settings of all skills on this
+                                        device by identifier, None to
+                                        initialize the remote settings
+        """
+        if device_settings is None:
+            self._notify_changes(self.initialize_remote_settings)
+        else:
+            self._notify_changes(self.update_remote, device_settings)
+
+    def _notify_changes(self, func, *args):
+        """ Run func and call the changed callback if the settings changed.
         """
-        original = hash(str(self))
+        original = self._content_hash()
         try:
-            if not is_paired():
-                pass
-            elif not self._complete_intialization:
-                self.initialize_remote_settings()
-                if not self._complete_intialization:
-                    return  # unable to do remote sync
-            else:
-                self.update_remote()
-
+            func(*args)
         except Exception as e:
             LOG.exception('Failed to fetch skill settings: {}'.format(repr(e)))
         finally:
             # Call callback for updated settings
-            if self.changed_callback and hash(str(self)) != original:
+            if self.changed_callback and self._content_hash() != original:
                 self.changed_callback()
 
-        if self._poll_timer:
-            self._poll_timer.cancel()
-
-        if not self._is_alive:
-            return
-
-        # continues to poll settings every minute
-        self._poll_timer = Timer(60, self._poll_skill_settings)
-        self._poll_timer.daemon = True
-        self._poll_timer.start()
+    def _content_hash(self):
+        return self.hash(json.dumps(dict(self), sort_keys=True))
 
     def load_skill_settings_from_file(self):
         """ If settings.json exist, open and read stored values into self """
@@ -528,24 +625,81 @@ class SkillSettings(dict):
                         if (field["name"] in self and
                                 'value' in sections[i]['fields'][j]):
                             remote_val = sections[i]['fields'][j]["value"]
-                            self_val = self.get(field['name'])
+                            self_val = dict.get(self, field['name'])
                             if str(remote_val) != str(self_val):
                                 changed = True
         if self.get('not_owner'):
             changed = False
         return changed
 
+    def schedule_store(self):
+        """ Store the settings after STORE_DELAY seconds if they changed.
+
+            Writes requested in quick succession are coalesced into one.
+        """
+        if not self._dirty:
+            return
+        with self._store_lock:
+            if self._store_timer is None:
+                self._store_timer = Timer(self.STORE_DELAY,
+                                          self._scheduled_store)
+                self._store_timer.daemon = True
+                self._store_timer.start()
+
+    def _scheduled_store(self):
+        with self._store_lock:
+            self._store_timer = None
+        try:
+            self.store()
+        except Exception as e:
+            LOG.error('Failed to store settings of '
+                      '{}: {}'.format(self.name, repr(e)))
+
+    def _write(self, force):
+        """ Atomically replace settings.json if the content changed.
+
+            Skills may change the settings while they are written, the
+            flag is cleared before taking the snapshot so these changes
+            are written by the next store.
+
+            Returns:
+                bool: True if the file was written
+        """
+        self._dirty = False
+        try:
+            # dict() copies the top level atomically, json.dumps() of the
+            # settings themselves would iterate them while they change
+            data = json.dumps(dict(self), sort_keys=True)
+            if not force and data == self._stored_json:
+                return False
+            tmp_path = self._settings_path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                f.write(data)
+                # The content must be on disk before the rename replaces
+                # the old file, or a power loss can leave an empty
+                # settings.json
+                f.flush()
+                os.fsync(f.fileno())
+            os.rename(tmp_path, self._settings_path)
+        except Exception:
+            self._dirty = True
+            raise
+        self._stored_json = data
+        return True
+
     def store(self, force=False):
         """ Store dictionary to file if a change has occured.
 
             Args:
                 force:  Force write despite no change
         """
-
-        if force or not self._is_stored:
-            with open(self._settings_path, 'w') as f:
-                json.dump(self, f)
-            self.loaded_hash = hash(json.dumps(self, sort_keys=True))
+        with self._store_lock:
+            if self._store_timer is not None:
+                self._store_timer.cancel()
+                self._store_timer = None
+            if not (force or self._dirty):
+                return
+            self._write(force)
 
         if self._should_upload_from_change:
             settings_meta = self._load_settings_meta()
@@ -555,3 +709,100 @@ class SkillSettings(dict):
                 LOG.debug("deleting meta data for {}".format(self.name))
                 self._delete_metadata(uuid)
             self._upload_meta(settings_meta, hashed_meta)
+
+
+class SettingsSync(Thread):
+    """ Syncs the settings of all skills with the server.
+
+        A single thread polls the settings of all skills on the device in
+        one request (answered from the ETag cache of the Api if nothing
+        changed) and updates the skills whose settings changed. Skills
+        with settings from another device are still requested one by one.
+
+        Args:
+            interval (int): seconds between polls
+    """
+
+    def __init__(self, interval=60):
+        super(SettingsSync, self).__init__()
+        self.daemon = True
+        self.interval = interval
+        self.skills = []
+        self.lock = Lock()
+        self._wakeup = Event()
+        self._stopped = False
+        self._api = None
+
+    def add(self, settings):
+        """ Start syncing a SkillSettings. """
+        with self.lock:
+            self.skills.append(settings)
+        self.schedule()
+
+    def remove(self, settings):
+        """ Stop syncing a SkillSettings. """
+        with self.lock:
+            self.skills = [s for s in self.skills if s is not settings]
+
+    def schedule(self):
+        """ Poll the server as soon as possible. """
+        self._wakeup.set()
+
+    def run(self):
+        while not self._stopped:
+            self._wakeup.clear()
+            try:
+                self.sync()
+            except Exception as e:
+                LOG.exception('Failed to sync skill settings: '
+                              '{}'.format(repr(e)))
+            self._wakeup.wait(self.interval)
+
+    def sync(self):
+        """ Initialize new skills and update the settings of the others. """
+        with self.lock:
+            skills = list(self.skills)
+        if not skills or not is_paired():
+            return
+
+        for settings in skills:
+            if not settings._complete_intialization:
+                settings._sync(None)
+        skills = [s for s in skills if s._complete_intialization]
+        if skills:
+            device_settings = self.request_settings()
+            for settings in skills:
+                settings._sync(device_settings)
+
+    def request_settings(self):
+        """ Get the settings of all skills on this device.
+
+            Returns:
+                dict: skill settings by identifier
+        """
+        if self._api is None:
+            self._api = DeviceApi()
+        settings = self._api.request({
+            "method": "GET",
+            "path": "/" + self._api.identity.uuid + "/skill"
+        })
+        return {skill['identifier']: skill
+                for skill in settings if skill is not None}
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup.set()
+
+
+_settings_sync = None
+_settings_sync_lock = Lock()
+
+
+def get_settings_sync():
+    """ The settings sync service of this process, started on first use. """
+    global _settings_sync
+    with _settings_sync_lock:
+        if _settings_sync is None:
+            _settings_sync = SettingsSync()
+            _settings_sync.start()
+        return _settings_sync
@@ -12,23 +12,26 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
-import hashlib
 import os
 import random
 import re
 import sys
 from abc import ABCMeta, abstractmethod
-from threading import Thread
-from time import time, sleep
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from threading import Lock, Thread
+from time import time
+from weakref import WeakValueDictionary
 
 import os.path
 from os.path import dirname, exists, isdir, join
 
 import mycroft.util
+from mycroft.audio.sink import AudioSink, AudioStream, SinkPlayback
 from mycroft.client.enclosure.api import EnclosureAPI
 from mycroft.configuration import Configuration
 from mycroft.messagebus.message import Message
 from mycroft.metrics import report_timing, Stopwatch
+from mycroft.tts.cache import TTSCache
 from mycroft.util import (
     play_wav, play_mp3, check_for_signal, create_signal, resolve_resource_file
 )
@@ -53,24 +56,38 @@ class PlaybackThread(Thread):
     """
         Thread class for playing back tts audio and sending
         visime data to enclosure.
+
+        Args:
+            queue (Queue): playback entries or futures resolving to them
+            stream_playback (bool): play wav audio through an in-process
+                                    AudioSink instead of play_wav
     """
 
-    def __init__(self, queue):
+    def __init__(self, queue, stream_playback=True):
         super(PlaybackThread, self).__init__()
         self.queue = queue
+        self.stream_playback = stream_playback
+        self.sink = None
         self._terminated = False
         self._processing_queue = False
-        self._clear_visimes = False
+        self._clear_count = 0
 
     def init(self, tts):
         self.tts = tts
 
     def clear_queue(self):
         """
-            Remove all pending playbacks.
+            Remove all pending playbacks, synthesis not yet started is
+            cancelled.
         """
+        self._clear_count += 1
         while not self.queue.empty():
-            self.queue.get()
+            try:
+                item = self.queue.get_nowait()
+            except Empty:
+                break
+            if isinstance(item, Future):
+                item.cancel()
         try:
             self.p.terminate()
         except:
@@ -83,7 +100,15 @@ class PlaybackThread(Thread):
         """
         while not self._terminated:
             try:
-                snd_type, data, visimes, ident = self.queue.get(timeout=2)
+                item = self.queue.get(timeout=2)
+                if isinstance(item, Future):
+                    # Wait for the synthesis running ahead of playback,
+                    # skip the result if the queue was cleared meanwhile
+                    clear_count = self._clear_count
+                    item = item.result()
+                    if clear_count != self._clear_count:
+                        raise CancelledError
+                snd_type, data, visimes, ident = item
                 self.blink(0.5)
                 if not self._processing_queue:
                     self._processing_queue = True
@@ -91,17 +116,20 @@ class PlaybackThread(Thread):
 
                 stopwatch = Stopwatch()
                 with stopwatch:
-                    if snd_type == 'wav':
-                        self.p = play_wav(data)
-                    elif snd_type == 'mp3':
-                        self.p = play_mp3(data)
+                    self.p = self.play(snd_type, data)
 
                     if visimes:
-                        if self.show_visimes(visimes):
-                            self.clear_queue()
-                    else:
-                        self.p.communicate()
+                        self.show_visimes(visimes)
+                    self.p.communicate()
                     self.p.wait()
+                    if (isinstance(self.p, SinkPlayback) and self.p.failed
+                            and not isinstance(data, AudioStream)):
+                        LOG.warning('Audio output failed, falling back '
+                                    'to play_wav')
+                        self.stream_playback = False
+                        self.p = self.play(snd_type, data)
+                        self.p.communicate()
+                        self.p.wait()
                 send_playback_metric(stopwatch, ident)
 
                 if self.queue.empty():
@@ -110,37 +138,52 @@ class PlaybackThread(Thread):
                 self.blink(0.2)
             except Empty:
                 pass
+            except CancelledError:
+                if self._processing_queue and self.queue.empty():
+                    self.tts.end_audio()
+                    self._processing_queue = False
             except Exception as e:
                 LOG.exception(e)
                 if self._processing_queue:
                     self.tts.end_audio()
                     self._processing_queue = False
 
-    def show_visimes(self, pairs):
+    def play(self, snd_type, data):
         """
-            Send visime data to enclosure
+            Start playing audio.
 
             Args:
-                pairs(list): Visime and timing pair
+                snd_type (str): 'wav' or 'mp3'
+                data: audio file or AudioStream of wav data
 
             Returns:
-                True if button has been pressed.
-        """
-        start = time()
-        for code, duration in pairs:
-            if self._clear_visimes:
-                self._clear_visimes = False
-                return True
-            if self.enclosure:
-                # Include time stamp to assist with animation timing
-                self.enclosure.mouth_viseme(code, start + duration)
-            delta = time() - start
-            if delta < duration:
-                sleep(duration - delta)
-        return False
+                process like handle of the playback
+        """
+        if snd_type == 'wav' and (self.stream_playback or
+                                  isinstance(data, AudioStream)):
+            if self.sink is None:
+                self.sink = AudioSink()
+            return self.sink.play(data)
+        elif snd_type == 'wav':
+            return play_wav(data)
+        elif snd_type == 'mp3':
+            return play_mp3(data)
+
+    def show_visimes(self, pairs):
+        """
+            Send the visime timeline to the enclosure, which animates the
+            mouth in step with the audio.
+
+            Args:
+                pairs(list): Visime and end time pairs
+        """
+        if self.enclosure:
+            self.enclosure.mouth_viseme_list(time(), pairs)
 
     def clear_visimes(self):
-        self._clear_visimes = True
+        """ Stop the mouth animation of the playing sentence. """
+        if self.enclosure:
+            self.enclosure.mouth_reset()
 
     def blink(self, rate=1.0):
         """ Blink mycroft's eyes """
@@ -151,6 +194,9 @@ class PlaybackThread(Thread):
         """ Stop thread """
         self._terminated = True
         self.clear_queue()
+        if self.sink:
+            self.sink.close()
+            self.sink = None
 
 
 class TTS(object):
@@ -183,12 +229,38 @@ class TTS(object):
         self.filename = '/tmp/tts.wav'
         self.enclosure = None
         random.seed()
-        self.queue = Queue()
-        self.playback = PlaybackThread(self.queue)
+        # Sentences are synthesized by a pool of workers running up to
+        # lookahead sentences ahead of the playback
+        pipeline = Configuration.get().get('tts', {}).get('pipeline', {})
+        self.queue = Queue(max(pipeline.get('lookahead', 2), 1))
+        self.synthesis = ThreadPoolExecutor(
+            max_workers=max(self.synthesis_workers(pipeline), 1))
+        self.playback = PlaybackThread(
+            self.queue, pipeline.get('stream_playback', True))
         self.playback.start()
-        self.clear_cache()
+        self.cache = self.create_cache()
+        # Sentences being synthesized into the cache, by key
+        self._key_locks = WeakValueDictionary()
+        self._key_locks_lock = Lock()
         self.spellings = self.load_spellings()
 
+    def synthesis_workers(self, pipeline):
+        """
+            Number of sentences synthesized at the same time
+
+            Args:
+                pipeline (dict): tts.pipeline configuration
+        """
+        return pipeline.get('workers', 1)
+
+    @staticmethod
+    def create_cache():
+        """ Open the persistent cache of synthesized audio. """
+        cache_config = Configuration.get().get('tts', {}).get('cache', {})
+        max_bytes = int(cache_config.get('max_size_mb', 50) * 1024 * 1024)
+        return TTSCache(mycroft.util.get_cache_directory('tts'), max_bytes,
+                        cache_config.get('policy', 'lru'))
+
     def load_spellings(self):
         """Load phonetic spellings of words as dictionary"""
         path = join('text', self.lang, 'phonetic_spellings.txt')
@@ -214,14 +286,12 @@ class TTS(object):
             Helper function for child classes to call in execute().
 
             Sends the recognizer_loop:audio_output_end message, indicating
-            that speaking is done for the moment. It also checks if cache
-            directory needs cleaning to free up disk space.
+            that speaking is done for the moment.
         """
 
         self.ws.emit(Message("recognizer_loop:audio_output_end"))
-        # Clean the cache as needed
-        cache_dir = mycroft.util.get_cache_directory("tts")
-        mycroft.util.curate_cache(cache_dir, min_free_percent=100)
+        # Store cache usage for the eviction policy
+        self.cache.flush()
 
         # This check will clear the "signal"
         check_for_signal("isSpeaking")
@@ -285,35 +355,193 @@ class TTS(object):
         """
             Convert sentence to speech, preprocessing out unsupported ssml
 
-            The method caches results if possible using the hash of the
-            sentence.
+            The sentence is synthesized in the background and queued for
+            playback, so the next sentence can be synthesized while this
+            one is playing. Blocks while the configured number of
+            sentences are already waiting for playback.
 
             Args:
                 sentence:   Sentence to be spoken
                 ident:      Id reference to current interaction
         """
-        sentence = self.validate_ssml(sentence)
-
         create_signal("isSpeaking")
+        sentence = self.preprocess(sentence)
+        self.queue.put(self.synthesis.submit(self.synthesize, sentence,
+                                             ident))
+
+    def preprocess(self, sentence):
+        """
+            Remove unsupported ssml and apply phonetic spellings
+
+            Args:
+                sentence:   Sentence to be spoken
+
+            Returns:
+                str: the sentence as passed to the engine
+        """
+        sentence = self.validate_ssml(sentence)
         if self.phonetic_spelling:
             for word in re.findall(r"[\w']+", sentence):
                 if word in self.spellings:
                     sentence = sentence.replace(word, self.spellings[word])
+        return sentence
+
+    def synthesis_settings(self):
+        """
+            Settings the engine actually synthesizes with, part of the
+            cache key. Engines synthesizing with other settings than
+            self.voice override this.
+
+            Returns:
+                str: voice and settings affecting the audio
+        """
+        return self.voice
 
-        key = str(hashlib.md5(sentence.encode('utf-8', 'ignore')).hexdigest())
-        wav_file = os.path.join(mycroft.util.get_cache_directory("tts"),
-                                key + '.' + self.audio_ext)
+    def cache_key(self, sentence):
+        """ Key of a preprocessed sentence in the audio cache. """
+        return self.cache.key(self.__class__.__name__,
+                              self.synthesis_settings(), self.lang, sentence)
 
-        if os.path.exists(wav_file):
+    def synthesize(self, sentence, ident=None):
+        """
+            Get audio for a sentence, from the cache if possible.
+
+            The method caches results using a hash of the sentence, the
+            engine, voice and language.
+
+            Args:
+                sentence:   Preprocessed sentence
+                ident:      Id reference to current interaction
+
+            Returns:
+                tuple: playback queue entry (audio type, audio file or
+                       AudioStream, visimes, ident)
+        """
+        key = self.cache_key(sentence)
+        cached = self.cache.get(key)
+        if cached:
             LOG.debug("TTS cache hit")
-            phonemes = self.load_phonemes(key)
+            wav_file, phonemes = cached
         else:
-            wav_file, phonemes = self.get_tts(sentence, wav_file)
-            if phonemes:
-                self.save_phonemes(key, phonemes)
+            if self.playback.stream_playback and self.audio_ext == 'wav':
+                stream = self._stream_into_cache(key, sentence)
+                if stream is not None:
+                    return self.audio_ext, stream, self.visime(None), ident
+            (wav_file, phonemes), _ = self._synthesize_into_cache(key,
+                                                                  sentence)
 
         vis = self.visime(phonemes)
-        self.queue.put((self.audio_ext, wav_file, vis, ident))
+        return self.audio_ext, wav_file, vis, ident
+
+    def presynthesize(self, sentence):
+        """
+            Synthesize a sentence into the cache ahead of it being spoken.
+
+            Args:
+                sentence:   Preprocessed sentence
+
+            Returns:
+                bool: True if the sentence was synthesized, False if it
+                      already was in the cache
+        """
+        key = self.cache_key(sentence)
+        if key in self.cache:
+            return False
+        _, synthesized = self._synthesize_into_cache(key, sentence)
+        return synthesized
+
+    def _synthesize_into_cache(self, key, sentence):
+        """
+            Synthesize a sentence to its cache file.
+
+            A sentence is only synthesized by one thread at a time, threads
+            waiting for it use the audio once it is cached.
+
+            Returns:
+                tuple: ((audio file, phonemes), True if synthesized here)
+        """
+        with self._key_lock(key):
+            cached = self.cache.get(key) if key in self.cache else None
+            if cached:
+                return cached, False
+            wav_file, phonemes = self.get_tts(
+                sentence, self.cache.path(key, self.audio_ext))
+            self.cache.put(key, wav_file, phonemes)
+            return (wav_file, phonemes), True
+
+    def _key_lock(self, key):
+        """ Lock held while the sentence with this key is synthesized. """
+        with self._key_locks_lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = Lock()
+                self._key_locks[key] = lock
+        return lock
+
+    def _stream_into_cache(self, key, sentence):
+        """
+            Start streaming a sentence from an engine supporting it.
+
+            The audio is written to the returned AudioStream and to the
+            cache by a background thread as it arrives.
+
+            Returns:
+                AudioStream: the audio being synthesized, None if the engine
+                             can't stream or the sentence is being
+                             synthesized by another thread
+        """
+        lock = self._key_lock(key)
+        if not lock.acquire(False):
+            return None
+        try:
+            chunks = None
+            if key not in self.cache:
+                chunks = self.get_tts_stream(sentence)
+        finally:
+            if chunks is None:
+                lock.release()
+        if chunks is None:
+            return None
+        stream = AudioStream()
+        t = Thread(target=self._write_stream,
+                   args=(key, chunks, stream, lock))
+        t.daemon = True
+        t.start()
+        return stream
+
+    def _write_stream(self, key, chunks, stream, lock):
+        audio_file = self.cache.path(key, self.audio_ext)
+        tmp_file = audio_file + '.tmp'
+        try:
+            with open(tmp_file, 'wb') as f:
+                for chunk in chunks:
+                    f.write(chunk)
+                    stream.write(chunk)
+            os.rename(tmp_file, audio_file)
+            self.cache.put(key, audio_file)
+        except Exception:
+            LOG.exception('Failed to stream synthesized audio')
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+        finally:
+            stream.close()
+            lock.release()
+
+    def get_tts_stream(self, sentence):
+        """
+            Synthesize a sentence as a stream of wav data, for engines
+            producing audio faster than in one piece.
+
+            Args:
+                sentence(str): Sentence to synthesize
+
+            Returns:
+                iterable: chunks (bytes) of wav data, None if the engine
+                          can't stream
+        """
+        return None
 
     def visime(self, phonemes):
         """
@@ -327,13 +555,7 @@ class TTS(object):
 
     def clear_cache(self):
         """ Remove all cached files. """
-        if not os.path.exists(mycroft.util.get_cache_directory('tts')):
-            return
-        for f in os.listdir(mycroft.util.get_cache_directory("tts")):
-            file_path = os.path.join(mycroft.util.get_cache_directory("tts"),
-                                     f)
-            if os.path.isfile(file_path):
-                os.unlink(file_path)
+        self.cache.clear()
 
     def save_phonemes(self, key, phonemes):
         """
@@ -374,6 +596,7 @@ class TTS(object):
     def __del__(self):
         self.playback.stop()
         self.playback.join()
+        self.synthesis.shutdown(wait=False)
 
 
 class TTSValidator(object):
@@ -0,0 +1,230 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import hashlib
+import json
+import os
+import re
+from os.path import abspath, basename, dirname, getsize, isfile, join
+from threading import RLock
+from time import time
+
+from mycroft.util.cache import get_cache_janitor
+from mycroft.util.log import LOG
+
+
+class TTSCache(object):
+    """
+        Persistent cache of synthesized audio.
+
+        Entries are kept in an index file next to the audio so the cache
+        survives restarts. When the total size exceeds the byte budget the
+        least recently (lru) or least frequently (lfu) used entries are
+        removed.
+
+        Args:
+            directory (str): folder holding the cached audio
+            max_bytes (int): size budget for the cached files
+            policy (str): eviction policy, 'lru' or 'lfu'
+    """
+    INDEX_FILE = 'index.json'
+
+    def __init__(self, directory, max_bytes=50 * 1024 * 1024, policy='lru'):
+        self.directory = abspath(directory)
+        self.max_bytes = max_bytes
+        self.policy = policy
+        self.index_file = join(self.directory, self.INDEX_FILE)
+        self.lock = RLock()
+        self.entries = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._dirty = False
+        # The cache evicts its own entries, keeping the index up to date
+        get_cache_janitor().release(self.directory)
+        self.load()
+
+    @staticmethod
+    def key(engine, voice, lang, sentence):
+        """
+            Cache key for a sentence spoken with the given voice.
+
+            Args:
+                engine (str): name of the tts engine
+                voice (str): voice used by the engine
+                lang (str): language of the sentence
+                sentence (str): text to synthesize
+
+            Returns:
+                str: key identifying the synthesized audio
+        """
+        sentence = re.sub(r'\s+', ' ', sentence).strip()
+        text = '\n'.join([str(engine), str(voice), str(lang).lower(),
+                          sentence])
+        return hashlib.md5(text.encode('utf-8', 'ignore')).hexdigest()
+
+    def path(self, key, ext):
+        """ Path to store the audio for a key in. """
+        return join(self.directory, key + '.' + ext)
+
+    def load(self):
+        """
+            Load the index, dropping entries without audio and removing
+            files that aren't in the index.
+        """
+        with self.lock:
+            entries = {}
+            if isfile(self.index_file):
+                try:
+                    with open(self.index_file) as f:
+                        entries = json.load(f)
+                except (IOError, ValueError):
+                    LOG.warning('Could not read TTS cache index, '
+                                'starting with an empty cache')
+            self.entries = {k: e for k, e in entries.items()
+                            if isfile(self.path(k, e['ext']))}
+            self.size = sum(e['size'] for e in self.entries.values())
+
+            known = {self.path(k, e['ext']) for k, e in self.entries.items()}
+            known.add(self.index_file)
+            if os.path.isdir(self.directory):
+                for f in os.listdir(self.directory):
+                    file_path = join(self.directory, f)
+                    if file_path not in known and isfile(file_path):
+                        self._remove_file(file_path)
+            self._evict()
+
+    def save(self):
+        """ Write the index to disk. """
+        with self.lock:
+            tmp_file = self.index_file + '.tmp'
+            try:
+                with open(tmp_file, 'w') as f:
+                    json.dump(self.entries, f)
+                os.rename(tmp_file, self.index_file)
+                self._dirty = False
+            except (IOError, OSError):
+                LOG.warning('Could not write TTS cache index')
+
+    def flush(self):
+        """ Save the index if usage information has changed. """
+        if self._dirty:
+            self.save()
+
+    def __contains__(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            return (entry is not None and
+                    isfile(self.path(key, entry['ext'])))
+
+    def get(self, key):
+        """
+            Look up cached audio.
+
+            Args:
+                key (str): cache key from TTSCache.key()
+
+            Returns:
+                tuple: (audio file, phonemes) or None if not cached
+        """
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or not isfile(self.path(key, entry['ext'])):
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self.hits += 1
+            entry['hits'] += 1
+            entry['last_used'] = time()
+            self._dirty = True
+            return self.path(key, entry['ext']), entry.get('phonemes')
+
+    def put(self, key, audio_file, phonemes=None):
+        """
+            Add synthesized audio to the cache.
+
+            Args:
+                key (str): cache key from TTSCache.key()
+                audio_file (str): file in the cache directory
+                phonemes (str): phonemes for the audio
+        """
+        if (dirname(abspath(audio_file)) != self.directory or
+                not isfile(audio_file)):
+            return
+        if isinstance(phonemes, bytes):
+            phonemes = phonemes.decode('utf-8', 'ignore')
+        ext = basename(audio_file).rsplit('.', 1)[-1]
+        with self.lock:
+            if key in self.entries:
+                self.size -= self.entries[key]['size']
+            size = getsize(audio_file)
+            self.entries[key] = {
+                'ext': ext,
+                'size': size,
+                'phonemes': phonemes,
+                'hits': 0,
+                'last_used': time()
+            }
+            self.size += size
+            self._evict(keep=key)
+            self.save()
+
+    def clear(self):
+        """ Remove all cached audio. """
+        with self.lock:
+            for key in list(self.entries):
+                self._drop(key)
+            self.save()
+
+    def stats(self):
+        """ Cache usage counters. """
+        return {
+            'entries': len(self.entries),
+            'size': self.size,
+            'max_size': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions
+        }
+
+    def _eviction_order(self):
+        if self.policy == 'lfu':
+            return sorted(self.entries, key=lambda k: (
+                self.entries[k]['hits'], self.entries[k]['last_used']))
+        return sorted(self.entries,
+                      key=lambda k: self.entries[k]['last_used'])
+
+    def _evict(self, keep=None):
+        if self.size <= self.max_bytes:
+            return
+        for key in self._eviction_order():
+            if self.size <= self.max_bytes:
+                break
+            if key != keep:
+                self._drop(key)
+                self.evictions += 1
+
+    def _drop(self, key):
+        entry = self.entries.pop(key)
+        self.size -= entry['size']
+        self._remove_file(self.path(key, entry['ext']))
+
+    @staticmethod
+    def _remove_file(file_path):
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
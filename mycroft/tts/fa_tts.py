@@ -29,8 +29,8 @@ class FATTS(RemoteTTS):
     }
 
     def __init__(self, lang, config):
-        super(FATTS, self).__init__(lang, config, '/say',
-                                    FATTSValidator(self))
+        super(FATTS, self).__init__(lang, config, config.get('url'),
+                                    '/say', FATTSValidator(self))
 
     def build_request_params(self, sentence):
         params = self.PARAMS.copy()
@@ -16,7 +16,7 @@ import os
 import stat
 import subprocess
 from threading import Thread
-from time import time, sleep
+from time import sleep
 
 import os.path
 from os.path import exists
@@ -93,7 +93,6 @@ class Mimic(TTS):
             ssml_tags=["speak", "ssml", "phoneme", "voice", "audio", "prosody"]
         )
         self.dl = None
-        self.clear_cache()
 
         # Download subscriber voices if needed
         self.is_subscriber = DeviceApi().is_subscriber
@@ -133,11 +132,17 @@ class Mimic(TTS):
 
         args = [mimic_bin, '-voice', voice, '-psdur', '-ssml']
 
-        stretch = config.get('duration_stretch', None)
+        stretch = self.config.get('duration_stretch', None)
         if stretch:
             args += ['--setf', 'duration_stretch=' + stretch]
         return args
 
+    def synthesis_settings(self):
+        """ Mimic arguments, the voice falls back to ap while a subscriber
+            voice is downloading.
+        """
+        return ' '.join(str(arg) for arg in self.args)
+
     def get_tts(self, sentence, wav_file):
         #  Generate WAV and phonemes
         phonemes = subprocess.check_output(self.args + ['-o', wav_file,
@@ -146,14 +151,12 @@ class Mimic(TTS):
 
     def visime(self, output):
         visimes = []
-        start = time()
         pairs = str(output).split(" ")
         for pair in pairs:
             pho_dur = pair.split(":")  # phoneme:duration
             if len(pho_dur) == 2:
                 visimes.append((VISIMES.get(pho_dur[0], '4'),
                                 float(pho_dur[1])))
-        print(visimes)
         return visimes
 
 
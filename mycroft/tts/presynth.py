@@ -0,0 +1,194 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import os
+from collections import Counter
+from os.path import isfile, join
+from threading import Event, Lock, Thread
+from time import time
+
+from mycroft.dialog import MustacheDialogRenderer
+from mycroft.filesystem import FileSystemAccess
+from mycroft.util import check_for_signal
+from mycroft.util.log import LOG
+
+
+class DialogUsage(object):
+    """
+        Persistent count of how often each dialog file has been spoken.
+
+        Args:
+            filename (str): json file storing the counts, defaults to
+                            ~/.mycroft/tts/dialog_usage.json
+    """
+    def __init__(self, filename=None):
+        if filename is None:
+            filename = join(FileSystemAccess('tts').path,
+                            'dialog_usage.json')
+        self.filename = filename
+        self.lock = Lock()
+        self.counts = Counter()
+        self._dirty = False
+        self.load()
+
+    def load(self):
+        with self.lock:
+            if isfile(self.filename):
+                try:
+                    with open(self.filename) as f:
+                        self.counts = Counter(json.load(f))
+                except (IOError, ValueError):
+                    LOG.warning('Could not read dialog usage')
+
+    def save(self):
+        """ Write the counts to disk if they have changed. """
+        with self.lock:
+            if not self._dirty:
+                return
+            tmp_file = self.filename + '.tmp'
+            try:
+                with open(tmp_file, 'w') as f:
+                    json.dump(self.counts, f)
+                os.rename(tmp_file, self.filename)
+                self._dirty = False
+            except (IOError, OSError):
+                LOG.warning('Could not write dialog usage')
+
+    def record(self, dialog_file):
+        """ Count a use of a dialog file. """
+        with self.lock:
+            self.counts[dialog_file] += 1
+            self._dirty = True
+
+    def most_common(self, n=None):
+        """ Dialog files ordered by use, most used first. """
+        with self.lock:
+            return [f for f, _ in self.counts.most_common(n)]
+
+
+class PreSynthesizer(Thread):
+    """
+        Synthesizes the static lines of the most spoken dialog files into
+        the TTS cache while Mycroft is idle.
+
+        Only lines without placeholders are synthesized since they are
+        spoken exactly as written. Work starts after idle_delay seconds
+        without speech and pauses as soon as something is spoken. Between
+        sentences the thread sleeps long enough to keep its share of the
+        CPU under cpu_budget.
+
+        Args:
+            tts (TTS): engine to synthesize with
+            usage (DialogUsage): dialog usage counter
+            config (dict): the tts.presynthesis section of mycroft.conf
+            split (callable): splits an utterance into the sentences
+                              handed to the engine
+    """
+    def __init__(self, tts, usage, config=None, split=None):
+        super(PreSynthesizer, self).__init__()
+        self.daemon = True
+        config = config or {}
+        self.tts = tts
+        self.usage = usage
+        self.split = split or (lambda utterance: [utterance])
+        self.idle_delay = config.get('idle_delay', 60)
+        self.cpu_budget = min(max(config.get('cpu_budget', 0.25), 0.01), 1.0)
+        self.max_dialogs = config.get('max_dialogs', 20)
+        self.max_lines = config.get('max_lines', 200)
+        # Share of the cache pre-synthesized audio may fill
+        self.cache_share = config.get('cache_share', 0.5)
+        self.last_activity = time()
+        self.synthesized = 0
+        self.cpu_time = 0.0
+        self._activity = Event()
+        self._terminated = False
+
+    def activity(self):
+        """ Report speech, postponing pre-synthesis. """
+        self.last_activity = time()
+        self._activity.set()
+
+    def is_idle(self):
+        return (time() - self.last_activity >= self.idle_delay and
+                self.tts.queue.empty() and
+                not check_for_signal('isSpeaking', -1))
+
+    def cache_full(self):
+        cache = self.tts.cache
+        return cache.size >= cache.max_bytes * self.cache_share
+
+    def sentences(self):
+        """ Preprocessed static sentences ordered by dialog usage. """
+        count = 0
+        for dialog_file in self.usage.most_common(self.max_dialogs):
+            if not isfile(dialog_file):
+                continue
+            renderer = MustacheDialogRenderer()
+            try:
+                renderer.load_template_file('dialog', dialog_file)
+            except (IOError, UnicodeDecodeError):
+                continue
+            for line in renderer.static_lines('dialog'):
+                for sentence in self.split(line):
+                    if count >= self.max_lines:
+                        return
+                    count += 1
+                    yield self.tts.preprocess(sentence)
+
+    def synthesize_pending(self):
+        """
+            Synthesize uncached sentences until speech or the cache share
+            interrupts.
+
+            Returns:
+                bool: True if all sentences are cached
+        """
+        self._activity.clear()
+        for sentence in self.sentences():
+            if (self._terminated or self._activity.is_set() or
+                    not self.is_idle() or self.cache_full()):
+                return False
+            start = time()
+            try:
+                if not self.tts.presynthesize(sentence):
+                    continue
+            except Exception:
+                LOG.exception('Pre-synthesis of "{}" failed'.format(sentence))
+                continue
+            elapsed = time() - start
+            self.synthesized += 1
+            self.cpu_time += elapsed
+            # Rest so synthesis takes at most cpu_budget of the time
+            self._activity.wait(elapsed * (1 - self.cpu_budget) /
+                                self.cpu_budget)
+        return True
+
+    def run(self):
+        done = False
+        while not self._terminated:
+            self._activity.wait(max(self.idle_delay, 0.1))
+            if self._activity.is_set():
+                # New speech, may have changed the ranking
+                self._activity.clear()
+                done = False
+                continue
+            self.usage.save()
+            if not done and self.is_idle():
+                done = self.synthesize_pending()
+
+    def stop(self):
+        self._terminated = True
+        self._activity.set()
+        self.usage.save()
@@ -14,11 +14,12 @@
 #
 import abc
 import re
-from requests_futures.sessions import FuturesSession
+
+from requests import Session
+from requests.adapters import HTTPAdapter
 
 from mycroft.tts import TTS
-from mycroft.util import remove_last_slash, play_wav
-from mycroft.util.log import LOG
+from mycroft.util import remove_last_slash
 
 
 class RemoteTTS(TTS):
@@ -26,7 +27,10 @@ class RemoteTTS(TTS):
     Abstract class for a Remote TTS engine implementation.
 
     It provides a common logic to perform multiple requests by splitting the
-    whole sentence into small ones.
+    whole sentence into small ones. The phrases are fetched through the
+    normal synthesis pipeline, so they are cached and played by the
+    PlaybackThread. Up to max_requests phrases are fetched at a time over
+    kept alive connections.
     """
 
     def __init__(self, lang, config, url, api_path, validator):
@@ -34,20 +38,21 @@ class RemoteTTS(TTS):
         self.api_path = api_path
         self.auth = None
         self.url = remove_last_slash(url)
-        self.session = FuturesSession()
+        self.session = Session()
+        adapter = HTTPAdapter(pool_maxsize=self.max_requests)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
 
-    def execute(self, sentence, ident=None):
-        phrases = self.__get_phrases(sentence)
+    @property
+    def max_requests(self):
+        return self.config.get('max_requests', 3)
+
+    def synthesis_workers(self, pipeline):
+        return self.max_requests
 
-        if len(phrases) > 0:
-            for req in self.__requests(phrases):
-                try:
-                    self.begin_audio()
-                    self.__play(req)
-                except Exception as e:
-                    LOG.error(e.message)
-                finally:
-                    self.end_audio()
+    def execute(self, sentence, ident=None):
+        for phrase in self.__get_phrases(sentence):
+            super(RemoteTTS, self).execute(phrase, ident)
 
     @staticmethod
     def __get_phrases(sentence):
@@ -56,31 +61,23 @@ class RemoteTTS(TTS):
         phrases = [p for p in phrases if len(p) > 0]
         return phrases
 
-    def __requests(self, phrases):
-        reqs = []
-        for p in phrases:
-            reqs.append(self.__request(p))
-        return reqs
+    def get_tts(self, sentence, wav_file):
+        params = self.build_request_params(sentence)
+        resp = self.session.get(self.url + self.api_path, params=params,
+                                timeout=10, verify=False, auth=self.auth)
+        resp.raise_for_status()
+        with open(wav_file, 'wb') as f:
+            f.write(resp.content)
+        return wav_file, None
 
-    def __request(self, p):
-        return self.session.get(
-            self.url + self.api_path, params=self.build_request_params(p),
-            timeout=10, verify=False, auth=self.auth)
+    def get_tts_stream(self, sentence):
+        params = self.build_request_params(sentence)
+        resp = self.session.get(self.url + self.api_path, params=params,
+                                timeout=10, verify=False, auth=self.auth,
+                                stream=True)
+        resp.raise_for_status()
+        return resp.iter_content(4096)
 
     @abc.abstractmethod
     def build_request_params(self, sentence):
         pass
-
-    def __play(self, req):
-        resp = req.result()
-        if resp.status_code == 200:
-            self.__save(resp.content)
-            play_wav(self.filename).communicate()
-        else:
-            LOG.error(
-                '%s Http Error: %s for url: %s' %
-                (resp.status_code, resp.reason, resp.url))
-
-    def __save(self, data):
-        with open(self.filename, 'wb') as f:
-            f.write(data)
@@ -20,14 +20,13 @@ from time import sleep
 
 import json
 import os.path
-import psutil
-from stat import S_ISREG, ST_MTIME, ST_MODE, ST_SIZE
 import requests
 
 import signal as sig
 
 import mycroft.audio
 import mycroft.configuration
+from mycroft.util.cache import get_cache_janitor
 from mycroft.util.format import nice_number
 # Officially exported methods from this file:
 # play_wav, play_mp3, get_cache_directory,
@@ -186,52 +185,19 @@ def connected_dns(host="8.8.8.8", port=53, timeout=3):
 
 
 def curate_cache(directory, min_free_percent=5.0, min_free_disk=50):
-    """Clear out the directory if needed
+    """Curate a cache directory with the cache janitor
 
-    This assumes all the files in the directory can be deleted as freely
+    Kept for compatibility, the directory is kept under the quota of its
+    domain by the background janitor (see get_cache_directory) instead of
+    being cleared when the disk runs low.
 
     Args:
         directory (str): directory path that holds cached files
-        min_free_percent (float): percentage (0.0-100.0) of drive to keep free,
-                                  default is 5% if not specified.
-        min_free_disk (float): minimum allowed disk space in MB, default
-                               value is 50 MB if not specified.
+        min_free_percent (float): ignored
+        min_free_disk (float): ignored
     """
-
-    # Simpleminded implementation -- keep a certain percentage of the
-    # disk available.
-    # TODO: Would be easy to add more options, like whitelisted files, etc.
-    space = psutil.disk_usage(directory)
-
-    # convert from MB to bytes
-    min_free_disk *= 1024 * 1024
-    # space.percent = space.used/space.total*100.0
-    percent_free = 100.0 - space.percent
-    if percent_free < min_free_percent and space.free < min_free_disk:
-        LOG.info('Low diskspace detected, cleaning cache')
-        # calculate how many bytes we need to delete
-        bytes_needed = (min_free_percent - percent_free) / 100.0 * space.total
-        bytes_needed = int(bytes_needed + 1.0)
-
-        # get all entries in the directory w/ stats
-        entries = (os.path.join(directory, fn) for fn in os.listdir(directory))
-        entries = ((os.stat(path), path) for path in entries)
-
-        # leave only regular files, insert modification date
-        entries = ((stat[ST_MTIME], stat[ST_SIZE], path)
-                   for stat, path in entries if S_ISREG(stat[ST_MODE]))
-
-        # delete files with oldest modification date until space is freed
-        space_freed = 0
-        for moddate, fsize, path in sorted(entries):
-            try:
-                os.remove(path)
-                space_freed += fsize
-            except:
-                pass
-
-            if space_freed > bytes_needed:
-                return  # deleted enough!
+    config = mycroft.configuration.Configuration.get()
+    get_cache_janitor(config.get("cache_janitor")).watch(directory)
 
 
 def get_cache_directory(domain=None):
@@ -243,6 +209,9 @@ def get_cache_directory(domain=None):
     uses these cached files must be able to fallback and regenerate
     the file.
 
+    The size of each domain is kept under its quota by a background
+    janitor, removing the oldest files first.
+
     Args:
         domain (str): The cache domain.  Basically just a subdirectory.
 
@@ -254,7 +223,10 @@ def get_cache_directory(domain=None):
     if not dir:
         # If not defined, use /tmp/mycroft/cache
         dir = os.path.join(tempfile.gettempdir(), "mycroft", "cache")
-    return ensure_directory_exists(dir, domain)
+    path = ensure_directory_exists(dir, domain)
+    if domain:
+        get_cache_janitor(config.get("cache_janitor")).watch(path, domain)
+    return path
 
 
 def validate_param(value, name):
@@ -0,0 +1,269 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+from os.path import abspath, dirname, join
+from stat import S_ISREG, ST_MODE, ST_MTIME, ST_SIZE
+from threading import Event, Lock, Thread
+from time import time
+
+from mycroft.util.log import LOG
+
+
+class CacheDirectory(object):
+    """
+        Size ledger of a single cache directory.
+
+        Args:
+            directory (str): path of the directory
+            quota (int): maximum size in bytes
+    """
+    def __init__(self, directory, quota):
+        self.directory = directory
+        self.quota = quota
+        self.files = None  # file name -> (mtime, size), None until scanned
+        self.size = 0
+        self.last_scan = 0
+        self.last_sweep = 0
+
+    @property
+    def over_quota(self):
+        return self.files is not None and self.size > self.quota
+
+    def scan(self):
+        """ Read the sizes and modification times of the files. """
+        files = {}
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            names = []
+        for name in names:
+            try:
+                stat = os.stat(join(self.directory, name))
+            except OSError:
+                continue
+            if S_ISREG(stat[ST_MODE]):
+                files[name] = (stat[ST_MTIME], stat[ST_SIZE])
+        return files
+
+    def reset(self, files):
+        """ Replace the ledger with the result of a scan. """
+        self.files = files
+        self.size = sum(size for _, size in files.values())
+        self.last_scan = time()
+
+    def update(self, name, mtime, size):
+        if self.files is None:
+            return
+        if name in self.files:
+            self.size -= self.files[name][1]
+        self.files[name] = (mtime, size)
+        self.size += size
+
+
+class CacheJanitor(Thread):
+    """
+        Keeps the cache directories under their size quotas.
+
+        Each directory has a ledger of its files, built by a scan and kept
+        up to date by record() as files are written. When a directory goes
+        over its quota, the oldest files are removed in the background
+        until it is at low_water of the quota. A directory is swept at most
+        once every sweep_interval seconds and rescanned every
+        rescan_interval seconds to catch writes that weren't recorded.
+
+        Directories whose owner keeps them under a size of its own, like
+        the TTSCache, are released and left alone.
+
+        Args:
+            config (dict): the cache_janitor section of mycroft.conf
+    """
+    def __init__(self, config=None):
+        super(CacheJanitor, self).__init__()
+        self.daemon = True
+        config = config or {}
+        self.quotas = config.get('quota_mb', {})
+        self.sweep_interval = config.get('sweep_interval', 30)
+        self.rescan_interval = config.get('rescan_interval', 600)
+        self.low_water = config.get('low_water', 0.9)
+        self.directories = {}
+        self.protected = set()
+        self.released = set()
+        self.lock = Lock()
+        self.wake = Event()
+        self.sweeps = 0
+        self.files_removed = 0
+        self.reclaimed_bytes = 0
+        self._terminated = False
+
+    def quota(self, domain):
+        quota_mb = self.quotas.get(domain, self.quotas.get('default', 100))
+        return int(quota_mb * 1024 * 1024)
+
+    def watch(self, directory, domain=None):
+        """
+            Start curating a cache directory.
+
+            Args:
+                directory (str): path of the directory
+                domain (str): cache domain, selects the quota
+        """
+        directory = abspath(directory)
+        with self.lock:
+            if directory in self.directories or directory in self.released:
+                return
+            self.directories[directory] = CacheDirectory(directory,
+                                                         self.quota(domain))
+        self.wake.set()
+
+    def release(self, directory):
+        """
+            Never curate a directory, its owner removes the files.
+
+            Args:
+                directory (str): path of the directory
+        """
+        directory = abspath(directory)
+        with self.lock:
+            self.released.add(directory)
+            self.directories.pop(directory, None)
+
+    def protect(self, path):
+        """ Never remove the file at path. """
+        with self.lock:
+            self.protected.add(abspath(path))
+
+    def unprotect(self, path):
+        """ Allow removing a file protected by protect(). """
+        with self.lock:
+            self.protected.discard(abspath(path))
+
+    def record(self, path):
+        """
+            Add a written file to the ledger of its directory.
+
+            Args:
+                path (str): path of the file
+        """
+        path = abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return
+        with self.lock:
+            cache_dir = self.directories.get(dirname(path))
+            if cache_dir is None:
+                return
+            cache_dir.update(os.path.basename(path), stat[ST_MTIME],
+                             stat[ST_SIZE])
+            over_quota = cache_dir.over_quota
+        if over_quota:
+            self.wake.set()
+
+    def run(self):
+        while not self._terminated:
+            self.wake.wait(self.sweep_interval)
+            self.wake.clear()
+            if self._terminated:
+                break
+            with self.lock:
+                directories = list(self.directories.values())
+            for cache_dir in directories:
+                try:
+                    self.curate(cache_dir)
+                except Exception:
+                    LOG.exception('Failed to curate ' + cache_dir.directory)
+
+    def curate(self, cache_dir):
+        """ Scan and sweep a directory if needed. """
+        now = time()
+        if (cache_dir.files is None or
+                now - cache_dir.last_scan >= self.rescan_interval):
+            self.scan(cache_dir)
+        with self.lock:
+            if (not cache_dir.over_quota or
+                    now - cache_dir.last_sweep < self.sweep_interval):
+                return
+            cache_dir.last_sweep = now
+
+        self.scan(cache_dir)
+        with self.lock:
+            target = int(cache_dir.quota * self.low_water)
+            candidates = sorted(
+                (mtime, name, size)
+                for name, (mtime, size) in cache_dir.files.items()
+                if join(cache_dir.directory, name) not in self.protected)
+            removed = []
+            for _, name, size in candidates:
+                if cache_dir.size <= target:
+                    break
+                cache_dir.files.pop(name)
+                cache_dir.size -= size
+                removed.append((name, size))
+
+        reclaimed = 0
+        for name, size in removed:
+            try:
+                os.remove(join(cache_dir.directory, name))
+                reclaimed += size
+            except OSError:
+                pass
+        self.sweeps += 1
+        self.files_removed += len(removed)
+        self.reclaimed_bytes += reclaimed
+        LOG.info('Removed {} files ({} bytes) from {}'.format(
+            len(removed), reclaimed, cache_dir.directory))
+
+    def scan(self, cache_dir):
+        files = cache_dir.scan()
+        with self.lock:
+            cache_dir.reset(files)
+
+    def stats(self):
+        """ Sizes of the curated directories and sweep counters. """
+        with self.lock:
+            return {
+                'directories': {
+                    d.directory: {'size': d.size, 'quota': d.quota}
+                    for d in self.directories.values()
+                },
+                'sweeps': self.sweeps,
+                'files_removed': self.files_removed,
+                'reclaimed_bytes': self.reclaimed_bytes
+            }
+
+    def stop(self):
+        self._terminated = True
+        self.wake.set()
+
+
+_janitor = None
+_janitor_lock = Lock()
+
+
+def get_cache_janitor(config=None):
+    """
+        Get the janitor shared by all cache directories, starting it on
+        first use.
+
+        Args:
+            config (dict): the cache_janitor section of mycroft.conf, only
+                           used when the janitor is started
+    """
+    global _janitor
+    with _janitor_lock:
+        if _janitor is None:
+            _janitor = CacheJanitor(config)
+            _janitor.start()
+        return _janitor
@@ -13,18 +13,26 @@
 # limitations under the License.
 #
 
-from mycroft.util.lang.format_en import *
-from mycroft.util.lang.format_pt import *
-from mycroft.util.lang.format_it import *
-from mycroft.util.lang.format_sv import *
 
-from mycroft.util.lang.format_es import nice_number_es
-from mycroft.util.lang.format_es import nice_time_es
-from mycroft.util.lang.format_es import pronounce_number_es
-
-from mycroft.util.lang.format_fr import nice_number_fr
-from mycroft.util.lang.format_fr import nice_time_fr
-from mycroft.util.lang.format_fr import pronounce_number_fr
+from mycroft.util.lang import get_lang_function, lang_function
+
+# Language specific functions, importable from this module as before the
+# languages were loaded on first use. The language module is only imported
+# when one of its functions is called.
+nice_number_en = lang_function("format_en", "nice_number_en")
+pronounce_number_en = lang_function("format_en", "pronounce_number_en")
+nice_time_en = lang_function("format_en", "nice_time_en")
+nice_number_pt = lang_function("format_pt", "nice_number_pt")
+nice_number_it = lang_function("format_it", "nice_number_it")
+pronounce_number_it = lang_function("format_it", "pronounce_number_it")
+nice_time_it = lang_function("format_it", "nice_time_it")
+nice_number_sv = lang_function("format_sv", "nice_number_sv")
+nice_number_es = lang_function("format_es", "nice_number_es")
+nice_time_es = lang_function("format_es", "nice_time_es")
+pronounce_number_es = lang_function("format_es", "pronounce_number_es")
+nice_number_fr = lang_function("format_fr", "nice_number_fr")
+nice_time_fr = lang_function("format_fr", "nice_time_fr")
+pronounce_number_fr = lang_function("format_fr", "pronounce_number_fr")
 
 
 def nice_number(number, lang="en-us", speech=True, denominators=None):
@@ -41,19 +49,9 @@ def nice_number(number, lang="en-us", speech=True, denominators=None):
         (str): The formatted string.
     """
     # Convert to spoken representation in appropriate language
-    lang_lower = str(lang).lower()
-    if lang_lower.startswith("en"):
-        return nice_number_en(number, speech, denominators)
-    elif lang_lower.startswith("es"):
-        return nice_number_es(number, speech, denominators)
-    elif lang_lower.startswith("pt"):
-        return nice_number_pt(number, speech, denominators)
-    elif lang_lower.startswith("it"):
-        return nice_number_it(number, speech, denominators)
-    elif lang_lower.startswith("fr"):
-        return nice_number_fr(number, speech, denominators)
-    elif lang_lower.startswith("sv"):
-        return nice_number_sv(number, speech, denominators)
+    nice_number_lang = get_lang_function("format", "nice_number", lang)
+    if nice_number_lang:
+        return nice_number_lang(number, speech, denominators)
 
     # Default to the raw number for unsupported languages,
     # hopefully the STT engine will pronounce understandably.
@@ -77,15 +75,9 @@ def nice_time(dt, lang="en-us", speech=True, use_24hour=False,
     Returns:
         (str): The formatted time string
     """
-    lang_lower = str(lang).lower()
-    if lang_lower.startswith("en"):
-        return nice_time_en(dt, speech, use_24hour, use_ampm)
-    elif lang_lower.startswith("es"):
-        return nice_time_es(dt, speech, use_24hour, use_ampm)
-    elif lang_lower.startswith("it"):
-        return nice_time_it(dt, speech, use_24hour, use_ampm)
-    elif lang_lower.startswith("fr"):
-        return nice_time_fr(dt, speech, use_24hour, use_ampm)
+    nice_time_lang = get_lang_function("format", "nice_time", lang)
+    if nice_time_lang:
+        return nice_time_lang(dt, speech, use_24hour, use_ampm)
 
     # TODO: Other languages
     return str(dt)
@@ -102,15 +94,10 @@ def pronounce_number(number, lang="en-us", places=2):
     Returns:
         (str): The pronounced number
     """
-    lang_lower = str(lang).lower()
-    if lang_lower.startswith("en"):
-        return pronounce_number_en(number, places=places)
-    elif lang_lower.startswith("es"):
-        return pronounce_number_es(number, places=places)
-    elif lang_lower.startswith("it"):
-        return pronounce_number_it(number, places=places)
-    elif lang_lower.startswith("fr"):
-        return pronounce_number_fr(number, places=places)
+    pronounce_number_lang = get_lang_function("format", "pronounce_number",
+                                              lang)
+    if pronounce_number_lang:
+        return pronounce_number_lang(number, places=places)
 
     # Default to just returning the numeric value
     return str(number)
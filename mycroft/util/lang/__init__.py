@@ -12,3 +12,71 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+"""
+    Registry of the language specific parse and format modules.
+
+    A language's modules (e.g. parse_en and format_en) are imported the first
+    time a function of that language is requested, so processes only pay
+    for the languages they use.
+"""
+from importlib import import_module
+from threading import Lock
+
+# Supported languages, the first two letters of the language code
+LANGUAGES = ("en", "es", "pt", "it", "fr", "sv")
+
+_functions = {}
+_lock = Lock()
+
+
+def get_lang_function(module, name, lang):
+    """
+    Find the language specific version of a parse or format function.
+
+    For example get_lang_function("parse", "normalize", "en-us") returns
+    normalize_en from mycroft.util.lang.parse_en.
+
+    Args:
+        module (str): "parse" or "format"
+        name (str): name of the function without the language suffix
+        lang (str): the code of the language
+    Returns:
+        (function): the function, None if the language doesn't provide it
+    """
+    key = (module, name, lang)
+    try:
+        return _functions[key]
+    except KeyError:
+        pass
+
+    with _lock:
+        function = None
+        code = str(lang).lower()[:2]
+        if code in LANGUAGES:
+            lang_module = import_module("mycroft.util.lang.{}_{}".format(
+                module, code))
+            function = getattr(lang_module, "{}_{}".format(name, code), None)
+        _functions[key] = function
+        return function
+
+
+def lang_function(module, name):
+    """
+    Wrap a function of a language module without importing the module.
+
+    The module is imported on the first call, so mycroft.util.parse and
+    mycroft.util.format can keep exporting every language's functions.
+
+    Args:
+        module (str): language module, e.g. "parse_en"
+        name (str): name of the function in the module
+    Returns:
+        (function): calls the function of the language module
+    """
+    def wrapper(*args, **kwargs):
+        lang_module = import_module("mycroft.util.lang." + module)
+        return getattr(lang_module, name)(*args, **kwargs)
+
+    wrapper.__name__ = name
+    wrapper.__doc__ = "See mycroft.util.lang.{}.{}".format(module, name)
+    return wrapper
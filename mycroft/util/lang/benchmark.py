@@ -0,0 +1,328 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""
+    Benchmarks of the language parsers.
+
+    Each benchmark runs a corpus of typical utterances through the parser
+    of every supported language and reports the time per utterance. The
+    import benchmark reports the time to import a module in a fresh
+    interpreter and the language modules it loads.
+
+    Usage:
+        python -m mycroft.util.lang.benchmark normalize -n 1000
+        python -m mycroft.util.lang.benchmark extract_datetime -n 100
+        python -m mycroft.util.lang.benchmark import -n 10
+        python -m mycroft.util.lang.benchmark fuzzy -c 10000
+"""
+import json
+import random
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from datetime import datetime
+
+from mycroft.util.parse import (FuzzyIndex, _extract_datetime,
+                                extract_datetime, match_one, normalize)
+
+NORMALIZE_CORPUS = {
+    "en-us": [
+        "what's the weather like in twenty minutes",
+        "I'm gonna set a timer for five minutes",
+        "hey mycroft play the news",
+        "it's one o'clock and I can't find the remote",
+        "set an alarm for seven thirty in the morning"
+    ],
+    "es-es": [
+        "el perro tiene dos huesos",
+        "la casa número ciento veinte y tres",
+        "pon una alarma para las siete y media",
+        "quiero un café y treinta y cinco galletas"
+    ],
+    "pt-pt": [
+        "o cão tem dois ossos",
+        "vinte e dois anos",
+        "quantos são cento e vinte e três",
+        "isto é um teste, não é?"
+    ],
+    "it-it": [
+        "il cane ha due ossa",
+        "ventisette gatti",
+        "gli undici uomini",
+        "quarantuno e ventitre"
+    ],
+    "fr-fr": [
+        "le chat a deux souris",
+        "il est vingt-deux heures",
+        "c'est la première fois",
+        "quatre-vingt-dix-neuf euros"
+    ],
+    "sv-se": [
+        "en katt och två hundar",
+        "det är noll grader",
+        "elva och tolv"
+    ]
+}
+
+DATETIME_CORPUS = {
+    "en-us": [
+        "remind me to call mom in 10 minutes",
+        "set an alarm for tomorrow at 7 am",
+        "what is the weather like the day after tomorrow",
+        "schedule a meeting next tuesday at 3 pm",
+        "remind me to pay rent on the 1st of july"
+    ],
+    "es-es": [
+        "recuérdame llamar a mamá mañana a las 7",
+        "pon una alarma para el lunes a las 8 de la mañana",
+        "qué tiempo hará pasado mañana",
+        "recuérdame el viernes a las 5 de la tarde"
+    ],
+    "pt-pt": [
+        "marca uma reunião para amanhã às 10",
+        "lembra-me de ligar à mãe daqui a 10 minutos",
+        "como vai estar o tempo depois de amanhã",
+        "alarme para segunda às 7 da manhã"
+    ],
+    "it-it": [
+        "ricordami di chiamare la mamma domani alle 7",
+        "che tempo farà dopodomani",
+        "sveglia lunedì alle 8 di mattina",
+        "riunione venerdì alle 3 di pomeriggio"
+    ],
+    "fr-fr": [
+        "rappelle-moi demain à 7 heures",
+        "quel temps fera-t-il après-demain",
+        "réveille-moi lundi à 8 heures du matin",
+        "réunion le 5 juillet à 15 heures"
+    ],
+    "sv-se": [
+        "påminn mig imorgon",
+        "hur blir vädret i övermorgon",
+        "väck mig på måndag klockan 8 på morgonen",
+        "möte på fredag"
+    ]
+}
+
+
+def _time_per_call(function, corpus, iterations):
+    results = {}
+    for lang, utterances in corpus.items():
+        start = time.perf_counter()
+        for _ in range(iterations):
+            for utterance in utterances:
+                function(utterance, lang)
+        elapsed = time.perf_counter() - start
+        results[lang] = round(
+            elapsed * 1000000.0 / (iterations * len(utterances)), 2)
+    return results
+
+
+def benchmark_normalize(iterations=1000, corpus=None):
+    """
+    Time normalize() for each language of the corpus.
+
+    Args:
+        iterations (int): runs over the corpus
+        corpus (dict): language -> utterances, defaults to NORMALIZE_CORPUS
+    Returns:
+        dict: language -> microseconds per utterance
+    """
+    corpus = corpus or NORMALIZE_CORPUS
+    return _time_per_call(normalize, corpus, iterations)
+
+
+def benchmark_extract_datetime(iterations=100, corpus=None):
+    """
+    Time extract_datetime() for each language of the corpus.
+
+    The uncached parsers are timed as well as repeated calls answered by
+    the cache.
+
+    Args:
+        iterations (int): runs over the corpus
+        corpus (dict): language -> date phrases, defaults to DATETIME_CORPUS
+    Returns:
+        dict: "parse" and "cached", language -> microseconds per phrase
+    """
+    corpus = corpus or DATETIME_CORPUS
+    anchor = datetime(2017, 6, 27, 10, 30)
+
+    def parse(text, lang):
+        _extract_datetime.__wrapped__(text, anchor, lang)
+
+    def cached(text, lang):
+        extract_datetime(text, anchor, lang)
+
+    return {
+        "parse": _time_per_call(parse, corpus, iterations),
+        "cached": _time_per_call(cached, corpus, iterations)
+    }
+
+
+TITLE_WORDS = [
+    "love", "night", "heart", "baby", "blue", "dream", "fire", "rain",
+    "summer", "street", "home", "light", "dance", "river", "world", "time",
+    "girl", "moon", "road", "golden", "wild", "song", "sweet", "little",
+    "city", "lonely", "angel", "forever", "midnight", "yesterday", "train",
+    "ocean", "shadow", "paradise", "thunder", "whisper", "highway", "sugar"
+]
+
+
+def make_titles(count, seed=0):
+    """ Deterministic song title like choices. """
+    rand = random.Random(seed)
+    return ["{} {}".format(" ".join(rand.choice(TITLE_WORDS)
+                                    for _ in range(rand.randint(1, 4))), i)
+            for i in range(count)]
+
+
+def make_queries(titles, count, seed=1):
+    """ Titles with a typo and without the number, like misheard STT. """
+    rand = random.Random(seed)
+    queries = []
+    for title in rand.sample(titles, count):
+        query = title.rsplit(" ", 1)[0]
+        pos = rand.randrange(len(query))
+        queries.append(query[:pos] + query[pos + 1:])
+    return queries
+
+
+def benchmark_fuzzy(choices=10000, queries=20, processes=None):
+    """
+    Time match_one() and FuzzyIndex over song titles.
+
+    Args:
+        choices (int): number of titles
+        queries (int): number of queries
+        processes (int): scoring processes of the FuzzyIndex
+    Returns:
+        dict: index build time in ms, time per query in ms and the share
+              of queries where the index found the same score as match_one
+    """
+    titles = make_titles(choices)
+    test_queries = make_queries(titles, queries)
+
+    start = time.perf_counter()
+    index = FuzzyIndex(titles, processes=processes)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = [match_one(query, titles) for query in test_queries]
+    match_one_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    found = [index.search(query, 5) for query in test_queries]
+    index_time = time.perf_counter() - start
+    index.close()
+
+    same = sum(1 for e, f in zip(expected, found) if f[0][1] == e[1])
+    return {
+        "choices": choices,
+        "build_ms": round(build * 1000.0, 1),
+        "match_one_ms": round(match_one_time * 1000.0 / queries, 2),
+        "index_search_ms": round(index_time * 1000.0 / queries, 2),
+        "same_best_score": round(same / float(queries), 2)
+    }
+
+
+IMPORT_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "seconds": time.perf_counter() - start,
+    "lang_modules": sorted(m for m in sys.modules
+                           if m.startswith("mycroft.util.lang."))
+}}))
+"""
+
+
+def benchmark_import(module="mycroft.messagebus.message", runs=10):
+    """
+    Time importing a module in fresh interpreters.
+
+    Args:
+        module (str): module to import
+        runs (int): number of interpreters started
+    Returns:
+        dict: median and min import time in ms and the language modules
+              loaded by the import
+    """
+    times = []
+    lang_modules = []
+    for _ in range(runs):
+        output = subprocess.check_output(
+            [sys.executable, "-c", IMPORT_SCRIPT.format(module=module)])
+        result = json.loads(output.decode("utf-8").strip().split("\n")[-1])
+        times.append(result["seconds"] * 1000.0)
+        lang_modules = result["lang_modules"]
+    times.sort()
+    return {
+        "module": module,
+        "median_ms": round(times[len(times) // 2], 1),
+        "min_ms": round(times[0], 1),
+        "lang_modules": lang_modules
+    }
+
+
+def main():
+    parser = ArgumentParser(description='Benchmark the language parsers')
+    subparsers = parser.add_subparsers(dest='benchmark')
+    normalize_parser = subparsers.add_parser(
+        'normalize', help='time per utterance of normalize()')
+    normalize_parser.add_argument('-n', '--iterations', type=int,
+                                  default=1000,
+                                  help='runs over the corpus')
+    datetime_parser = subparsers.add_parser(
+        'extract_datetime', help='time per phrase of extract_datetime()')
+    datetime_parser.add_argument('-n', '--iterations', type=int,
+                                 default=100,
+                                 help='runs over the corpus')
+    import_parser = subparsers.add_parser(
+        'import', help='time to import a module in a fresh interpreter')
+    import_parser.add_argument('-n', '--runs', type=int, default=10,
+                               help='number of interpreters started')
+    import_parser.add_argument('-m', '--module',
+                               default='mycroft.messagebus.message',
+                               help='module to import')
+    fuzzy_parser = subparsers.add_parser(
+        'fuzzy', help='time per query of match_one() and FuzzyIndex')
+    fuzzy_parser.add_argument('-c', '--choices', type=int, default=10000,
+                              help='number of choices')
+    fuzzy_parser.add_argument('-q', '--queries', type=int, default=20,
+                              help='number of queries')
+    fuzzy_parser.add_argument('-p', '--processes', type=int,
+                              help='scoring processes of the index')
+    args = parser.parse_args()
+
+    if args.benchmark == 'normalize':
+        print(json.dumps(benchmark_normalize(args.iterations), indent=4))
+    elif args.benchmark == 'extract_datetime':
+        print(json.dumps(benchmark_extract_datetime(args.iterations),
+                         indent=4))
+    elif args.benchmark == 'fuzzy':
+        print(json.dumps(benchmark_fuzzy(args.choices, args.queries,
+                                         args.processes), indent=4))
+    elif args.benchmark == 'import':
+        print(json.dumps(benchmark_import(args.module, args.runs), indent=4))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
@@ -49,3 +49,70 @@ def look_for_fractions(split_list):
             return True
 
     return False
+
+
+def tokenize(text):
+    """
+    Split a string into words, dropping extra whitespace.
+
+    Args:
+        text (str): the string to split
+    Returns:
+        (list): the words of the string
+    """
+    return text.split()
+
+
+class Normalizer(object):
+    """
+    Table driven word by word normalization.
+
+    The tables are built once when the language module is imported, each
+    word is then handled with a few set and dict lookups.
+
+    Args:
+        articles (iterable): words dropped when removing articles
+        words (dict): replacements for single words, e.g. contractions and
+                      numbers
+        number_parser (callable): f(words, i) returning the number starting
+                                  at words[i] and the index of the following
+                                  word, or None if there is no number
+    """
+    def __init__(self, articles=(), words=None, number_parser=None):
+        self.articles = frozenset(articles)
+        self.words = dict(words or {})
+        self.number_parser = number_parser
+
+    def normalize(self, text, remove_articles):
+        """
+        Normalize a string.
+
+        Args:
+            text (str): the string to normalize
+            remove_articles (bool): whether to remove articles
+        Returns:
+            (str): The normalized string
+        """
+        words = tokenize(text)
+        articles = self.articles if remove_articles else ()
+        replacements = self.words
+        number_parser = self.number_parser
+
+        normalized = []
+        i = 0
+        while i < len(words):
+            word = words[i]
+            if word in articles:
+                i += 1
+                continue
+
+            if number_parser:
+                result = number_parser(words, i)
+                if result:
+                    value, i = result
+                    normalized.append(str(value))
+                    continue
+
+            normalized.append(replacements.get(word, word))
+            i += 1
+        return " ".join(normalized)
@@ -16,7 +16,8 @@
 #
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from mycroft.util.lang.parse_common import is_numeric, look_for_fractions
+from mycroft.util.lang.parse_common import is_numeric, look_for_fractions, \
+    Normalizer
 
 
 def extractnumber_en(text):
@@ -766,72 +767,67 @@ def isFractional_en(input_str):
     return False
 
 
-def normalize_en(text, remove_articles):
-    """ English string normalization """
+# Expand common contractions, e.g. "isn't" -> "is not"
+_contractions_en = ["ain't", "aren't", "can't", "could've", "couldn't",
+                    "didn't", "doesn't", "don't", "gonna", "gotta",
+                    "hadn't", "hasn't", "haven't", "he'd", "he'll", "he's",
+                    "how'd", "how'll", "how's", "I'd", "I'll", "I'm",
+                    "I've", "isn't", "it'd", "it'll", "it's", "mightn't",
+                    "might've", "mustn't", "must've", "needn't",
+                    "oughtn't",
+                    "shan't", "she'd", "she'll", "she's", "shouldn't",
+                    "should've", "somebody's", "someone'd", "someone'll",
+                    "someone's", "that'll", "that's", "that'd", "there'd",
+                    "there're", "there's", "they'd", "they'll", "they're",
+                    "they've", "wasn't", "we'd", "we'll", "we're", "we've",
+                    "weren't", "what'd", "what'll", "what're", "what's",
+                    "whats",  # technically incorrect but some STT outputs
+                    "what've", "when's", "when'd", "where'd", "where's",
+                    "where've", "who'd", "who'd've", "who'll", "who're",
+                    "who's", "who've", "why'd", "why're", "why's", "won't",
+                    "won't've", "would've", "wouldn't", "wouldn't've",
+                    "y'all", "ya'll", "you'd", "you'd've", "you'll",
+                    "y'aint", "y'ain't", "you're", "you've"]
+_expansions_en = ["is not", "are not", "can not", "could have",
+                  "could not", "did not", "does not", "do not",
+                  "going to", "got to", "had not", "has not",
+                  "have not", "he would", "he will", "he is",
+                  "how did",
+                  "how will", "how is", "I would", "I will", "I am",
+                  "I have", "is not", "it would", "it will", "it is",
+                  "might not", "might have", "must not", "must have",
+                  "need not", "ought not", "shall not", "she would",
+                  "she will", "she is", "should not", "should have",
+                  "somebody is", "someone would", "someone will",
+                  "someone is", "that will", "that is", "that would",
+                  "there would", "there are", "there is", "they would",
+                  "they will", "they are", "they have", "was not",
+                  "we would", "we will", "we are", "we have",
+                  "were not", "what did", "what will", "what are",
+                  "what is",
+                  "what is", "what have", "when is", "when did",
+                  "where did", "where is", "where have", "who would",
+                  "who would have", "who will", "who are", "who is",
+                  "who have", "why did", "why are", "why is",
+                  "will not", "will not have", "would have",
+                  "would not", "would not have", "you all", "you all",
+                  "you would", "you would have", "you will",
+                  "you are not", "you are not", "you are", "you have"]
+
+# Convert numbers into digits, e.g. "two" -> "2"
+_text_numbers_en = ["zero", "one", "two", "three", "four", "five", "six",
+                    "seven", "eight", "nine", "ten", "eleven", "twelve",
+                    "thirteen", "fourteen", "fifteen", "sixteen",
+                    "seventeen", "eighteen", "nineteen", "twenty"]
+
+_words_en = {word: str(i) for i, word in enumerate(_text_numbers_en)}
+_words_en.update({contraction: _words_en.get(expansion, expansion)
+                  for contraction, expansion in zip(_contractions_en,
+                                                    _expansions_en)})
+
+_normalizer_en = Normalizer(["the", "a", "an"], _words_en)
 
-    words = text.split()  # this also removed extra spaces
-    normalized = ""
-    for word in words:
-        if remove_articles and word in ["the", "a", "an"]:
-            continue
 
-        # Expand common contractions, e.g. "isn't" -> "is not"
-        contraction = ["ain't", "aren't", "can't", "could've", "couldn't",
-                       "didn't", "doesn't", "don't", "gonna", "gotta",
-                       "hadn't", "hasn't", "haven't", "he'd", "he'll", "he's",
-                       "how'd", "how'll", "how's", "I'd", "I'll", "I'm",
-                       "I've", "isn't", "it'd", "it'll", "it's", "mightn't",
-                       "might've", "mustn't", "must've", "needn't",
-                       "oughtn't",
-                       "shan't", "she'd", "she'll", "she's", "shouldn't",
-                       "should've", "somebody's", "someone'd", "someone'll",
-                       "someone's", "that'll", "that's", "that'd", "there'd",
-                       "there're", "there's", "they'd", "they'll", "they're",
-                       "they've", "wasn't", "we'd", "we'll", "we're", "we've",
-                       "weren't", "what'd", "what'll", "what're", "what's",
-                       "whats",  # technically incorrect but some STT outputs
-                       "what've", "when's", "when'd", "where'd", "where's",
-                       "where've", "who'd", "who'd've", "who'll", "who're",
-                       "who's", "who've", "why'd", "why're", "why's", "won't",
-                       "won't've", "would've", "wouldn't", "wouldn't've",
-                       "y'all", "ya'll", "you'd", "you'd've", "you'll",
-                       "y'aint", "y'ain't", "you're", "you've"]
-        if word in contraction:
-            expansion = ["is not", "are not", "can not", "could have",
-                         "could not", "did not", "does not", "do not",
-                         "going to", "got to", "had not", "has not",
-                         "have not", "he would", "he will", "he is",
-                         "how did",
-                         "how will", "how is", "I would", "I will", "I am",
-                         "I have", "is not", "it would", "it will", "it is",
-                         "might not", "might have", "must not", "must have",
-                         "need not", "ought not", "shall not", "she would",
-                         "she will", "she is", "should not", "should have",
-                         "somebody is", "someone would", "someone will",
-                         "someone is", "that will", "that is", "that would",
-                         "there would", "there are", "there is", "they would",
-                         "they will", "they are", "they have", "was not",
-                         "we would", "we will", "we are", "we have",
-                         "were not", "what did", "what will", "what are",
-                         "what is",
-                         "what is", "what have", "when is", "when did",
-                         "where did", "where is", "where have", "who would",
-                         "who would have", "who will", "who are", "who is",
-                         "who have", "why did", "why are", "why is",
-                         "will not", "will not have", "would have",
-                         "would not", "would not have", "you all", "you all",
-                         "you would", "you would have", "you will",
-                         "you are not", "you are not", "you are", "you have"]
-            word = expansion[contraction.index(word)]
-
-        # Convert numbers into digits, e.g. "two" -> "2"
-        textNumbers = ["zero", "one", "two", "three", "four", "five", "six",
-                       "seven", "eight", "nine", "ten", "eleven", "twelve",
-                       "thirteen", "fourteen", "fifteen", "sixteen",
-                       "seventeen", "eighteen", "nineteen", "twenty"]
-        if word in textNumbers:
-            word = str(textNumbers.index(word))
-
-        normalized += " " + word
-
-    return normalized[1:]  # strip the initial space
+def normalize_en(text, remove_articles):
+    """ English string normalization """
+    return _normalizer_en.normalize(text, remove_articles)
@@ -20,7 +20,8 @@
 """
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from mycroft.util.lang.parse_common import is_numeric, look_for_fractions
+from mycroft.util.lang.parse_common import is_numeric, look_for_fractions, \
+    Normalizer
 
 # Undefined articles ["un", "una", "unos", "unas"] can not be supressed,
 # in Spanish, "un caballo" means "a horse" or "one horse".
@@ -316,6 +317,10 @@ def extractnumber_es(text):
     return result
 
 def es_number_parse(words, i):
+    # Every number starts with a number word, skip building the parser
+    if i >= len(words) or not es_numbers.get(words[i]):
+        return None
+
     def es_cte(i, s):
         if i < len(words) and s == words[i]:
             return s, i + 1
@@ -390,31 +395,14 @@ def es_number_parse(words, i):
 
     return es_number(i)
 
-def normalize_es(text, remove_articles):
-    """ Spanish string normalization """
-
-    words = text.split()  # this also removed extra spaces
 
-    normalized = ""
-    i = 0
-    while i < len(words):
-        word = words[i]
+_normalizer_es = Normalizer(es_articles, number_parser=es_number_parse)
 
-        if remove_articles and word in es_articles:
-            i += 1
-            continue
-
-        # Convert numbers into digits
-        r = es_number_parse(words, i)
-        if r:
-            v, i = r
-            normalized += " " + str(v)
-            continue
 
-        normalized += " " + word
-        i += 1
+def normalize_es(text, remove_articles):
+    """ Spanish string normalization """
+    return _normalizer_es.normalize(text, remove_articles)
 
-    return normalized[1:]  # strip the initial space
 
 # def extract_datetime_it(string, currentDate=None):
 #     def clean_string(s):
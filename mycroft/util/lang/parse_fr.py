@@ -25,7 +25,8 @@
 
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from mycroft.util.lang.parse_common import is_numeric, look_for_fractions
+from mycroft.util.lang.parse_common import is_numeric, look_for_fractions, \
+    tokenize
 
 # Undefined articles ["un", "une"] cannot be supressed,
 # in French, "un cheval" means "a horse" or "one horse".
@@ -360,7 +361,7 @@ def number_ordinal_fr(words, i):
                     word = word + "e"
                     result = number_parse_fr([word], 0)
                 if result:
-                    val2, i = result
+                    val2 = result[0]
                 if val2 is not None:
                     strOrd = str(val1 + val2) + "e"
         if strOrd:
@@ -1024,38 +1025,42 @@ def isFractional_fr(input_str):
     return False
 
 
+_articles_fr = frozenset(articles_fr)
+_elisions_fr = frozenset(["l'", "d'"])
+_punctuation_fr = frozenset(["?", "!", ";", "…"])
+
+
 def normalize_fr(text, remove_articles):
     """ French string normalization """
-    text = text.lower()
-    words = text.split()  # this also removed extra spaces
-    normalized = ""
+    words = tokenize(text.lower())
+    normalized = []
     i = 0
     while i < len(words):
         # remove articles
-        if remove_articles and words[i] in articles_fr:
+        if remove_articles and words[i] in _articles_fr:
             i += 1
             continue
-        if remove_articles and words[i][:2] in ["l'", "d'"]:
+        if remove_articles and words[i][:2] in _elisions_fr:
             words[i] = words[i][2:]
         # remove useless punctuation signs
-        if words[i] in ["?", "!", ";", "…"]:
+        if words[i] in _punctuation_fr:
             i += 1
             continue
         # Normalize ordinal numbers
-        if i > 0 and words[i - 1] in articles_fr:
+        if i > 0 and words[i - 1] in _articles_fr:
             result = number_ordinal_fr(words, i)
             if result is not None:
                 val, i = result
-                normalized += " " + str(val)
+                normalized.append(str(val))
                 continue
         # Convert numbers into digits
         result = number_parse_fr(words, i)
         if result is not None:
             val, i = result
-            normalized += " " + str(val)
+            normalized.append(str(val))
             continue
 
-        normalized += " " + words[i]
+        normalized.append(words[i])
         i += 1
 
-    return normalized[1:]  # strip the initial space
+    return " ".join(normalized)
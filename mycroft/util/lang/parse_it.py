@@ -25,7 +25,8 @@
 
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from mycroft.util.lang.parse_common import is_numeric, look_for_fractions
+from mycroft.util.lang.parse_common import is_numeric, look_for_fractions, \
+    Normalizer
 
 
 # Undefined articles ["un", "una", "un'"] can not be supressed,
@@ -87,6 +88,9 @@ it_numbers = {
     "mila": 1000
 }
 
+# ordine delle parole in it_numbers
+_it_numbers_order = {word: i for i, word in enumerate(it_numbers)}
+
 
 def isFractional_it(input_str):
     """
@@ -131,17 +135,15 @@ def extractnumber_long_it(word):
          (int) : il valore del numero estratto usando tutta la parola
          Falso : se la parola non è un numero es."qualcuno"
     """
-    result = False
     value = False
 
-    for number in it_numbers.keys():  # ciclo unità
-        if word.endswith(number):
-            result = True
-            value = it_numbers[number]
-            word = word[0: len(word) - len(number)]
-            break
-
-    if result:  # tolte le unità, dovrebbe rimanere una stringa nota
+    # ciclo unità, la prima in it_numbers con cui finisce la parola
+    endings = [word[i:] for i in range(len(word)) if word[i:] in it_numbers]
+    if endings:
+        number = min(endings, key=_it_numbers_order.get)
+        value = it_numbers[number]
+        word = word[0: len(word) - len(number)]
+        # tolte le unità, dovrebbe rimanere una stringa nota
         if word in it_numbers:
             value += it_numbers[word]
         else:
@@ -299,36 +301,32 @@ def extractnumber_it(text):
     return result
 
 
-def normalize_it(text, remove_articles):
-    """ IT string normalization """
-
-    words = text.split()  # this also removed extra spaces
-    # Contractions are not common in IT
-    # Convert numbers into digits, e.g. "quarantadue" -> "42"
-    normalized = ""
-    i = 0
-
-    while i < len(words):
-        word = words[i]
-        # remove articles
-        # Italian requires the article to define the gender
-        if remove_articles and word in it_articles:
-            i += 1
-            continue
+def it_number_parse(words, i):
+    """
+    Converte il numero testuale words[i] es. "quarantadue" -> 42
 
-        if word in it_numbers:
-            word = str(it_numbers[word])
+    Ritorna:
+        (int, int): il valore e l'indice della parola seguente
+        None : se la parola non è un numero
+    """
+    word = words[i]
+    if word in it_numbers:
+        return it_numbers[word], i + 1
+    val = extractnumber_long_it(word)
+    if val:
+        return val, i + 1
+    return None
 
-        val = extractnumber_long_it(word)
 
-        if val:
-            word = str(val)
+# Contractions are not common in IT
+# Italian requires the article to define the gender,
+# indefinite articles in it-it can not be removed
+_normalizer_it = Normalizer(it_articles, number_parser=it_number_parse)
 
-        normalized += " " + word
-        i += 1
-    # indefinite articles in it-it can not be removed
 
-    return normalized[1:]
+def normalize_it(text, remove_articles):
+    """ IT string normalization """
+    return _normalizer_it.normalize(text, remove_articles)
 
 
 def extract_datetime_it(string, currentDate=None):
@@ -23,7 +23,8 @@
 
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from mycroft.util.lang.parse_common import is_numeric, look_for_fractions
+from mycroft.util.lang.parse_common import is_numeric, look_for_fractions, \
+    Normalizer
 
 
 # Undefined articles ["um", "uma", "uns", "umas"] can not be supressed,
@@ -254,6 +255,10 @@ def extractnumber_pt(text):
 
 
 def pt_number_parse(words, i):
+    # Every number starts with a number word, skip building the parser
+    if i >= len(words) or not pt_numbers.get(words[i]):
+        return None
+
     def pt_cte(i, s):
         if i < len(words) and s == words[i]:
             return s, i + 1
@@ -329,42 +334,22 @@ def pt_number_parse(words, i):
     return pt_number(i)
 
 
+_normalizer_pt = Normalizer(pt_articles,
+                            {word: str(value)
+                             for word, value in pt_numbers.items()},
+                            pt_number_parse)
+
+
 def normalize_pt(text, remove_articles):
     """ PT string normalization """
-
-    words = text.split()  # this also removed extra spaces
-    normalized = ""
     # Contractions are not common in PT
-
-    # Convert numbers into digits, e.g. "dois" -> "2"
-    normalized = ""
-    i = 0
-    while i < len(words):
-        word = words[i]
-        # remove articles
-        if remove_articles and word in pt_articles:
-            i += 1
-            continue
-
-        # Convert numbers into digits
-        r = pt_number_parse(words, i)
-        if r:
-            v, i = r
-            normalized += " " + str(v)
-            continue
-
-        # NOTE temporary , handle some numbers above >999
-        if word in pt_numbers:
-            word = str(pt_numbers[word])
-        # end temporary
-
-        normalized += " " + word
-        i += 1
+    # NOTE temporary, pt_numbers handles some numbers above >999
+    normalized = _normalizer_pt.normalize(text, remove_articles)
     # some articles in pt-pt can not be removed, but many words can
     # this is experimental and some meaning may be lost
     # maybe agressive should default to False
     # only usage will tell, as a native speaker this seems reasonable
-    return pt_pruning(normalized[1:], agressive=remove_articles)
+    return pt_pruning(normalized, agressive=remove_articles)
 
 
 def extract_datetime_pt(input_str, currentDate=None):
@@ -1151,35 +1136,30 @@ def extract_datetime_pt(input_str, currentDate=None):
     return [extractedDate, resultStr]
 
 
+# agressive pt word pruning
+_pruned_words_pt = frozenset([
+    "a", "o", "os", "as", "de", "dos", "das", "lhe", "lhes", "me", "e",
+    "no", "nas", "na", "nos", "em", "para", "este", "esta", "deste", "desta",
+    "neste", "nesta", "nesse", "nessa", "foi", "que"])
+_symbols_pt = str.maketrans({".": None, ",": None, ";": None, ":": None,
+                             "!": None, "?": None, "-": " ", "_": " "})
+_accents_pt = str.maketrans({u"á": "a", u"à": "a", u"ã": "a", u"â": "a",
+                             u"ê": "e", u"è": "e", u"é": "e",
+                             u"í": "i", u"ì": "i",
+                             u"ò": "o", u"ó": "o",
+                             u"ú": "u", u"ù": "u",
+                             u"ç": "c"})
+
+
 def pt_pruning(text, symbols=True, accents=True, agressive=True):
-    # agressive pt word pruning
-    words = ["a", "o", "os", "as", "de", "dos", "das",
-             "lhe", "lhes", "me", "e", "no", "nas", "na", "nos", "em", "para",
-             "este",
-             "esta", "deste", "desta", "neste", "nesta", "nesse",
-             "nessa", "foi", "que"]
     if symbols:
-        symbols = [".", ",", ";", ":", "!", "?", u"ï¿½", u"ï¿½"]
-        for symbol in symbols:
-            text = text.replace(symbol, "")
-        text = text.replace("-", " ").replace("_", " ")
+        text = text.translate(_symbols_pt).replace(u"ï¿½", "")
     if accents:
-        accents = {"a": [u"á", u"à", u"ã", u"â"],
-                   "e": [u"ê", u"è", u"é"],
-                   "i": [u"í", u"ì"],
-                   "o": [u"ò", u"ó"],
-                   "u": [u"ú", u"ù"],
-                   "c": [u"ç"]}
-        for char in accents:
-            for acc in accents[char]:
-                text = text.replace(acc, char)
+        text = text.translate(_accents_pt)
     if agressive:
-        text_words = text.split(" ")
-        for idx, word in enumerate(text_words):
-            if word in words:
-                text_words[idx] = ""
-        text = " ".join(text_words)
-        text = ' '.join(text.split())
+        text_words = [word if word not in _pruned_words_pt else ""
+                      for word in text.split(" ")]
+        text = ' '.join(' '.join(text_words).split())
     return text
 
 
@@ -16,7 +16,8 @@
 #
 from datetime import datetime
 from dateutil.relativedelta import relativedelta
-from mycroft.util.lang.parse_common import is_numeric, look_for_fractions
+from mycroft.util.lang.parse_common import is_numeric, look_for_fractions, \
+    Normalizer
 
 
 def extractnumber_sv(text):
@@ -756,22 +757,18 @@ def is_fractional_sv(input_str):
     return False
 
 
+# Convert numbers into digits, e.g. "två" -> "2"
+_text_numbers_sv = ["noll", "ett", "två", "tre", "fyra", "fem", "sex",
+                    "sju", "åtta", "nio", "tio", "elva", "tolv",
+                    "tretton", "fjorton", "femton", "sexton",
+                    "sjutton", "arton", "nitton", "tjugo"]
+
+_words_sv = {word: str(i) for i, word in enumerate(_text_numbers_sv)}
+_words_sv['en'] = _words_sv['ett']
+
+_normalizer_sv = Normalizer(words=_words_sv)
+
+
 def normalize_sv(text, remove_articles):
-    """ English string normalization """
-
-    words = text.split()  # this also removed extra spaces
-    normalized = ''
-    for word in words:
-        # Convert numbers into digits, e.g. "two" -> "2"
-        if word == 'en':
-            word = 'ett'
-        textNumbers = ["noll", "ett", "två", "tre", "fyra", "fem", "sex",
-                       "sju", "åtta", "nio", "tio", "elva", "tolv",
-                       "tretton", "fjorton", "femton", "sexton",
-                       "sjutton", "arton", "nitton", "tjugo"]
-        if word in textNumbers:
-            word = str(textNumbers.index(word))
-
-        normalized += " " + word
-
-    return normalized[1:]  # strip the initial space
+    """ Swedish string normalization """
+    return _normalizer_sv.normalize(text, remove_articles)
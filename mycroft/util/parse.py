@@ -14,19 +14,58 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import heapq
+from datetime import datetime
 from difflib import SequenceMatcher
-
-from mycroft.util.lang.parse_en import *
-from mycroft.util.lang.parse_pt import *
-from mycroft.util.lang.parse_es import *
-from mycroft.util.lang.parse_it import *
-from mycroft.util.lang.parse_sv import *
-
-from mycroft.util.lang.parse_fr import extractnumber_fr
-from mycroft.util.lang.parse_fr import extract_datetime_fr
-from mycroft.util.lang.parse_fr import normalize_fr
-
-from mycroft.util.lang.parse_common import *
+from functools import lru_cache
+from multiprocessing import Pool
+
+from mycroft.util.lang import get_lang_function, lang_function
+from mycroft.util.lang import parse_common
+
+# Helpers shared by the languages, importable from this module as before
+is_numeric = parse_common.is_numeric
+look_for_fractions = parse_common.look_for_fractions
+tokenize = parse_common.tokenize
+
+# Language specific functions, importable from this module as before the
+# languages were loaded on first use. The language module is only imported
+# when one of its functions is called.
+extractnumber_en = lang_function("parse_en", "extractnumber_en")
+extract_datetime_en = lang_function("parse_en", "extract_datetime_en")
+isFractional_en = lang_function("parse_en", "isFractional_en")
+normalize_en = lang_function("parse_en", "normalize_en")
+isFractional_pt = lang_function("parse_pt", "isFractional_pt")
+extractnumber_pt = lang_function("parse_pt", "extractnumber_pt")
+pt_number_parse = lang_function("parse_pt", "pt_number_parse")
+normalize_pt = lang_function("parse_pt", "normalize_pt")
+extract_datetime_pt = lang_function("parse_pt", "extract_datetime_pt")
+pt_pruning = lang_function("parse_pt", "pt_pruning")
+get_gender_pt = lang_function("parse_pt", "get_gender_pt")
+isFractional_es = lang_function("parse_es", "isFractional_es")
+extractnumber_long_es = lang_function("parse_es", "extractnumber_long_es")
+extractnumber_es = lang_function("parse_es", "extractnumber_es")
+es_number_parse = lang_function("parse_es", "es_number_parse")
+normalize_es = lang_function("parse_es", "normalize_es")
+extract_datetime_es = lang_function("parse_es", "extract_datetime_es")
+get_gender_es = lang_function("parse_es", "get_gender_es")
+isFractional_it = lang_function("parse_it", "isFractional_it")
+extractnumber_long_it = lang_function("parse_it", "extractnumber_long_it")
+extractnumber_it = lang_function("parse_it", "extractnumber_it")
+it_number_parse = lang_function("parse_it", "it_number_parse")
+normalize_it = lang_function("parse_it", "normalize_it")
+extract_datetime_it = lang_function("parse_it", "extract_datetime_it")
+get_gender_it = lang_function("parse_it", "get_gender_it")
+extractnumber_sv = lang_function("parse_sv", "extractnumber_sv")
+extract_datetime_sv = lang_function("parse_sv", "extract_datetime_sv")
+is_fractional_sv = lang_function("parse_sv", "is_fractional_sv")
+normalize_sv = lang_function("parse_sv", "normalize_sv")
+extractnumber_fr = lang_function("parse_fr", "extractnumber_fr")
+extract_datetime_fr = lang_function("parse_fr", "extract_datetime_fr")
+normalize_fr = lang_function("parse_fr", "normalize_fr")
+
+# Number of (text, anchor date, language) results kept by extract_datetime
+EXTRACT_DATETIME_CACHE_SIZE = 256
 
 
 def fuzzy_match(x, against):
@@ -38,6 +77,57 @@ def fuzzy_match(x, against):
     return SequenceMatcher(None, x, against).ratio()
 
 
+def _choice_list(choices):
+    if isinstance(choices, dict):
+        return list(choices.keys())
+    elif isinstance(choices, list):
+        return choices
+    else:
+        raise ValueError('a list or dict of choices must be provided')
+
+
+def _top_matches(matchers, k):
+    """
+        Keep the k best scoring matchers.
+
+        Matchers whose upper bounds (real_quick_ratio and quick_ratio)
+        can't beat the current k best are not scored.
+
+        Arguments:
+            matchers: iterable of (index, SequenceMatcher) tuples, the
+                      matcher comparing the query with the choice at index
+            k:        number of results
+
+        Returns: list of (index, score), best first, ties by index
+    """
+    top = []  # min heap of (score, -index)
+    for i, matcher in matchers:
+        if len(top) == k:
+            worst = top[0][0]
+            if (matcher.real_quick_ratio() < worst or
+                    matcher.quick_ratio() < worst):
+                continue
+        item = (matcher.ratio(), -i)
+        if len(top) < k:
+            heapq.heappush(top, item)
+        elif item > top[0]:
+            heapq.heapreplace(top, item)
+    return [(-i, score) for score, i in sorted(top, reverse=True)]
+
+
+def _score_chunk(args):
+    """ Score part of the choices in a worker process. """
+    query, chunk, k = args
+    matcher = SequenceMatcher(None, query)
+
+    def matchers():
+        for i, choice in chunk:
+            matcher.set_seq2(choice)
+            yield i, matcher
+
+    return _top_matches(matchers(), k)
+
+
 def match_one(query, choices):
     """
         Find best match from a list or dictionary given an input
@@ -48,23 +138,149 @@ def match_one(query, choices):
 
         Returns: tuple with best match, score
     """
-    if isinstance(choices, dict):
-        _choices = list(choices.keys())
-    elif isinstance(choices, list):
-        _choices = choices
-    else:
-        raise ValueError('a list or dict of choices must be provided')
+    _choices = _choice_list(choices)
+    if not _choices:
+        raise IndexError('no choices to match')
+
+    matcher = SequenceMatcher(None, query)
 
-    best = (_choices[0], fuzzy_match(query, _choices[0]))
-    for c in _choices[1:]:
-        score = fuzzy_match(query, c)
-        if score > best[1]:
-            best = (c, score)
+    def matchers():
+        for i, choice in enumerate(_choices):
+            matcher.set_seq2(choice)
+            yield i, matcher
 
+    i, score = _top_matches(matchers(), 1)[0]
     if isinstance(choices, dict):
-        return (choices[best[0]], best[1])
+        return (choices[_choices[i]], score)
     else:
-        return best
+        return (_choices[i], score)
+
+
+class FuzzyIndex(object):
+    """
+        Index of choices for repeated fuzzy matching.
+
+        The choices are prepared once: each gets a SequenceMatcher and its
+        character trigrams are indexed. A search only scores the choices
+        sharing the most trigrams with the query, using the same score as
+        fuzzy_match().
+
+        Arguments:
+            choices:   list or dictionary of choices, for a dictionary the
+                       values are returned
+            limit:     number of trigram candidates scored per search, None
+                       scores all choices
+            processes: score in a pool of this many processes when more
+                       than POOL_MIN_CANDIDATES are scored, None scores in
+                       this process
+    """
+    POOL_MIN_CANDIDATES = 5000
+
+    def __init__(self, choices, limit=100, processes=None):
+        self.choices = _choice_list(choices)
+        if isinstance(choices, dict):
+            self.values = [choices[c] for c in self.choices]
+        else:
+            self.values = self.choices
+        self.limit = limit
+        self.processes = processes
+        self.pool = None
+
+        self.matchers = []
+        self.trigram_counts = []
+        self.postings = {}
+        for i, choice in enumerate(self.choices):
+            matcher = SequenceMatcher(None, '', choice)
+            self.matchers.append(matcher)
+            trigrams = self.trigrams(choice)
+            self.trigram_counts.append(len(trigrams))
+            for trigram in trigrams:
+                self.postings.setdefault(trigram, []).append(i)
+
+    def __len__(self):
+        return len(self.choices)
+
+    @staticmethod
+    def trigrams(text):
+        """ Set of the lowercase character trigrams of text. """
+        text = '  ' + text.lower() + ' '
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def candidates(self, query):
+        """
+            Choices sharing the most trigrams with the query.
+
+            Returns: list of indexes of at most limit choices, all choices
+                     if limit is None or no trigram is shared
+        """
+        if self.limit is None or len(self.choices) <= self.limit:
+            return range(len(self.choices))
+
+        trigrams = self.trigrams(query)
+        shared = {}
+        for trigram in trigrams:
+            for i in self.postings.get(trigram, ()):
+                shared[i] = shared.get(i, 0) + 1
+        if not shared:
+            return range(len(self.choices))
+
+        # Dice coefficient of the trigram sets
+        counts = self.trigram_counts
+        size = len(trigrams)
+        return heapq.nlargest(
+            self.limit, shared,
+            key=lambda i: shared[i] / float(size + counts[i]))
+
+    def search(self, query, k=5):
+        """
+            Find the best matches of a query.
+
+            Arguments:
+                query: string to test
+                k:     number of results
+
+            Returns: list of (choice, score) tuples, best first
+        """
+        candidates = sorted(self.candidates(query))
+        if self.processes and len(candidates) >= self.POOL_MIN_CANDIDATES:
+            matches = self._pool_search(query, candidates, k)
+        else:
+            matches = _top_matches(self._matchers(query, candidates), k)
+        return [(self.values[i], score) for i, score in matches]
+
+    def match_one(self, query):
+        """
+            Find the best match of a query.
+
+            Returns: tuple with best match, score
+        """
+        matches = self.search(query, 1)
+        if not matches:
+            raise IndexError('no choices to match')
+        return matches[0]
+
+    def _matchers(self, query, candidates):
+        for i in candidates:
+            matcher = self.matchers[i]
+            matcher.set_seq1(query)
+            yield i, matcher
+
+    def _pool_search(self, query, candidates, k):
+        if self.pool is None:
+            self.pool = Pool(self.processes)
+        size = len(candidates) // self.processes + 1
+        chunks = [[(i, self.choices[i]) for i in candidates[j:j + size]]
+                  for j in range(0, len(candidates), size)]
+        results = self.pool.map(_score_chunk,
+                                [(query, chunk, k) for chunk in chunks])
+        matches = [match for result in results for match in result]
+        return sorted(matches, key=lambda m: (-m[1], m[0]))[:k]
+
+    def close(self):
+        """ Stop the scoring processes. """
+        if self.pool:
+            self.pool.terminate()
+            self.pool = None
 
 
 def extractnumber(text, lang="en-us"):
@@ -76,20 +292,9 @@ def extractnumber(text, lang="en-us"):
         (str): The number extracted or the original text.
     """
 
-    lang_lower = str(lang).lower()
-    if lang_lower.startswith("en"):
-        # return extractnumber_en(text, remove_articles)
-        return extractnumber_en(text)
-    elif lang_lower.startswith("es"):
-        return extractnumber_es(text)
-    elif lang_lower.startswith("pt"):
-        return extractnumber_pt(text)
-    elif lang_lower.startswith("it"):
-        return extractnumber_it(text)
-    elif lang_lower.startswith("fr"):
-        return extractnumber_fr(text)
-    elif lang_lower.startswith("sv"):
-        return extractnumber_sv(text)
+    extractnumber_lang = get_lang_function("parse", "extractnumber", lang)
+    if extractnumber_lang:
+        return extractnumber_lang(text)
     # TODO: extractnumber for other languages
     return text
 
@@ -107,6 +312,9 @@ def extract_datetime(text, anchorDate=None, lang="en-us"):
 
     If a time isn't supplied, the function defaults to 12 AM
 
+    Results are cached per text, language and anchor date truncated to the
+    minute, so the anchor's seconds are ignored.
+
     Args:
         str (string): the text to be normalized
         anchortDate (:obj:`datetime`, optional): the date to be used for
@@ -139,20 +347,20 @@ def extract_datetime(text, anchorDate=None, lang="en-us"):
         [datetime.datetime(2016, 3, 6, 17, 0), 'set up appointment']
     """
 
-    lang_lower = str(lang).lower()
-
-    if lang_lower.startswith("en"):
-        return extract_datetime_en(text, anchorDate)
-    elif lang_lower.startswith("es"):
-        return extract_datetime_es(text, anchorDate)
-    elif lang_lower.startswith("pt"):
-        return extract_datetime_pt(text, anchorDate)
-    elif lang_lower.startswith("it"):
-        return extract_datetime_it(text, anchorDate)
-    elif lang_lower.startswith("fr"):
-        return extract_datetime_fr(text, anchorDate)
-    elif lang_lower.startswith("sv"):
-        return extract_datetime_sv(text, anchorDate)
+    anchorDate = anchorDate or datetime.now()
+    result = _extract_datetime(text, anchorDate.replace(second=0,
+                                                        microsecond=0),
+                               str(lang).lower())
+    # Don't hand out the cached list
+    return list(result) if isinstance(result, list) else result
+
+
+@lru_cache(maxsize=EXTRACT_DATETIME_CACHE_SIZE)
+def _extract_datetime(text, anchorDate, lang):
+    extract_datetime_lang = get_lang_function("parse", "extract_datetime",
+                                              lang)
+    if extract_datetime_lang:
+        return extract_datetime_lang(text, anchorDate)
     # TODO: extract_datetime for other languages
     return text
 # ==============================================================
@@ -171,19 +379,9 @@ def normalize(text, lang="en-us", remove_articles=True):
         (str): The normalized string.
     """
 
-    lang_lower = str(lang).lower()
-    if lang_lower.startswith("en"):
-        return normalize_en(text, remove_articles)
-    elif lang_lower.startswith("es"):
-        return normalize_es(text, remove_articles)
-    elif lang_lower.startswith("pt"):
-        return normalize_pt(text, remove_articles)
-    elif lang_lower.startswith("it"):
-        return normalize_it(text, remove_articles)
-    elif lang_lower.startswith("fr"):
-        return normalize_fr(text, remove_articles)
-    elif lang_lower.startswith("sv"):
-        return normalize_sv(text, remove_articles)
+    normalize_lang = get_lang_function("parse", "normalize", lang)
+    if normalize_lang:
+        return normalize_lang(text, remove_articles)
     # TODO: Normalization for other languages
     return text
 
@@ -193,12 +391,9 @@ def get_gender(word, input_string="", lang="en-us"):
     guess gender of word, optionally use raw input text for context
     returns "m" if the word is male, "f" if female, False if unknown
     '''
-    if "pt" in lang:
-        return get_gender_pt(word, input_string)
     # spanish no longer follows pt rules as there are exceptions
     # like 'buey' or 'ley' where we need to see the preceding article
-    elif "es" in lang:
-        return get_gender_es(word, input_string)
-    elif "it" in lang:
-        return get_gender_it(word, input_string)
+    get_gender_lang = get_lang_function("parse", "get_gender", lang)
+    if get_gender_lang:
+        return get_gender_lang(word, input_string)
     return False
@@ -12,8 +12,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+"""
+    Named signals shared between the processes of the machine.
+
+    A signal is a file in the signal folder of the IPC directory. On Linux
+    a SignalWatcher thread follows the folder with inotify and keeps the
+    names of the existing signals in memory, so checking for a signal that
+    doesn't exist doesn't touch the file system and wait_for_signal() can
+    block until another process creates or removes a signal. Elsewhere the
+    files are checked on every call.
+"""
+import ctypes
+import ctypes.util
+import select
+import struct
 import tempfile
 import time
+from threading import Condition, Lock, Thread
 
 import os
 import os.path
@@ -21,6 +36,19 @@ import os.path
 import mycroft
 from mycroft.util.log import LOG
 
+# inotify event masks, see inotify(7)
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+WATCH_MASK = (IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE |
+              IN_DELETE_SELF | IN_MOVE_SELF)
+EVENT_HEADER = struct.Struct('iIII')
+
 
 def get_ipc_directory(domain=None):
     """Get the directory used for Inter Process Communication
@@ -84,6 +112,218 @@ def create_file(filename):
         f.write('')
 
 
+def _load_inotify():
+    """ Get the libc functions for inotify, None if not available. """
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6',
+                           use_errno=True)
+        libc.inotify_init.argtypes = []
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p,
+                                           ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+class SignalWatcher(Thread):
+    """ Follows the signal folder and keeps the existing signals in memory.
+
+        While the watch is active (the folder can be removed and created
+        again) a signal missing from signals doesn't exist. Signals in
+        signals still have to be checked on disk since they may expire.
+
+        Only the watcher thread updates signals, from the inotify events,
+        so the events are applied in order. Signals created by this
+        process are kept in pending until their event arrives, and a
+        signal found in memory but not on disk makes the thread list the
+        folder again.
+
+        Args:
+            directory (str): signal folder
+            libc: libc with the inotify functions
+    """
+
+    def __init__(self, directory, libc):
+        super(SignalWatcher, self).__init__()
+        self.daemon = True
+        self.directory = directory
+        self.signals = set()
+        self.pending = set()
+        self.active = False
+        self.generation = 0
+        self.condition = Condition()
+        self._libc = libc
+        self._fd = libc.inotify_init()
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init failed')
+        self._wakeup_read, self._wakeup_write = os.pipe()
+        self._wd = None
+        self._rescan_requested = False
+        self._stopped = False
+
+    def may_exist(self, signal_name):
+        """ False if the signal is known not to exist. """
+        return (not self.active or signal_name in self.signals or
+                signal_name in self.pending)
+
+    def created(self, signal_name):
+        """ Note a signal created by this process. """
+        with self.condition:
+            self.pending.add(signal_name)
+            self._changed()
+
+    def missing(self, signal_name):
+        """ Note that a signal that may exist isn't on disk. """
+        if self.active and not self._rescan_requested:
+            self._rescan_requested = True
+            self._wakeup()
+
+    def _wakeup(self):
+        try:
+            os.write(self._wakeup_write, b'\0')
+        except OSError:
+            pass
+
+    def _changed(self):
+        self.generation += 1
+        self.condition.notify_all()
+
+    def wait(self, generation, timeout):
+        """ Wait for a change of the signals after generation. """
+        with self.condition:
+            if self.generation == generation:
+                self.condition.wait(timeout)
+
+    def run(self):
+        while not self._stopped:
+            if self._wd is None and not self._watch():
+                time.sleep(1.0)
+                continue
+            readable, _, _ = select.select([self._fd, self._wakeup_read],
+                                           [], [], 1.0)
+            if self._wakeup_read in readable:
+                os.read(self._wakeup_read, 1024)
+            if self._fd in readable:
+                self._read_events()
+            if self._rescan_requested and self._wd is not None:
+                # Apply the queued events first, events after the listing
+                # are applied on top of it
+                while select.select([self._fd], [], [], 0)[0]:
+                    self._read_events()
+                self._rescan()
+        self.close()
+
+    def close(self):
+        for fd in (self._fd, self._wakeup_read, self._wakeup_write):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+    def _watch(self):
+        """ Watch the signal folder once it exists. """
+        if not os.path.isdir(self.directory):
+            return False
+        wd = self._libc.inotify_add_watch(self._fd, self.directory.encode(),
+                                          WATCH_MASK)
+        if wd < 0:
+            LOG.warning('Could not watch ' + self.directory)
+            return False
+        self._wd = wd
+        self._rescan()
+        return True
+
+    def _rescan(self):
+        self._rescan_requested = False
+        try:
+            names = set(os.listdir(self.directory))
+        except OSError:
+            names = set()
+        with self.condition:
+            self.signals = names
+            self.pending.clear()
+            self.active = True
+            self._changed()
+
+    def _unwatch(self):
+        with self.condition:
+            self.active = False
+            self._changed()
+        self._wd = None
+
+    def _read_events(self):
+        data = os.read(self._fd, 65536)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode()
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                self._rescan()
+            elif wd != self._wd:
+                continue  # Event of a previous watch
+            elif mask & IN_MOVE_SELF:
+                self._libc.inotify_rm_watch(self._fd, wd)
+                self._unwatch()
+            elif mask & (IN_DELETE_SELF | IN_IGNORED):
+                self._unwatch()
+            elif mask & (IN_CREATE | IN_MOVED_TO):
+                with self.condition:
+                    self.signals.add(name)
+                    self.pending.discard(name)
+                    self._changed()
+            elif mask & (IN_DELETE | IN_MOVED_FROM):
+                with self.condition:
+                    self.signals.discard(name)
+                    self._changed()
+
+    def stop(self):
+        self._stopped = True
+        self._wakeup()
+
+
+_signal_directory = None
+_watcher = None
+_watcher_pid = None
+_watcher_lock = Lock()
+
+
+def get_signal_directory():
+    """ Get the folder of the signal files. """
+    global _signal_directory
+    if _signal_directory is None:
+        _signal_directory = os.path.join(get_ipc_directory(), "signal")
+    return _signal_directory
+
+
+def get_signal_watcher():
+    """ The signal watcher of this process, started on first use.
+
+    Returns:
+        SignalWatcher: None if inotify isn't available
+    """
+    global _watcher, _watcher_pid
+    with _watcher_lock:
+        if _watcher_pid != os.getpid():
+            # The thread of the parent doesn't run in a forked child
+            if _watcher:
+                _watcher.close()
+            _watcher = None
+            _watcher_pid = os.getpid()
+        if _watcher is None:
+            libc = _load_inotify()
+            try:
+                directory = ensure_directory_exists(get_signal_directory())
+                _watcher = SignalWatcher(directory, libc)
+                _watcher.start()
+            except (AttributeError, OSError):
+                LOG.debug('inotify not available, signal files are polled')
+                _watcher = False
+        return _watcher or None
+
+
 def create_signal(signal_name):
     """Create a named signal
 
@@ -92,8 +332,11 @@ def create_signal(signal_name):
             valid in filenames.
     """
     try:
-        path = os.path.join(get_ipc_directory(), "signal", signal_name)
+        path = os.path.join(get_signal_directory(), signal_name)
         create_file(path)
+        watcher = get_signal_watcher()
+        if watcher:
+            watcher.created(signal_name)
         return os.path.isfile(path)
     except IOError:
         return False
@@ -112,18 +355,76 @@ def check_for_signal(signal_name, sec_lifetime=0):
     Returns:
         bool: True if the signal is defined, False otherwise
     """
-    path = os.path.join(get_ipc_directory(), "signal", signal_name)
+    watcher = get_signal_watcher()
+    if watcher and not watcher.may_exist(signal_name):
+        return False
+
+    path = os.path.join(get_signal_directory(), signal_name)
     if os.path.isfile(path):
         if sec_lifetime == 0:
             # consume this single-use signal
-            os.remove(path)
+            _remove_signal(path)
         elif sec_lifetime == -1:
             return True
         elif int(os.path.getctime(path) + sec_lifetime) < int(time.time()):
             # remove once expired
-            os.remove(path)
+            _remove_signal(path)
             return False
         return True
 
     # No such signal exists
+    if watcher:
+        watcher.missing(signal_name)
     return False
+
+
+def _remove_signal(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass  # Consumed by another process
+
+
+def _wait(condition, timeout):
+    end = None if timeout is None else time.time() + timeout
+    watcher = get_signal_watcher()
+    while True:
+        generation = watcher.generation if watcher else None
+        if condition():
+            return True
+        remaining = 1.0 if end is None else min(end - time.time(), 1.0)
+        if remaining <= 0:
+            return False
+        if watcher and watcher.active:
+            watcher.wait(generation, remaining)
+        else:
+            time.sleep(min(remaining, 0.1))
+
+
+def wait_for_signal(signal_name, timeout=None, sec_lifetime=-1):
+    """Block until a named signal exists
+
+    Args:
+        signal_name (str): The signal's name.
+        timeout (float, optional): Seconds to wait, forever if None
+        sec_lifetime (int, optional): see check_for_signal(), by default
+            the signal isn't consumed
+
+    Returns:
+        bool: True if the signal exists, False on timeout
+    """
+    return _wait(lambda: check_for_signal(signal_name, sec_lifetime),
+                 timeout)
+
+
+def wait_for_signal_removed(signal_name, timeout=None):
+    """Block until a named signal doesn't exist
+
+    Args:
+        signal_name (str): The signal's name.
+        timeout (float, optional): Seconds to wait, forever if None
+
+    Returns:
+        bool: True if the signal is gone, False on timeout
+    """
+    return _wait(lambda: not check_for_signal(signal_name, -1), timeout)
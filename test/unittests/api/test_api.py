@@ -12,8 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import time
 import unittest
 from copy import copy
+from threading import Thread
 
 import mock
 
@@ -34,12 +36,13 @@ CONFIG = {
 mycroft.api.requests.post = mock.MagicMock()
 
 
-def create_response(status, json=None, url='', data=''):
+def create_response(status, json=None, url='', data='', headers=None):
     json = json or {}
     response = mock.MagicMock()
     response.status_code = status
     response.json.return_value = json
     response.url = url
+    response.headers = headers or {}
     return response
 
 
@@ -63,7 +66,7 @@ class TestApi(unittest.TestCase):
         self.assertEquals(a.identity.uuid, '1234')
 
     @mock.patch('mycroft.api.IdentityManager')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_send(self, mock_request, mock_identity_manager):
         # Setup an OK response
         mock_response_ok = create_response(200, {})
@@ -97,8 +100,81 @@ class TestApi(unittest.TestCase):
         a.send(req)
         self.assertTrue(mycroft.api.IdentityManager.save.called)
 
+    @mock.patch('mycroft.api.IdentityManager')
+    @mock.patch('mycroft.api.requests.Session.request')
+    def test_etag_cache(self, mock_request, mock_identity_manager):
+        self.addCleanup(mycroft.api.Api.etag_cache.clear)
+        mock_request.return_value = create_response(
+            200, {'a': 1}, headers={'ETag': '"1"'})
+        a = mycroft.api.Api('test-path')
+        body = a.send({'path': 'etag', 'headers': {}})
+        body['a'] = 'modified'
+
+        mock_request.return_value = create_response(304)
+        self.assertEqual(a.send({'path': 'etag', 'headers': {}}), {'a': 1})
+        self.assertEqual(mock_request.call_args[1]['headers']['If-None-Match'],
+                         '1')
+
+        # The least recently used response is dropped
+        cache = mycroft.api.ETagCache(size=2)
+        cache.put('a', '1', 'A')
+        cache.put('b', '2', 'B')
+        cache.get('a')
+        cache.put('c', '3', 'C')
+        self.assertEqual(list(cache.entries), ['a', 'c'])
+
+    @mock.patch('mycroft.api.IdentityManager')
+    @mock.patch('mycroft.api.requests.Session.request')
+    def test_coalesced_requests(self, mock_request, mock_identity_manager):
+        def slow_request(*args, **kwargs):
+            time.sleep(0.2)
+            return create_response(200, {'a': 1})
+        mock_request.side_effect = slow_request
+        a = mycroft.api.Api('test-path')
+        results = []
+        threads = [Thread(target=lambda: results.append(
+            a.send({'path': 'coalesced', 'headers': {}})))
+            for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(results, [{'a': 1}] * 3)
+        self.assertEqual(mock_request.call_count, 1)
+
+        stats = mycroft.api.Api.latency_stats()
+        self.assertEqual(stats['GET coalesced']['count'], 1)
+        self.assertGreaterEqual(stats['GET coalesced']['max'], 0.2)
+
+    @mock.patch('mycroft.api.IdentityManager')
+    @mock.patch('mycroft.api.requests.Session.request')
+    def test_coalesced_token_refresh(self, mock_request,
+                                     mock_identity_manager):
+        responses = [create_response(401, {}, ''),
+                     create_response(200, {'accessToken': 'new'}),
+                     create_response(200, {'a': 1})]
+
+        def request(*args, **kwargs):
+            time.sleep(0.2)
+            return responses.pop(0)
+        mock_request.side_effect = request
+        mock_identity_manager.get.return_value.is_expired.return_value = \
+            False
+        a = mycroft.api.Api('test-path')
+        results = []
+        threads = [Thread(target=lambda: results.append(
+            a.request({'path': '/refresh'}))) for _ in range(3)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        # One request, one token refresh and one retry for all threads
+        self.assertEqual(results, [{'a': 1}] * 3)
+        self.assertEqual(mock_request.call_count, 3)
+        self.assertEqual(mock_identity_manager.save.call_count, 1)
+
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200)
         mock_identity = mock.MagicMock()
@@ -111,7 +187,7 @@ class TestApi(unittest.TestCase):
         self.assertEquals(device.path, 'device')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_activate(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200)
         mock_identity = mock.MagicMock()
@@ -126,7 +202,7 @@ class TestApi(unittest.TestCase):
         self.assertEquals(json['token'], 'token')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_get(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200)
         mock_identity = mock.MagicMock()
@@ -141,7 +217,7 @@ class TestApi(unittest.TestCase):
 
     @mock.patch('mycroft.api.IdentityManager.update')
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_get_code(self, mock_request, mock_identity_get,
                              mock_identit_update):
         mock_request.return_value = create_response(200, '123ABC')
@@ -157,7 +233,7 @@ class TestApi(unittest.TestCase):
             url, 'https://api-test.mycroft.ai/v1/device/code?state=state')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_get_settings(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200, {})
         mock_identity = mock.MagicMock()
@@ -171,7 +247,7 @@ class TestApi(unittest.TestCase):
             url, 'https://api-test.mycroft.ai/v1/device/1234/setting')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_report_metric(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200, {})
         mock_identity = mock.MagicMock()
@@ -191,7 +267,7 @@ class TestApi(unittest.TestCase):
             url, 'https://api-test.mycroft.ai/v1/device/1234/metric/mymetric')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_send_email(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200, {})
         mock_identity = mock.MagicMock()
@@ -211,7 +287,7 @@ class TestApi(unittest.TestCase):
             url, 'https://api-test.mycroft.ai/v1/device/1234/message')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_get_oauth_token(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200, {})
         mock_identity = mock.MagicMock()
@@ -226,7 +302,7 @@ class TestApi(unittest.TestCase):
             url, 'https://api-test.mycroft.ai/v1/device/1234/token/1')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_get_location(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200, {})
         mock_identity = mock.MagicMock()
@@ -240,7 +316,7 @@ class TestApi(unittest.TestCase):
             url, 'https://api-test.mycroft.ai/v1/device/1234/location')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_device_get_subscription(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200, {})
         mock_identity = mock.MagicMock()
@@ -262,7 +338,7 @@ class TestApi(unittest.TestCase):
         self.assertTrue(device.is_subscriber)
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_stt(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200, {})
         mock_identity = mock.MagicMock()
@@ -272,7 +348,7 @@ class TestApi(unittest.TestCase):
         self.assertEquals(stt.path, 'stt')
 
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_stt_stt(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200, {})
         mock_identity = mock.MagicMock()
@@ -304,7 +380,7 @@ class TestApi(unittest.TestCase):
 
     @mock.patch('mycroft.api._paired_cache', False)
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_is_paired_true(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200)
         mock_identity = mock.MagicMock()
@@ -322,7 +398,7 @@ class TestApi(unittest.TestCase):
 
     @mock.patch('mycroft.api._paired_cache', False)
     @mock.patch('mycroft.api.IdentityManager.get')
-    @mock.patch('mycroft.api.requests.request')
+    @mock.patch('mycroft.api.requests.Session.request')
     def test_is_paired_false(self, mock_request, mock_identity_get):
         mock_request.return_value = create_response(200)
         mock_identity = mock.MagicMock()
@@ -0,0 +1,110 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import time
+import unittest
+import wave
+from io import BytesIO
+
+import mock
+
+from mycroft.audio.sink import AudioSink, AudioStream
+
+
+def wav_data(num_frames, rate=16000):
+    data = BytesIO()
+    wav = wave.open(data, 'wb')
+    wav.setnchannels(1)
+    wav.setsampwidth(2)
+    wav.setframerate(rate)
+    wav.writeframes(b'\0\0' * num_frames)
+    wav.close()
+    data.seek(0)
+    return data
+
+
+class TestAudioSink(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('mycroft.audio.sink.pyaudio.PyAudio')
+        self.pyaudio = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.audio = self.pyaudio.return_value
+        self.stream = self.audio.open.return_value
+        self.sink = AudioSink(chunk_frames=100)
+
+    def tearDown(self):
+        self.sink.close()
+
+    def written(self):
+        return b''.join(c[0][0] for c in self.stream.write.call_args_list)
+
+    def test_play_wav(self):
+        self.sink.play(wav_data(250)).wait()
+        self.assertEqual(self.stream.write.call_count, 3)
+        self.assertEqual(self.written(), b'\0\0' * 250)
+
+    def test_communicate(self):
+        playback = self.sink.play(wav_data(100))
+        self.assertEqual(playback.communicate(), (None, None))
+        self.assertEqual(self.written(), b'\0\0' * 100)
+
+    def test_stream_kept_open(self):
+        self.sink.play(wav_data(100)).wait()
+        self.sink.play(wav_data(100)).wait()
+        self.assertEqual(self.audio.open.call_count, 1)
+        self.assertFalse(self.stream.close.called)
+        # A different format reopens the stream
+        self.sink.play(wav_data(100, rate=22050)).wait()
+        self.assertEqual(self.audio.open.call_count, 2)
+        self.assertEqual(self.audio.open.call_args[1]['rate'], 22050)
+        self.assertTrue(self.stream.close.called)
+
+    def test_terminate(self):
+        playback = self.sink.play(wav_data(100))
+        playback.terminate()
+        self.assertEqual(playback.wait(1.0), 0)
+
+    def test_audio_stream(self):
+        data = wav_data(250).getvalue()
+        audio = AudioStream()
+        audio.write(data[:300])
+        playback = self.sink.play(audio)
+        # Playback starts before the rest is synthesized
+        end = time.time() + 5.0
+        while len(self.written()) < 200 and time.time() < end:
+            time.sleep(0.01)
+        self.assertEqual(self.written(), b'\0\0' * 100)
+        self.assertIsNone(playback.poll())
+        audio.write(data[300:])
+        audio.close()
+        playback.wait(5.0)
+        self.assertEqual(self.written(), b'\0\0' * 250)
+
+    def test_idle_close(self):
+        self.sink.idle_timeout = 0.1
+        self.sink.play(wav_data(100)).wait()
+        end = time.time() + 5.0
+        while not self.stream.close.called and time.time() < end:
+            time.sleep(0.01)
+        self.assertTrue(self.stream.close.called)
+        # Reopened for the next sound
+        self.sink.play(wav_data(100)).wait()
+        self.assertEqual(self.audio.open.call_count, 2)
+
+    def test_close(self):
+        self.sink.play(wav_data(100)).wait()
+        self.sink.close()
+        self.assertFalse(self.sink.is_alive())
+        self.assertTrue(self.stream.close.called)
+        self.assertTrue(self.audio.terminate.called)
@@ -0,0 +1,98 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import shutil
+import tempfile
+import unittest
+from os.path import abspath, dirname, join
+
+import mock
+
+from mycroft.client.speech.benchmark import ListenerBenchmark
+from mycroft.client.speech.hotword_factory import HotWordEngine
+
+DATA_DIR = join(abspath(dirname(__file__)), 'data')
+
+CONFIG = {
+    'opt_in': False,
+    'lang': 'en-us',
+    'listener': {
+        'sample_rate': 16000,
+        'channels': 1,
+        'record_wake_words': False,
+        'record_utterances': False,
+        'wake_word_upload': {'enable': False},
+        'phoneme_duration': 120,
+        'multiplier': 1.0,
+        'energy_ratio': 1.5,
+        'wake_word': 'hey mycroft'
+    }
+}
+
+
+class TimedHotWord(HotWordEngine):
+    """ Hotword engine 'hearing' the wake word after some audio. """
+    def __init__(self, seconds):
+        super(TimedHotWord, self).__init__('hey mycroft', {})
+        self.bytes_left = int(seconds * 16000 * 2)
+
+    def update(self, chunk):
+        self.bytes_left -= len(chunk)
+
+    def found_wake_word(self, frame_data):
+        if self.bytes_left <= 0:
+            self.bytes_left = float('inf')
+            return True
+        return False
+
+
+class ListenerBenchmarkTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('mycroft.configuration.Configuration.get',
+                             return_value=CONFIG)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def test_replay(self):
+        wav_file = join(self.folder, 'weather_mycroft.wav')
+        shutil.copy(join(DATA_DIR, 'weather_mycroft.wav'), wav_file)
+        with open(join(self.folder, 'weather_mycroft.json'), 'w') as f:
+            json.dump({'wake_word': True, 'wake_word_end': 1.0}, f)
+
+        benchmark = ListenerBenchmark(TimedHotWord(0.5))
+        result = benchmark.replay(wav_file)
+        self.assertEqual(len(result.detections), 1)
+        self.assertEqual(len(result.recording_ends), 1)
+        self.assertGreater(result.detections[0], 1.0)
+        self.assertLess(result.detections[0], result.recording_ends[0])
+        self.assertIsNotNone(result.wake_word_latency)
+        self.assertFalse(result.false_reject)
+
+        benchmark.wake_word_recognizer = TimedHotWord(1000)
+        benchmark.recognizer.set_wake_word_recognizer(
+            benchmark.wake_word_recognizer)
+        benchmark.replay(join(DATA_DIR, 'stop.wav'), True)
+        benchmark.replay(join(DATA_DIR, 'mycroft.wav'), False)
+
+        report = benchmark.report()
+        self.assertEqual(report['files'], 3)
+        self.assertEqual(report['with_wake_word'], 2)
+        self.assertEqual(report['detections'], 1)
+        self.assertEqual(report['false_rejects'], 1)
+        self.assertEqual(report['false_accepts'], 0)
+        self.assertEqual(report['wake_word_latency']['count'], 1)
+        self.assertLess(report['real_time_factor'], 1.0)
@@ -0,0 +1,57 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import time
+import unittest
+from threading import Event
+
+import mock
+
+from mycroft.client.enclosure.mouth import EnclosureMouth
+from mycroft.messagebus.message import Message
+
+
+class EnclosureMouthTest(unittest.TestCase):
+    def setUp(self):
+        self.writer = mock.Mock()
+        self.writes = []
+        self.writer.write.side_effect = lambda cmd: self.writes.append(
+            (cmd, time.time()))
+        self.mouth = EnclosureMouth(mock.Mock(), self.writer)
+
+    def test_timeline(self):
+        start = time.time()
+        self.mouth.play_visemes(start, [('1', 0.1), ('2', 0.2), ('4', 0.3)],
+                                Event())
+        self.assertEqual([w[0] for w in self.writes],
+                         ['mouth.viseme=1', 'mouth.viseme=2',
+                          'mouth.viseme=4'])
+        self.assertAlmostEqual(self.writes[1][1] - start, 0.1, delta=0.05)
+        self.assertAlmostEqual(self.writes[2][1] - start, 0.2, delta=0.05)
+
+    def test_expired_visemes_skipped(self):
+        start = time.time() - 0.15
+        self.mouth.play_visemes(start, [('1', 0.1), ('2', 0.2)], Event())
+        self.assertEqual([w[0] for w in self.writes], ['mouth.viseme=2'])
+
+    def test_reset_stops_timeline(self):
+        self.mouth.viseme_list(Message('enclosure.mouth.viseme_list', {
+            'start': time.time(),
+            'visemes': [('1', 0.1), ('2', 0.2), ('4', 0.3)]
+        }))
+        time.sleep(0.15)
+        self.mouth.reset()
+        time.sleep(0.25)
+        self.assertEqual([w[0] for w in self.writes],
+                         ['mouth.viseme=1', 'mouth.viseme=2', 'mouth.reset'])
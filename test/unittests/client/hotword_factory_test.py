@@ -12,9 +12,20 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import os
+import shutil
+import tempfile
+import time
 import unittest
+from os.path import join
+from threading import Thread
 
-from mycroft.client.speech.hotword_factory import HotWordFactory
+import mock
+
+from mycroft.client.speech.hotword_factory import (HotWordFactory,
+                                                   HotWordEngine,
+                                                   HotWordManager,
+                                                   PreciseHotword)
 
 
 class PocketSphinxTest(unittest.TestCase):
@@ -55,3 +66,170 @@ class PocketSphinxTest(unittest.TestCase):
         config = config['hey victoria']
         self.assertEquals(config['phonemes'], p.phonemes)
         self.assertEquals(p.key_phrase, 'hey victoria')
+
+
+class FakeHotWord(HotWordEngine):
+    def __init__(self, key_phrase, config=None, lang='en-us'):
+        super(FakeHotWord, self).__init__(key_phrase, config or {}, lang)
+        self.found = False
+        self.chunks = []
+        self.stopped = False
+
+    def found_wake_word(self, frame_data):
+        return self.found
+
+    def update(self, chunk):
+        self.chunks.append(chunk)
+
+    def stop(self):
+        self.stopped = True
+
+
+class HotWordManagerTest(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch('mycroft.configuration.Configuration.get',
+                             return_value={'listener': {}})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_manager(self):
+        engines = [FakeHotWord('hey mycroft'), FakeHotWord('hey computer')]
+        manager = HotWordManager(engines)
+        self.assertEqual(manager.key_phrases, ['hey mycroft', 'hey computer'])
+        self.assertEqual(manager.key_phrase, 'hey mycroft')
+
+        manager.update(b'chunk')
+        self.assertEqual(engines[0].chunks, [b'chunk'])
+        self.assertEqual(engines[1].chunks, [b'chunk'])
+
+        self.assertFalse(manager.found_wake_word(b''))
+        engines[1].found = True
+        self.assertTrue(manager.found_wake_word(b''))
+        self.assertEqual(manager.key_phrase, 'hey computer')
+
+        manager.stop()
+        self.assertTrue(all(e.stopped for e in engines))
+
+    @mock.patch('mycroft.client.speech.hotword_factory.'
+                'PocketsphinxMultiHotWord')
+    def test_create_hotwords(self, mock_multi):
+        mock_multi.side_effect = lambda configs, lang: FakeHotWord(
+            sorted(configs)[0])
+        config = {
+            'hey mycroft': {'module': 'pocketsphinx', 'lang': 'en-us'},
+            'hey computer': {'module': 'pocketsphinx', 'lang': 'en-us'},
+            'hola mycroft': {'module': 'pocketsphinx', 'lang': 'es-es'}
+        }
+        engine = HotWordFactory.create_hotwords(
+            ['hey mycroft', 'hey computer', 'hola mycroft'], config)
+        self.assertIsInstance(engine, HotWordManager)
+        # One decoder per language
+        self.assertEqual(mock_multi.call_count, 2)
+        langs = sorted(c[0][1] for c in mock_multi.call_args_list)
+        self.assertEqual(langs, ['en-us', 'es-es'])
+        en_configs = [c[0][0] for c in mock_multi.call_args_list
+                      if c[0][1] == 'en-us'][0]
+        self.assertEqual(sorted(en_configs), ['hey computer', 'hey mycroft'])
+
+
+FAKE_PRECISE = """#!/usr/bin/env python3
+import sys
+while True:
+    chunk = sys.stdin.buffer.read(2048)
+    if len(chunk) < 2048:
+        break
+    print('1.0' if chunk[0] else '0.0', flush=True)
+"""
+
+
+class PreciseTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.exe = join(self.folder, 'precise-stream')
+        with open(self.exe, 'w') as f:
+            f.write(FAKE_PRECISE)
+        os.chmod(self.exe, 0o755)
+        self.model = join(self.folder, 'hey-mycroft.pb')
+        open(self.model, 'w').close()
+
+        config = {
+            'precise': {'dist_url': '', 'models_url': ''},
+            'listener': {'wake_word': 'hey mycroft'}
+        }
+        patches = [
+            mock.patch('mycroft.configuration.Configuration.get',
+                       return_value=config),
+            mock.patch.object(PreciseHotword, 'find_download_exe',
+                              return_value=self.exe),
+            mock.patch.object(PreciseHotword, 'get_model_info',
+                              return_value=('hey-mycroft.pb', self.model)),
+            mock.patch.object(PreciseHotword, 'update_model',
+                              return_value=False)
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.precise = PreciseHotword('hey mycroft',
+                                      {'module': 'precise',
+                                       'restart_delay': 0.01})
+        self.precise.cooldown = 0
+        self.addCleanup(self.precise.stop)
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def wait_for(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while time.time() < end:
+            if condition():
+                return True
+            time.sleep(0.01)
+        return False
+
+    def test_detection(self):
+        self.precise.update(b'\x00' * 2048)
+        self.assertTrue(self.wait_for(lambda: self.precise.latency.count))
+        self.assertFalse(self.precise.found_wake_word(None))
+        self.precise.update(b'\x01' * 2048)
+        self.assertTrue(self.wait_for(
+            lambda: self.precise.found_wake_word(None)))
+        # Cooldown after a detection
+        self.assertFalse(self.precise.found_wake_word(None))
+        self.assertEqual(self.precise.latency.count, 2)
+
+    def test_restart(self):
+        proc = self.precise.proc
+        proc.kill()
+        self.assertTrue(self.wait_for(lambda: self.precise.proc is not proc))
+        self.assertEqual(self.precise.restarts, 1)
+        self.precise.update(b'\x01' * 2048)
+        self.assertTrue(self.wait_for(
+            lambda: self.precise.found_wake_word(None)))
+
+    def test_concurrent_restart(self):
+        proc = self.precise.proc
+        threads = [Thread(target=self.precise.restart, args=(proc,))
+                   for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertIsNot(self.precise.proc, proc)
+        self.assertEqual(self.precise.restarts, 1)
+        self.assertTrue(self.wait_for(lambda: proc.poll() is not None))
+
+    def test_swap_model(self):
+        proc = self.precise.proc
+        self.precise.swap_model(self.model)
+        self.assertIsNot(self.precise.proc, proc)
+        self.assertTrue(self.wait_for(lambda: proc.poll() is not None))
+        self.assertEqual(self.precise.restarts, 0)
+
+    def test_bounded_buffer(self):
+        self.precise.running = False
+        with self.precise.buffer_cond:
+            self.precise.buffer_cond.notify()
+        time.sleep(0.1)
+        for _ in range(self.precise.max_buffered_chunks + 5):
+            self.precise.update(b'\x00' * 2048)
+        self.assertEqual(len(self.precise.buffer),
+                         self.precise.max_buffered_chunks)
+        self.assertEqual(self.precise.dropped_chunks, 5)
@@ -0,0 +1,97 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import unittest
+from copy import deepcopy
+
+import mock
+
+from mycroft.client.speech.listener import RecognizerLoop
+
+BASE_CONFIG = {
+    'lang': 'en-us',
+    'listener': {
+        'sample_rate': 16000,
+        'channels': 1,
+        'wake_word': 'hey mycroft',
+        'stand_up_word': 'wake up'
+    },
+    'hotwords': {
+        'hey mycroft': {'module': 'pocketsphinx'},
+        'wake up': {'module': 'pocketsphinx'}
+    },
+    'stt': {'module': 'mycroft'},
+    'enclosure': {'platform': 'mycroft_mark_1'}
+}
+
+
+class RecognizerLoopReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.config = deepcopy(BASE_CONFIG)
+        patches = {
+            'config': mock.patch('mycroft.configuration.Configuration.get',
+                                 side_effect=lambda *a, **k: self.config),
+            'mic': mock.patch('mycroft.client.speech.listener.'
+                              'MutableMicrophone'),
+            'recognizer': mock.patch('mycroft.client.speech.listener.'
+                                     'ResponsiveRecognizer'),
+            'hotword': mock.patch('mycroft.client.speech.listener.'
+                                  'HotWordFactory'),
+            'stt': mock.patch('mycroft.client.speech.listener.STTFactory')
+        }
+        self.mocks = {}
+        for name, patcher in patches.items():
+            self.mocks[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+        self.loop = RecognizerLoop()
+        self.loop.consumer = mock.Mock()
+        self.loop.stop = mock.Mock()
+        self.loop.start_async = mock.Mock()
+
+    def test_unrelated_change(self):
+        self.config = deepcopy(self.config)
+        self.config['enclosure']['platform'] = 'picroft'
+        self.assertEqual(self.loop._config_hashes,
+                         self.loop._hash_sections(self.config))
+
+    def test_stt_change(self):
+        wakeword = self.loop.wakeword_recognizer
+        self.config = deepcopy(self.config)
+        self.config['stt']['module'] = 'google'
+        self.loop.reload()
+        self.assertFalse(self.loop.stop.called)
+        self.assertEqual(self.loop.consumer.stt,
+                         self.mocks['stt'].create.return_value)
+        self.assertIs(self.loop.wakeword_recognizer, wakeword)
+
+    def test_hotword_change(self):
+        wakeword = self.loop.wakeword_recognizer
+        self.mocks['hotword'].create_hotword.return_value = mock.Mock()
+        self.config = deepcopy(self.config)
+        self.config['listener']['wake_word'] = 'hey victoria'
+        self.loop.reload()
+        self.assertFalse(self.loop.stop.called)
+        self.assertIsNot(self.loop.wakeword_recognizer, wakeword)
+        self.assertTrue(wakeword.stop.called)
+        self.loop.responsive_recognizer.set_wake_word_recognizer\
+            .assert_called_with(self.loop.wakeword_recognizer)
+        self.assertIs(self.loop.consumer.wakeword_recognizer,
+                      self.loop.wakeword_recognizer)
+
+    def test_mic_change(self):
+        self.config = deepcopy(self.config)
+        self.config['listener']['sample_rate'] = 44100
+        self.loop.reload()
+        self.assertTrue(self.loop.stop.called)
+        self.assertTrue(self.loop.start_async.called)
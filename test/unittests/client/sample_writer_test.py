@@ -0,0 +1,96 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import shutil
+import tempfile
+import unittest
+from os import listdir
+from os.path import join
+
+import mock
+from speech_recognition import AudioData
+
+from mycroft.client.speech.mic import WakeWordSampleWriter
+
+UPLOAD_CONFIG = {
+    'server': 'example.com',
+    'port': 1776,
+    'user': 'precise',
+    'folder': '/home/precise/wakewords'
+}
+
+
+class WakeWordSampleWriterTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.writer = WakeWordSampleWriter(self.folder, lambda: 'account',
+                                           lambda: 'hash', max_queued=2)
+        self.audio = AudioData(b'\0' * 3200, 16000, 2)
+        patcher = mock.patch('mycroft.client.speech.mic.get_cache_janitor')
+        self.janitor = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def test_save(self):
+        self.writer.save(self.audio, ['hey-mycroft', 'module', '1', 'sess'])
+        self.writer._write(*self.writer.queue.get_nowait())
+        self.assertEqual(listdir(self.folder),
+                         ['hey-mycroft.module.1.sess.account.hash.wav'])
+        self.assertEqual(self.writer.filenames_to_upload, [])
+        self.janitor.watch.assert_called_with(self.folder, 'wake_words')
+        self.janitor.record.assert_called_with(
+            join(self.folder, listdir(self.folder)[0]))
+        self.assertFalse(self.janitor.protect.called)
+
+    def test_folder_not_writable(self):
+        self.writer.folder = join(self.folder, 'file', 'samples')
+        open(join(self.folder, 'file'), 'w').close()
+        # Logged instead of stopping the writer thread
+        self.writer._write(self.audio, ['1'], UPLOAD_CONFIG)
+        self.assertEqual(self.writer.filenames_to_upload, [])
+
+    def test_full_queue(self):
+        for i in range(4):
+            self.writer.save(self.audio, [str(i)])
+        self.assertEqual(self.writer.queue.qsize(), 2)
+        self.assertEqual(self.writer.dropped, 2)
+
+    @mock.patch('mycroft.client.speech.mic.Popen')
+    @mock.patch.object(WakeWordSampleWriter, '_get_keyfile',
+                       return_value='key')
+    def test_upload_retry(self, _, mock_popen):
+        for i in range(3):
+            self.writer._write(self.audio, [str(i)], UPLOAD_CONFIG)
+        self.assertEqual(len(self.writer.filenames_to_upload), 3)
+        # Files waiting for upload aren't removed by the janitor
+        self.assertEqual(self.janitor.protect.call_count, 3)
+
+        # Failed upload is retried later with a longer delay
+        mock_popen.return_value.wait.return_value = 1
+        self.writer._upload_pending()
+        self.assertEqual(len(self.writer.filenames_to_upload), 3)
+        self.assertGreater(self.writer.next_upload, 0)
+        self.assertEqual(self.writer.retry_delay,
+                         2 * WakeWordSampleWriter.RETRY_DELAY)
+
+        # All files are sent with a single scp call
+        mock_popen.return_value.wait.return_value = 0
+        self.writer._upload_pending()
+        args = mock_popen.call_args[0][0]
+        self.assertEqual(len([a for a in args if a.endswith('.wav')]), 3)
+        self.assertEqual(self.writer.filenames_to_upload, [])
+        self.assertEqual(listdir(self.folder), [])
+        self.assertEqual(self.janitor.unprotect.call_count, 3)
+        self.assertEqual(self.writer.retry_delay,
+                         WakeWordSampleWriter.RETRY_DELAY)
@@ -1,6 +1,13 @@
+import json
+import shutil
+import tempfile
+from os.path import join
+
 import mock
 from unittest import TestCase
 import mycroft.configuration
+from mycroft.configuration.config import DEFAULT_CONFIG, SYSTEM_CONFIG, \
+    USER_CONFIG
 
 
 class TestConfiguration(TestCase):
@@ -76,5 +83,68 @@ class TestConfiguration(TestCase):
         mycroft.configuration.Configuration.updated('message')
         self.assertEquals(c, {'a': 2})
 
+    @mock.patch('mycroft.configuration.config._file_stamp')
+    @mock.patch('mycroft.configuration.config.RemoteConf')
+    @mock.patch('mycroft.configuration.config.LocalConf')
+    def test_layers_cached(self, mock_local, mock_remote, mock_stamp):
+        Configuration = mycroft.configuration.Configuration
+        stamps = {'default': 1, 'system': 1, 'user': 1}
+        mock_stamp.side_effect = lambda path: stamps[
+            'default' if path == DEFAULT_CONFIG else
+            'system' if path == SYSTEM_CONFIG else 'user']
+        mock_local.side_effect = lambda path: {'path': path,
+                                               'tts': {'module': 'mimic'}}
+        mock_remote.return_value = {'remote': True}
+        c = Configuration.get()
+        self.assertEqual(c['path'], USER_CONFIG)
+        self.assertEqual(mock_local.call_count, 3)
+        self.assertEqual(mock_remote.call_count, 1)
+
+        changes = []
+        Configuration.on_change('tts', changes.append)
+        self.addCleanup(Configuration.remove_on_change, 'tts',
+                        changes.append)
+        version = Configuration.version
+
+        # Drop the patch config after the test
+        self.addCleanup(Configuration._Configuration__patch.clear)
+        # Patches don't reload the files or the remote config
+        message = mock.Mock(data={'config': {'tts': {'module': 'espeak'}}})
+        Configuration.patch(message)
+        self.assertEqual(c['tts']['module'], 'espeak')
+        self.assertEqual(mock_local.call_count, 3)
+        self.assertEqual(mock_remote.call_count, 1)
+        self.assertEqual(changes, [{'module': 'espeak'}])
+        self.assertEqual(Configuration.version, version + 1)
+
+        # Only the modified file is loaded again
+        stamps['system'] = 2
+        Configuration.updated(None)
+        self.assertEqual(mock_local.call_count, 4)
+        self.assertEqual(mock_remote.call_count, 2)
+        # Nothing changed
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(Configuration.version, version + 1)
+
+    def test_files_cached(self):
+        Configuration = mycroft.configuration.Configuration
+        LocalConf = mycroft.configuration.LocalConf
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        path = join(folder, 'mycroft.conf')
+        with open(path, 'w') as f:
+            json.dump({'a': 1}, f)
+        reads = LocalConf.reads[path]
+        c = Configuration.get([path], cache=False)
+        c['a'] = 'modified'
+        self.assertEqual(Configuration.get([path], cache=False), {'a': 1})
+        self.assertEqual(LocalConf.reads[path], reads + 1)
+
+        # The file is read again when it is modified
+        with open(path, 'w') as f:
+            json.dump({'a': 22}, f)
+        self.assertEqual(Configuration.get([path], cache=False), {'a': 22})
+        self.assertEqual(LocalConf.reads[path], reads + 2)
+
     def tearDown(self):
         mycroft.configuration.Configuration.load_config_stack([{}], True)
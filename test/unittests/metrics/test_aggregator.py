@@ -0,0 +1,131 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import shutil
+import tempfile
+import unittest
+from os.path import join
+from threading import Thread
+
+import mock
+
+from mycroft.metrics import MetricsAggregator, MetricsPublisher
+
+CONFIG = {
+    'server': {'url': 'http://metrics.local/', 'metrics': True},
+    'metrics': {'interval': 60, 'dump': False}
+}
+
+
+class TestMetricsAggregator(unittest.TestCase):
+    def setUp(self):
+        patches = [
+            mock.patch('mycroft.configuration.Configuration.get',
+                       return_value=CONFIG),
+            mock.patch('mycroft.metrics.SessionManager.get',
+                       return_value=mock.Mock(session_id='1234'))
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+        self.publisher = MetricsPublisher()
+        self.publisher.session = mock.Mock()
+        p = mock.patch('mycroft.metrics.get_publisher',
+                       return_value=self.publisher)
+        p.start()
+        self.addCleanup(p.stop)
+        self.metrics = MetricsAggregator('test')
+
+    def test_concurrent_updates(self):
+        def work():
+            for i in range(1000):
+                self.metrics.increment('count')
+                self.metrics.timer('time', 0.01)
+
+        threads = [Thread(target=work) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        totals = self.metrics.totals()
+        self.assertEqual(totals['counters']['count'], 8000)
+        self.assertEqual(totals['timers']['time']['count'], 8000)
+
+    def test_publish(self):
+        self.metrics.increment('wakeup')
+        self.metrics.timer('stt', 0.5)
+        self.metrics.timer('stt', 1.5)
+        self.metrics.attr('utterances', ['hello'])
+        self.publisher.process()
+        self.assertEqual(self.publisher.session.post.call_count, 1)
+        payload = json.loads(
+            self.publisher.session.post.call_args[1]['data'])
+        self.assertEqual(payload['counters'], {'wakeup': 1})
+        self.assertEqual(payload['timers']['stt']['count'], 2)
+        self.assertEqual(payload['attributes']['utterances'], ['hello'])
+
+        # Only metrics since the last flush are published
+        self.metrics.increment('wakeup')
+        self.publisher.process()
+        payload = json.loads(
+            self.publisher.session.post.call_args[1]['data'])
+        self.assertEqual(payload['counters'], {'wakeup': 1})
+        self.assertEqual(payload['timers'], {})
+        self.assertEqual(self.metrics.totals()['counters']['wakeup'], 2)
+
+        # Nothing new, nothing published
+        self.publisher.process()
+        self.assertEqual(self.publisher.session.post.call_count, 2)
+
+    def test_config_change(self):
+        config = {
+            'server': {'url': 'http://metrics.local/', 'metrics': False},
+            'metrics': {'interval': 60, 'dump': False}
+        }
+        with mock.patch('mycroft.configuration.Configuration.get',
+                        return_value=config):
+            self.metrics.increment('wakeup')
+            self.publisher.process()
+            self.assertFalse(self.publisher.session.post.called)
+
+            config['server']['metrics'] = True
+            self.publisher.process()
+            self.metrics.increment('wakeup')
+            self.publisher.process()
+            self.assertEqual(self.publisher.session.post.call_count, 1)
+
+    def test_queue_full(self):
+        self.publisher.queue.maxsize = 1
+        self.publisher.publish({'counters': {'a': 1}})
+        self.publisher.publish({'counters': {'a': 2}})
+        self.assertEqual(self.publisher.dropped, 1)
+
+    def test_dump(self):
+        folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, folder)
+        self.metrics.increment('wakeup', 3)
+        self.metrics.timer('stt', 0.5)
+        self.metrics.flush()
+        self.metrics.dump(folder)
+        with open(join(folder, 'test.json')) as f:
+            totals = json.load(f)
+        self.assertEqual(totals['counters'], {'wakeup': 3})
+        self.assertEqual(totals['timers']['stt']['max'], 0.5)
+
+    def test_default_names_unique(self):
+        first = MetricsAggregator()
+        second = MetricsAggregator()
+        self.assertNotEqual(first.name, second.name)
+        self.assertTrue(first.name.startswith('metrics-'))
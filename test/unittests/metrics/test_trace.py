@@ -0,0 +1,109 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import json
+import shutil
+import tempfile
+import time
+import unittest
+from os.path import join
+
+import mock
+
+from mycroft.metrics import Stopwatch, report_timing
+from mycroft.metrics.trace import (Tracer, export, last_interactions,
+                                   load_spans, waterfall)
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.tracer = Tracer(self.folder, max_spans=4)
+
+    def record_interaction(self, trace_id, start):
+        self.tracer.record(trace_id, 'stt', start, 0.5)
+        self.tracer.record(trace_id, 'intent_service', start + 0.5, 0.1,
+                           {'intent_type': 'TimeSkill:time'})
+        self.tracer.record(trace_id, 'speech', start + 0.6, 1.4)
+        self.tracer.flush()
+
+    def test_spans_grouped_by_interaction(self):
+        self.record_interaction('first', 100.0)
+        self.record_interaction('second', 200.0)
+        traces = last_interactions(load_spans(self.folder), 5)
+        self.assertEqual(list(traces), ['first', 'second'])
+        spans = traces['second']
+        self.assertEqual([s['name'] for s in spans],
+                         ['stt', 'intent_service', 'speech'])
+        self.assertEqual(spans[1]['ts'], 200500000)
+        self.assertEqual(spans[1]['dur'], 100000)
+        self.assertEqual(spans[1]['args']['intent_type'], 'TimeSkill:time')
+        self.assertEqual(list(last_interactions(load_spans(self.folder), 1)),
+                         ['second'])
+
+    def test_ring_buffer(self):
+        for i in range(4):
+            self.record_interaction(str(i), i * 10.0)
+        self.assertEqual(len(self.tracer.spans), 4)
+        # The file is shrunk to the ring buffer once it holds twice as many
+        spans = load_spans(self.folder)
+        self.assertLessEqual(len(spans), 8)
+        self.assertEqual(spans[-1]['args']['trace_id'], '3')
+
+    def test_written_in_background(self):
+        self.tracer.flush_interval = 0.05
+        self.tracer.start()
+        self.addCleanup(self.tracer.stop)
+        self.tracer.record('first', 'stt', 100.0, 0.5)
+        # Recording doesn't touch the file
+        self.assertEqual(load_spans(self.folder), [])
+        end = time.time() + 5.0
+        while not load_spans(self.folder) and time.time() < end:
+            time.sleep(0.01)
+        self.assertEqual(len(load_spans(self.folder)), 1)
+
+    def test_waterfall(self):
+        self.record_interaction('first', 100.0)
+        spans = last_interactions(load_spans(self.folder), 1)['first']
+        lines = waterfall('first', spans, width=20).split('\n')
+        self.assertEqual(lines[0], 'first (2.000 s)')
+        self.assertIn('|#####               |', lines[1])
+        self.assertIn('|     #              |', lines[2])
+        self.assertIn('|      ##############|', lines[3])
+
+    def test_export(self):
+        self.record_interaction('first', 100.0)
+        filename = join(self.folder, 'export.json')
+        export(last_interactions(load_spans(self.folder), 1), filename)
+        with open(filename) as f:
+            trace = json.load(f)
+        self.assertEqual(len(trace['traceEvents']), 3)
+        self.assertEqual(trace['traceEvents'][0]['ph'], 'X')
+
+    def test_report_timing(self):
+        stopwatch = Stopwatch()
+        with stopwatch:
+            pass
+        with mock.patch('mycroft.metrics.trace.get_tracer',
+                        return_value=self.tracer), \
+                mock.patch('mycroft.metrics.report_metric'):
+            report_timing('ident', 'skill_handler', stopwatch,
+                          {'handler': 'handle_time'})
+            report_timing('unknown', 'speech', stopwatch)
+        self.assertEqual(len(self.tracer.spans), 1)
+        span = self.tracer.spans[0]
+        self.assertEqual(span['name'], 'skill_handler')
+        self.assertEqual(span['args'], {'handler': 'handle_time',
+                                        'trace_id': 'ident'})
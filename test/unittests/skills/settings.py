@@ -13,12 +13,17 @@
 # limitations under the License.
 #
 import json
+import shutil
+import tempfile
+import time
 import unittest
 
-from os import remove
-from os.path import join, dirname
+import mock
+from os import makedirs, remove
+from os.path import exists, join, dirname
 
-from mycroft.skills.settings import SkillSettings
+from mycroft.messagebus.message import Message
+from mycroft.skills.settings import SettingsSync, SkillSettings
 
 
 class SkillSettingsTest(unittest.TestCase):
@@ -124,6 +129,174 @@ class SkillSettingsTest(unittest.TestCase):
         s.load_skill_settings_from_file()
         self.assertEqual(len(s), 1)
 
+    def test_unchanged_not_stored(self):
+        path = join(dirname(__file__), 'settings', 'settings.json')
+        s = SkillSettings(join(dirname(__file__), 'settings'),
+                          "test-skill-settings")
+        s['a'] = 1
+        s['l'] = []
+        s.store()
+        remove(path)
+        s.get('a')
+        s.store()
+        self.assertFalse(exists(path))
+        # Lists may be modified in place
+        s['l'].append(1)
+        s.store()
+        with open(path) as f:
+            self.assertEqual(json.load(f), {'a': 1, 'l': [1]})
+        self.assertFalse(exists(path + '.tmp'))
+
+    def test_values_tracked(self):
+        path = join(dirname(__file__), 'settings', 'settings.json')
+        s = SkillSettings(join(dirname(__file__), 'settings'),
+                          "test-skill-settings")
+        s['a'] = 1
+        s['l'] = []
+        s.store()
+        for value in s.values():
+            if isinstance(value, list):
+                value.append(1)
+        s.store()
+        with open(path) as f:
+            self.assertEqual(json.load(f), {'a': 1, 'l': [1]})
+        for key, value in s.items():
+            if isinstance(value, list):
+                value.append(2)
+        s.store()
+        with open(path) as f:
+            self.assertEqual(json.load(f), {'a': 1, 'l': [1, 2]})
+        s.copy()['l'].append(3)
+        s.store()
+        with open(path) as f:
+            self.assertEqual(json.load(f), {'a': 1, 'l': [1, 2, 3]})
+
+    def test_failed_write_stays_dirty(self):
+        path = join(dirname(__file__), 'settings', 'settings.json')
+        s = SkillSettings(join(dirname(__file__), 'settings'),
+                          "test-skill-settings")
+        s['a'] = 1
+        with mock.patch('mycroft.skills.settings.os.rename',
+                        side_effect=OSError):
+            self.assertRaises(OSError, s.store)
+        self.assertFalse(exists(path))
+        s.store()
+        with open(path) as f:
+            self.assertEqual(json.load(f), {'a': 1})
+
+    def test_scheduled_store(self):
+        path = join(dirname(__file__), 'settings', 'settings.json')
+        s = SkillSettings(join(dirname(__file__), 'settings'),
+                          "test-skill-settings")
+        s.STORE_DELAY = 0.1
+        s.schedule_store()
+        self.assertIsNone(s._store_timer)
+        with mock.patch.object(s, '_write', wraps=s._write) as mock_write:
+            for i in range(3):
+                s['value_{}'.format(i)] = i
+                s.schedule_store()
+            self.assertFalse(exists(path))
+            end = time.time() + 5.0
+            while not exists(path) and time.time() < end:
+                time.sleep(0.01)
+            self.assertEqual(mock_write.call_count, 1)
+        with open(path) as f:
+            self.assertEqual(len(json.load(f)), 3)
+
+
+class SettingsSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        self.sync = SettingsSync()
+        patches = [
+            mock.patch('mycroft.skills.settings.get_settings_sync',
+                       return_value=self.sync),
+            mock.patch('mycroft.skills.settings.is_paired',
+                       return_value=True),
+            mock.patch('mycroft.skills.settings.DeviceApi'),
+            mock.patch('mycroft.skills.settings.ConfigurationManager.get',
+                       return_value={'skills': {'directory': self.folder}})
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.remote = {}
+        self.settings = [self.create_skill(name) for name in ('a', 'b')]
+        self.sync._api = mock.Mock()
+        self.sync._api.identity.uuid = 'device'
+        self.sync._api.request.side_effect = lambda params: [
+            self.remote_settings(s.name, self.remote[s.name])
+            for s in self.settings]
+
+    def create_skill(self, name):
+        directory = join(self.folder, name)
+        makedirs(directory)
+        with open(join(directory, 'settingsmeta.json'), 'w') as f:
+            json.dump({'name': name}, f)
+        settings = SkillSettings(directory, name)
+        settings.allow_overwrite = True
+        settings._user_identity = 'user'
+        settings._complete_intialization = True
+        settings.set_changed_callback(mock.Mock())
+        self.assertFalse(any(s is settings for s in self.sync.skills))
+        settings.start_sync()
+        self.remote[name] = 'initial'
+        return settings
+
+    def remote_settings(self, name, value):
+        settings = self.settings[0 if name == 'a' else 1]
+        return {
+            'uuid': name,
+            'identifier': settings._get_meta_hash({'name': name}),
+            'skillMetadata': {'sections': [{'fields': [
+                {'name': 'value', 'value': value}]}]}
+        }
+
+    def test_only_changed_skills_notified(self):
+        self.assertEqual(self.sync.skills, self.settings)
+        self.sync.sync()
+        self.assertEqual(self.sync._api.request.call_count, 1)
+        self.assertEqual(self.sync._api.request.call_args[0][0]['path'],
+                         '/device/skill')
+        for settings in self.settings:
+            self.assertEqual(settings['value'], 'initial')
+            self.assertEqual(settings.changed_callback.call_count, 1)
+
+        self.remote['b'] = 'changed'
+        self.sync.sync()
+        self.assertEqual(self.sync._api.request.call_count, 2)
+        self.assertEqual(self.settings[0].changed_callback.call_count, 1)
+        self.assertEqual(self.settings[1].changed_callback.call_count, 2)
+        self.assertEqual(self.settings[1]['value'], 'changed')
+
+        self.settings[0].stop_polling()
+        self.assertEqual(self.sync.skills, [self.settings[1]])
+
+    def test_pushed_settings(self):
+        message = Message('mycroft.skills.settings.update', {
+            'settings': [self.remote_settings('a', 'pushed')]
+        })
+        for settings in self.settings:
+            settings.run_poll(message)
+        self.assertEqual(self.settings[0]['value'], 'pushed')
+        self.assertEqual(self.settings[0].changed_callback.call_count, 1)
+        self.assertNotIn('value', self.settings[1])
+        self.assertFalse(self.sync._api.request.called)
+
+    def test_pushed_settings_not_uploaded(self):
+        self.sync.sync()
+        api = self.settings[0].api
+        api.reset_mock()
+        message = Message('mycroft.skills.settings.update', {
+            'settings': [self.remote_settings('a', 'pushed')]
+        })
+        self.settings[0].run_poll(message)
+        self.settings[0].store()
+        self.assertEqual(self.settings[0]['value'], 'pushed')
+        self.assertEqual(api.method_calls, [])
+
 
 if __name__ == '__main__':
     unittest.main()
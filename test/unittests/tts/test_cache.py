@@ -0,0 +1,104 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import shutil
+import tempfile
+import unittest
+from os.path import exists, join
+
+from mycroft.tts.cache import TTSCache
+from mycroft.util.cache import get_cache_janitor
+
+
+class TestTTSCache(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+
+    def add(self, cache, sentence, size=100, phonemes=None):
+        key = TTSCache.key('Mimic', 'ap', 'en-us', sentence)
+        path = cache.path(key, 'wav')
+        with open(path, 'wb') as f:
+            f.write(b'\0' * size)
+        cache.put(key, path, phonemes)
+        return key
+
+    def test_key(self):
+        key = TTSCache.key('Mimic', 'ap', 'en-us', 'Hello  world ')
+        self.assertEqual(key, TTSCache.key('Mimic', 'ap', 'EN-US',
+                                           'Hello world'))
+        self.assertNotEqual(key, TTSCache.key('Mimic', 'trinity', 'en-us',
+                                              'Hello world'))
+        self.assertNotEqual(key, TTSCache.key('Google', 'ap', 'en-us',
+                                              'Hello world'))
+
+    def test_not_curated_by_janitor(self):
+        janitor = get_cache_janitor()
+        janitor.watch(self.folder, 'tts')
+        TTSCache(self.folder)
+        self.assertNotIn(self.folder, janitor.directories)
+
+    def test_persistence(self):
+        cache = TTSCache(self.folder)
+        key = self.add(cache, 'hello', phonemes=b'hh:0.1 ow:0.2')
+        self.assertIsNone(cache.get('missing'))
+        self.assertEqual(cache.get(key),
+                         (cache.path(key, 'wav'), 'hh:0.1 ow:0.2'))
+        cache.flush()
+
+        # Reopening the cache keeps the entries, stray files are removed
+        stray = join(self.folder, 'stray.wav')
+        open(stray, 'w').close()
+        cache = TTSCache(self.folder)
+        self.assertFalse(exists(stray))
+        self.assertEqual(cache.entries[key]['hits'], 1)
+        self.assertIsNotNone(cache.get(key))
+        self.assertEqual(cache.size, 100)
+
+    def test_lru(self):
+        cache = TTSCache(self.folder, max_bytes=250)
+        first = self.add(cache, 'first')
+        second = self.add(cache, 'second')
+        cache.get(first)
+        cache.entries[first]['last_used'] += 1
+        third = self.add(cache, 'third')
+        self.assertIn(first, cache.entries)
+        self.assertNotIn(second, cache.entries)
+        self.assertIn(third, cache.entries)
+        self.assertFalse(exists(cache.path(second, 'wav')))
+        self.assertEqual(cache.size, 200)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_lfu(self):
+        cache = TTSCache(self.folder, max_bytes=250, policy='lfu')
+        first = self.add(cache, 'first')
+        second = self.add(cache, 'second')
+        cache.get(first)
+        cache.get(first)
+        cache.get(second)
+        cache.entries[second]['last_used'] += 1
+        third = self.add(cache, 'third')
+        self.assertIn(first, cache.entries)
+        self.assertNotIn(second, cache.entries)
+        self.assertIn(third, cache.entries)
+
+    def test_stats(self):
+        cache = TTSCache(self.folder)
+        key = self.add(cache, 'hello')
+        cache.get(key)
+        cache.get('missing')
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['entries'], 1)
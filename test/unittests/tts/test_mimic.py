@@ -0,0 +1,58 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import shutil
+import tempfile
+import unittest
+
+import mock
+
+from mycroft.tts.mimic_tts import Mimic
+
+
+class TestMimicCacheKey(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        patches = [
+            mock.patch('mycroft.configuration.Configuration.get',
+                       return_value={'cache_path': self.folder}),
+            mock.patch('mycroft.tts.mimic_tts.DeviceApi'),
+            mock.patch('mycroft.tts.mimic_tts.download_subscriber_voices')
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+    def create(self, config):
+        tts = Mimic('en-us', config)
+        self.addCleanup(tts.playback.join)
+        self.addCleanup(tts.playback.stop)
+        return tts
+
+    def test_subscriber_voice_downloading(self):
+        tts = self.create({'voice': 'trinity'})
+        with mock.patch('mycroft.tts.mimic_tts.exists', return_value=False):
+            fallback = tts.cache_key('hello')
+        with mock.patch('mycroft.tts.mimic_tts.exists', return_value=True):
+            subscriber = tts.cache_key('hello')
+        self.assertNotEqual(fallback, subscriber)
+        self.assertEqual(fallback,
+                         self.create({'voice': 'ap'}).cache_key('hello'))
+
+    def test_duration_stretch(self):
+        key = self.create({'voice': 'ap'}).cache_key('hello')
+        stretched = self.create({'voice': 'ap', 'duration_stretch': '1.2'})
+        self.assertIn('duration_stretch=1.2', stretched.args)
+        self.assertNotEqual(stretched.cache_key('hello'), key)
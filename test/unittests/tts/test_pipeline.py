@@ -0,0 +1,170 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import shutil
+import tempfile
+import time
+import unittest
+import wave
+from io import BytesIO
+from threading import Thread
+
+import mock
+
+import mycroft.tts
+
+
+class PipelineTTS(mycroft.tts.TTS):
+    def __init__(self):
+        super(PipelineTTS, self).__init__('en-us', {}, None)
+        self.synthesized = []
+
+    def get_tts(self, sentence, wav_file):
+        time.sleep(0.1)
+        with open(wav_file, 'wb') as f:
+            f.write(sentence.encode())
+        self.synthesized.append((sentence, time.time()))
+        return wav_file, None
+
+
+class TestTTSPipeline(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        config = {
+            'cache_path': self.folder,
+            'tts': {'pipeline': {'lookahead': 2, 'workers': 1,
+                                 'stream_playback': False}}
+        }
+        self.played = []
+
+        def play_wav(data):
+            self.played.append((data, time.time()))
+            process = mock.Mock()
+            process.communicate.side_effect = lambda: time.sleep(0.3)
+            return process
+
+        patches = [
+            mock.patch('mycroft.configuration.Configuration.get',
+                       return_value=config),
+            mock.patch('mycroft.tts.play_wav', side_effect=play_wav),
+            mock.patch('mycroft.tts.create_signal'),
+            mock.patch('mycroft.tts.check_for_signal')
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.tts = PipelineTTS()
+        self.tts.ws = mock.Mock()
+        self.tts.playback.init(self.tts)
+        self.tts.playback.enclosure = None
+
+    def tearDown(self):
+        self.tts.playback.stop()
+        self.tts.playback.join()
+
+    def wait_for(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while time.time() < end and not condition():
+            time.sleep(0.01)
+
+    def test_synthesis_ahead_of_playback(self):
+        self.tts.execute('first sentence.')
+        self.tts.execute('second sentence.')
+        self.wait_for(lambda: len(self.played) == 2)
+        self.assertEqual(len(self.played), 2)
+        # Second sentence was ready while the first one was playing
+        second_ready = self.tts.synthesized[1][1]
+        first_play, second_play = self.played[0][1], self.played[1][1]
+        self.assertLess(second_ready, second_play)
+        self.assertLess(second_play - first_play, 0.35)
+
+    def test_stop(self):
+        for i in range(3):
+            self.tts.execute('sentence {}.'.format(i))
+        self.wait_for(lambda: len(self.played) == 1)
+        self.tts.playback.clear_queue()
+        time.sleep(0.6)
+        self.assertEqual(len(self.played), 1)
+        self.wait_for(lambda: self.tts.ws.emit.call_count == 2)
+        self.assertEqual(self.tts.ws.emit.call_count, 2)
+
+    def test_presynthesis_during_synthesis(self):
+        sentence = 'same sentence.'
+        thread = Thread(target=self.tts.presynthesize, args=(sentence,))
+        thread.start()
+        self.tts.synthesize(sentence)
+        thread.join()
+        self.assertEqual([s for s, _ in self.tts.synthesized], [sentence])
+
+    def test_stream_playback(self):
+        def get_tts(sentence, wav_file):
+            wav = wave.open(wav_file, 'wb')
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(22050)
+            wav.writeframes(b'\1\0' * 3000)
+            wav.close()
+            return wav_file, None
+
+        self.tts.get_tts = get_tts
+        self.tts.playback.stream_playback = True
+        with mock.patch('mycroft.audio.sink.pyaudio.PyAudio') as pyaudio:
+            stream = pyaudio.return_value.open.return_value
+            self.tts.execute('streamed sentence.')
+            self.wait_for(lambda: self.tts.ws.emit.call_count == 2)
+            # Played through the persistent stream instead of play_wav
+            self.assertEqual(len(self.played), 0)
+            self.assertEqual(pyaudio.return_value.open.call_args[1]['rate'],
+                             22050)
+            written = b''.join(c[0][0] for c in stream.write.call_args_list)
+            self.assertEqual(written, b'\1\0' * 3000)
+            self.assertFalse(stream.close.called)
+
+    def test_stream_synthesis(self):
+        data = BytesIO()
+        wav = wave.open(data, 'wb')
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(22050)
+        wav.writeframes(b'\0\0' * 3000)
+        wav.close()
+        data = data.getvalue()
+        chunks = [data[i:i + 1000] for i in range(0, len(data), 1000)]
+        self.tts.get_tts_stream = mock.Mock(return_value=iter(chunks))
+        self.tts.playback.stream_playback = True
+        with mock.patch('mycroft.audio.sink.pyaudio.PyAudio') as pyaudio:
+            stream = pyaudio.return_value.open.return_value
+            self.tts.execute('streamed sentence.')
+            self.wait_for(lambda: self.tts.ws.emit.call_count == 2)
+            self.assertEqual(len(self.played), 0)
+            written = b''.join(c[0][0] for c in stream.write.call_args_list)
+            self.assertEqual(written, b'\0\0' * 3000)
+        # The streamed audio is cached for the next time
+        self.assertEqual(self.tts.synthesized, [])
+        key = self.tts.cache_key('streamed sentence.')
+        wav_file, _ = self.tts.cache.get(key)
+        with open(wav_file, 'rb') as f:
+            self.assertEqual(f.read(), data)
+
+    def test_stream_playback_failed(self):
+        self.tts.playback.stream_playback = True
+        with mock.patch('mycroft.audio.sink.pyaudio.PyAudio') as pyaudio:
+            pyaudio.return_value.open.side_effect = IOError
+            self.tts.execute('some sentence.')
+            self.wait_for(lambda: self.tts.ws.emit.call_count == 2)
+        # Not a wav file, played with play_wav after the sink failed
+        self.assertEqual(len(self.played), 1)
+        self.assertFalse(self.tts.playback.stream_playback)
@@ -0,0 +1,140 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from os.path import join
+from queue import Queue
+
+import mock
+
+from mycroft.tts.cache import TTSCache
+from mycroft.tts.presynth import DialogUsage, PreSynthesizer
+
+
+class FakeTTS(object):
+    def __init__(self, folder, delay=0.0):
+        os.makedirs(folder)
+        self.cache = TTSCache(folder)
+        self.queue = Queue()
+        self.delay = delay
+        self.synthesized = []
+
+    def preprocess(self, sentence):
+        return sentence.lower()
+
+    def presynthesize(self, sentence):
+        key = self.cache.key('fake', None, 'en-us', sentence)
+        if key in self.cache:
+            return False
+        time.sleep(self.delay)
+        wav_file = self.cache.path(key, 'wav')
+        with open(wav_file, 'w') as f:
+            f.write(sentence)
+        self.cache.put(key, wav_file)
+        self.synthesized.append(sentence)
+        return True
+
+
+class TestPreSynthesizer(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        patcher = mock.patch('mycroft.tts.presynth.check_for_signal',
+                             return_value=False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.common = self.write_dialog('common.dialog',
+                                        ['Hello there.', '', 'Hi {{name}}',
+                                         'Good day. How are you?'])
+        self.rare = self.write_dialog('rare.dialog', ['Rarely said'])
+        self.usage = DialogUsage(join(self.folder, 'usage.json'))
+        self.usage.record(self.rare)
+        for i in range(3):
+            self.usage.record(self.common)
+        self.tts = FakeTTS(join(self.folder, 'cache'))
+
+    def write_dialog(self, name, lines):
+        filename = join(self.folder, name)
+        with open(filename, 'w') as f:
+            f.write('\n'.join(lines))
+        return filename
+
+    def create(self, delay=0.0, **config):
+        config.setdefault('idle_delay', 0)
+        self.tts.delay = delay
+        return PreSynthesizer(self.tts, self.usage, config,
+                              lambda line: line.split('. '))
+
+    def test_usage_persisted(self):
+        self.usage.save()
+        usage = DialogUsage(self.usage.filename)
+        self.assertEqual(usage.most_common(), [self.common, self.rare])
+
+    def test_static_lines_by_usage(self):
+        presynth = self.create()
+        self.assertTrue(presynth.synthesize_pending())
+        self.assertEqual(self.tts.synthesized,
+                         ['hello there.', 'good day', 'how are you?',
+                          'rarely said'])
+        self.assertEqual(presynth.synthesized, 4)
+        # Nothing left to do
+        self.assertTrue(presynth.synthesize_pending())
+        self.assertEqual(presynth.synthesized, 4)
+
+    def test_limits(self):
+        self.create(max_dialogs=1).synthesize_pending()
+        self.assertNotIn('rarely said', self.tts.synthesized)
+        self.tts.synthesized = []
+        self.tts.cache.clear()
+        self.create(max_lines=2).synthesize_pending()
+        self.assertEqual(self.tts.synthesized, ['hello there.', 'good day'])
+
+    def test_cache_share(self):
+        self.tts.cache.max_bytes = 20
+        presynth = self.create(cache_share=0.5)
+        self.assertFalse(presynth.synthesize_pending())
+        self.assertEqual(self.tts.synthesized, ['hello there.'])
+
+    def test_not_idle(self):
+        presynth = self.create(idle_delay=60)
+        self.assertFalse(presynth.synthesize_pending())
+        presynth = self.create()
+        self.tts.queue.put('speaking')
+        self.assertFalse(presynth.synthesize_pending())
+        self.assertEqual(self.tts.synthesized, [])
+
+    def test_cpu_budget(self):
+        presynth = self.create(delay=0.05, cpu_budget=0.5)
+        start = time.time()
+        presynth.synthesize_pending()
+        elapsed = time.time() - start
+        self.assertGreaterEqual(elapsed, 2 * presynth.cpu_time * 0.9)
+
+    def test_activity_interrupts(self):
+        presynth = self.create(delay=0.05, cpu_budget=0.1, idle_delay=0.3)
+        presynth.start()
+        end = time.time() + 5.0
+        while not self.tts.synthesized and time.time() < end:
+            time.sleep(0.01)
+        presynth.activity()
+        time.sleep(0.1)
+        presynth.stop()
+        presynth.join(1.0)
+        self.assertFalse(presynth.is_alive())
+        self.assertEqual(len(self.tts.synthesized), 1)
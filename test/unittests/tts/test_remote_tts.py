@@ -0,0 +1,125 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import shutil
+import tempfile
+import time
+import unittest
+from threading import Lock
+
+import mock
+
+from mycroft.tts.remote_tts import RemoteTTS
+
+
+class FakeRemoteTTS(RemoteTTS):
+    def __init__(self, config):
+        super(FakeRemoteTTS, self).__init__('en-us', config,
+                                            'http://tts.local/', '/say', None)
+
+    def build_request_params(self, sentence):
+        return {'text': sentence}
+
+
+class TestRemoteTTS(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        config = {
+            'cache_path': self.folder,
+            'tts': {'pipeline': {'lookahead': 3, 'workers': 1,
+                                 'stream_playback': False}}
+        }
+        self.played = []
+        patches = [
+            mock.patch('mycroft.configuration.Configuration.get',
+                       return_value=config),
+            mock.patch('mycroft.tts.play_wav', side_effect=self.play_wav),
+            mock.patch('mycroft.tts.create_signal'),
+            mock.patch('mycroft.tts.check_for_signal')
+        ]
+        for p in patches:
+            p.start()
+            self.addCleanup(p.stop)
+
+        self.tts = FakeRemoteTTS({'max_requests': 2})
+        self.tts.ws = mock.Mock()
+        self.tts.playback.init(self.tts)
+        self.tts.playback.enclosure = None
+
+        self.lock = Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.requests = []
+        self.tts.session.get = mock.Mock(side_effect=self.get)
+
+    def tearDown(self):
+        self.tts.playback.stop()
+        self.tts.playback.join()
+
+    def play_wav(self, data):
+        with open(data, 'rb') as f:
+            self.played.append(f.read())
+        return mock.Mock()
+
+    def get(self, url, params, **kwargs):
+        with self.lock:
+            self.requests.append((url, params['text']))
+            self.in_flight += 1
+            self.max_in_flight = max(self.in_flight, self.max_in_flight)
+        time.sleep(0.1)
+        with self.lock:
+            self.in_flight -= 1
+        response = mock.Mock()
+        response.content = params['text'].encode()
+        return response
+
+    def wait_for(self, condition, timeout=5.0):
+        end = time.time() + timeout
+        while time.time() < end and not condition():
+            time.sleep(0.01)
+
+    def speak(self, sentence, count):
+        self.tts.execute(sentence)
+        self.wait_for(lambda: self.tts.ws.emit.call_count == count)
+
+    def test_phrases_played_in_order(self):
+        self.speak('One. Two. Three. Four', 2)
+        self.assertEqual(self.played, [b'One', b'Two', b'Three', b'Four'])
+        self.assertEqual(self.requests[0][0], 'http://tts.local/say')
+        # Requests were fetched concurrently, but at most max_requests
+        self.assertEqual(self.max_in_flight, 2)
+        # Start and end of audio signalled once for the utterance
+        messages = [c[0][0].type for c in self.tts.ws.emit.call_args_list]
+        self.assertEqual(messages, ['recognizer_loop:audio_output_start',
+                                    'recognizer_loop:audio_output_end'])
+
+    def test_phrases_cached(self):
+        self.speak('One. Two', 2)
+        self.speak('Two. Three', 4)
+        self.assertEqual([r[1] for r in self.requests],
+                         ['One', 'Two', 'Three'])
+        self.assertEqual(self.played, [b'One', b'Two', b'Two', b'Three'])
+
+    def test_tts_stream(self):
+        response = mock.Mock()
+        response.iter_content.return_value = iter([b'RI', b'FF'])
+        self.tts.session.get = mock.Mock(return_value=response)
+        chunks = self.tts.get_tts_stream('One')
+        self.assertEqual(list(chunks), [b'RI', b'FF'])
+        args, kwargs = self.tts.session.get.call_args
+        self.assertEqual(args[0], 'http://tts.local/say')
+        self.assertEqual(kwargs['params'], {'text': 'One'})
+        self.assertTrue(kwargs['stream'])
+        self.assertTrue(response.raise_for_status.called)
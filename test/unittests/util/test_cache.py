@@ -0,0 +1,102 @@
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import os
+import shutil
+import tempfile
+import time
+import unittest
+from os.path import exists, join
+
+from mycroft.util.cache import CacheJanitor
+
+KB = 1024
+
+
+class TestCacheJanitor(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.folder)
+        # Quota of 10 kB
+        self.janitor = CacheJanitor({'quota_mb': {'default': 10.0 / KB},
+                                     'sweep_interval': 60})
+
+    def write(self, name, size, age=0):
+        path = join(self.folder, name)
+        with open(path, 'wb') as f:
+            f.write(b'\0' * size)
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_ledger(self):
+        self.write('a', 2 * KB)
+        self.janitor.watch(self.folder)
+        self.janitor.curate(self.janitor.directories[self.folder])
+        self.janitor.record(self.write('b', 3 * KB))
+        self.janitor.record(self.write('a', 1 * KB))
+        # Files outside curated directories are ignored
+        self.janitor.record(__file__)
+        stats = self.janitor.stats()
+        self.assertEqual(stats['directories'][self.folder]['size'], 4 * KB)
+        self.assertEqual(stats['sweeps'], 0)
+
+    def test_sweep_oldest_first(self):
+        oldest = self.write('oldest', 4 * KB, age=30)
+        protected = self.write('protected', 1 * KB, age=40)
+        old = self.write('old', 4 * KB, age=20)
+        new = self.write('new', 4 * KB, age=10)
+        self.janitor.protect(protected)
+        self.janitor.watch(self.folder)
+        self.janitor.curate(self.janitor.directories[self.folder])
+        # Files are removed until the directory is at 90% of the quota
+        self.assertFalse(exists(oldest))
+        self.assertTrue(exists(protected))
+        self.assertTrue(exists(old))
+        self.assertTrue(exists(new))
+        stats = self.janitor.stats()
+        self.assertEqual(stats['reclaimed_bytes'], 4 * KB)
+        self.assertEqual(stats['files_removed'], 1)
+        self.assertEqual(stats['directories'][self.folder]['size'], 9 * KB)
+
+    def test_release(self):
+        self.janitor.watch(self.folder)
+        self.janitor.release(self.folder)
+        self.janitor.watch(self.folder)
+        self.assertNotIn(self.folder, self.janitor.directories)
+
+    def test_sweeps_rate_limited(self):
+        self.janitor.watch(self.folder)
+        cache_dir = self.janitor.directories[self.folder]
+        self.janitor.record(self.write('a', 11 * KB))
+        self.janitor.curate(cache_dir)
+        self.assertEqual(self.janitor.sweeps, 1)
+        self.janitor.record(self.write('b', 11 * KB))
+        self.janitor.curate(cache_dir)
+        self.assertEqual(self.janitor.sweeps, 1)
+        cache_dir.last_sweep -= 60
+        self.janitor.curate(cache_dir)
+        self.assertEqual(self.janitor.sweeps, 2)
+        self.assertFalse(exists(join(self.folder, 'b')))
+
+    def test_background_sweep(self):
+        self.janitor.watch(self.folder)
+        self.janitor.start()
+        self.addCleanup(self.janitor.stop)
+        path = self.write('a', 11 * KB)
+        self.janitor.record(path)
+        end = time.time() + 5.0
+        while exists(path) and time.time() < end:
+            time.sleep(0.01)
+        self.assertFalse(exists(path))
@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright 2017 Mycroft AI Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+import unittest
+
+from mycroft.util.lang.benchmark import (DATETIME_CORPUS, NORMALIZE_CORPUS,
+                                         benchmark_extract_datetime,
+                                         benchmark_fuzzy,
+                                         benchmark_import,
+                                         benchmark_normalize)
+from mycroft.util.lang.parse_common import Normalizer
+
+
+class TestNormalizer(unittest.TestCase):
+    def test_tables(self):
+        normalizer = Normalizer(["the"], {"one": "1", "isn't": "is not"})
+        self.assertEqual(normalizer.normalize("the  one isn't  here", True),
+                         "1 is not here")
+        self.assertEqual(normalizer.normalize("the one", False), "the 1")
+
+    def test_number_parser(self):
+        def parse(words, i):
+            if words[i] == "two" and words[i + 1:i + 2] == ["hundred"]:
+                return 200, i + 2
+            return None
+
+        normalizer = Normalizer(number_parser=parse)
+        self.assertEqual(normalizer.normalize("two hundred two", True),
+                         "200 two")
+
+
+class TestLangBenchmark(unittest.TestCase):
+    def test_normalize(self):
+        results = benchmark_normalize(iterations=2)
+        self.assertEqual(set(results), set(NORMALIZE_CORPUS))
+        self.assertEqual(len(results), 6)
+        for time_per_utterance in results.values():
+            self.assertGreater(time_per_utterance, 0)
+
+    def test_extract_datetime(self):
+        results = benchmark_extract_datetime(iterations=1)
+        self.assertEqual(set(results['parse']), set(DATETIME_CORPUS))
+        self.assertEqual(set(results['cached']), set(DATETIME_CORPUS))
+
+    def test_fuzzy(self):
+        result = benchmark_fuzzy(choices=200, queries=2)
+        self.assertEqual(result['choices'], 200)
+        self.assertGreater(result['index_search_ms'], 0)
+
+    def test_import(self):
+        result = benchmark_import('mycroft.util.parse', runs=1)
+        # No language is loaded before it is used
+        self.assertEqual(result['lang_modules'],
+                         ['mycroft.util.lang.parse_common'])
+        self.assertGreater(result['median_ms'], 0)
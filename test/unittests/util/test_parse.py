@@ -17,12 +17,16 @@
 import unittest
 from datetime import datetime
 
+from mycroft.util import parse
 from mycroft.util.parse import get_gender
 from mycroft.util.parse import extract_datetime
 from mycroft.util.parse import extractnumber
 from mycroft.util.parse import normalize
 from mycroft.util.parse import fuzzy_match
 from mycroft.util.parse import match_one
+from mycroft.util.parse import FuzzyIndex
+from mycroft.util.lang import get_lang_function
+from mycroft.util.lang.parse_fr import normalize_fr
 
 
 class TestFuzzyMatch(unittest.TestCase):
@@ -47,6 +51,39 @@ class TestFuzzyMatch(unittest.TestCase):
         self.assertEqual(match_one('enry', choices)[0], 4)
 
 
+class TestFuzzyIndex(unittest.TestCase):
+    choices = ['frank', 'kate', 'harry', 'henry', 'frankie']
+
+    def test_search(self):
+        index = FuzzyIndex(self.choices)
+        self.assertEqual(index.search('frank', 2),
+                         [('frank', 1.0),
+                          ('frankie', fuzzy_match('frank', 'frankie'))])
+        self.assertEqual(index.match_one('enry'), match_one('enry',
+                                                            self.choices))
+
+    def test_dict(self):
+        index = FuzzyIndex({'frank': 1, 'kate': 2})
+        self.assertEqual(index.match_one('katt')[0], 2)
+
+    def test_candidates(self):
+        choices = ['song {}'.format(i) for i in range(200)] + ['frankie']
+        index = FuzzyIndex(choices, limit=10)
+        self.assertEqual(len(index.candidates('song 12')), 10)
+        self.assertEqual(list(index.candidates('frank'))[0], 200)
+        self.assertEqual(index.match_one('frank')[0], 'frankie')
+        # No shared trigram, all choices are scored
+        self.assertEqual(len(index.candidates('xyz')), len(choices))
+
+    def test_process_pool(self):
+        index = FuzzyIndex(self.choices, processes=2)
+        index.POOL_MIN_CANDIDATES = 1
+        self.addCleanup(index.close)
+        self.assertEqual(index.search('frank', 2),
+                         FuzzyIndex(self.choices).search('frank', 2))
+        self.assertIsNotNone(index.pool)
+
+
 class TestNormalize(unittest.TestCase):
     def test_articles(self):
         self.assertEqual(normalize("this is a test", remove_articles=True),
@@ -348,5 +385,36 @@ class TestNormalize(unittest.TestCase):
                          False)
 
 
+class TestExtractDatetimeCache(unittest.TestCase):
+    def test_cached_per_minute(self):
+        anchor = datetime(2017, 6, 27, 10, 30, 5)
+        first = extract_datetime("tomorrow at 5 pm", anchor)
+        first[1] = "changed"
+        second = extract_datetime("tomorrow at 5 pm",
+                                  anchor.replace(second=40))
+        self.assertEqual(second, [datetime(2017, 6, 28, 17, 0), ""])
+        self.assertEqual(extract_datetime("tomorrow at 5 pm",
+                                          datetime(2017, 6, 28, 10, 31)),
+                         [datetime(2017, 6, 29, 17, 0), ""])
+
+
+class TestLangRegistry(unittest.TestCase):
+    def test_get_lang_function(self):
+        self.assertEqual(get_lang_function("parse", "normalize", "fr-FR"),
+                         normalize_fr)
+        self.assertIsNone(get_lang_function("parse", "get_gender", "en-us"))
+        self.assertIsNone(get_lang_function("parse", "normalize", "de-de"))
+
+    def test_language_functions_importable(self):
+        from mycroft.util.parse import normalize_fr as parse_normalize_fr
+        from mycroft.util.parse import pt_pruning
+        from mycroft.util.format import nice_number_en
+        self.assertEqual(parse_normalize_fr("deux chats", True),
+                         normalize_fr("deux chats", True))
+        self.assertEqual(pt_pruning("o gato"), "gato")
+        self.assertEqual(nice_number_en(5.5, True, None), "5 and a half")
+        self.assertFalse(hasattr(parse, 'normalize_de'))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -379,6 +379,9 @@ class TestNormalize_fr(unittest.TestCase):
                          "1000e millésime")
         self.assertEqual(normalize("le trentième anniversaire", lang="fr-fr"),
                          "30e anniversaire")
+        self.assertEqual(normalize("c'est la deuxième tentative",
+                                   lang="fr-fr"),
+                         "c'est 2e tentative")
 
     def test_gender_fr(self):
         self.assertEqual(get_gender("personne", lang="fr-fr"),
@@ -12,12 +12,18 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #
+import time
 import unittest
 from shutil import rmtree
+from threading import Timer
 
+import mock
+from os import remove
 from os.path import exists, isfile
 
 from mycroft.util import create_signal, check_for_signal
+from mycroft.util.signal import (create_file, get_signal_watcher,
+                                 wait_for_signal, wait_for_signal_removed)
 
 
 class TestSignals(unittest.TestCase):
@@ -42,5 +48,67 @@ class TestSignals(unittest.TestCase):
         self.assertFalse(isfile('/tmp/mycroft/ipc/signal/test_signal'))
 
 
+class TestSignalWatcher(unittest.TestCase):
+    path = '/tmp/mycroft/ipc/signal/test_signal'
+
+    def setUp(self):
+        self.watcher = get_signal_watcher()
+        if not self.watcher:
+            self.skipTest('inotify not available')
+        if exists(self.path):
+            remove(self.path)
+        # Wait for the watcher to follow the signal folder
+        create_file('/tmp/mycroft/ipc/signal/other_signal')
+        end = time.time() + 5.0
+        while not self.watcher.active and time.time() < end:
+            time.sleep(0.01)
+        self.assertTrue(self.watcher.active)
+
+    def test_missing_signal_not_checked_on_disk(self):
+        with mock.patch('mycroft.util.signal.os.path.isfile') as isfile:
+            self.assertFalse(check_for_signal('test_signal'))
+            self.assertFalse(isfile.called)
+
+    def test_wait_for_signal(self):
+        # Created by another process
+        Timer(0.2, create_file, [self.path]).start()
+        start = time.time()
+        self.assertTrue(wait_for_signal('test_signal', 5.0))
+        self.assertLess(time.time() - start, 1.0)
+        self.assertTrue(isfile(self.path))
+
+        Timer(0.2, remove, [self.path]).start()
+        self.assertTrue(wait_for_signal_removed('test_signal', 5.0))
+        self.assertFalse(wait_for_signal('test_signal', 0.2))
+
+    def test_check_signal_leaves_cache_to_watcher(self):
+        create_signal('test_signal')
+        self.assertTrue(check_for_signal('test_signal'))
+        # Removed by the watcher thread once the delete event arrives
+        self.assertTrue(wait_for_signal_removed('test_signal', 5.0))
+        self.assertNotIn('test_signal', self.watcher.signals)
+
+    def test_missing_file_rescans(self):
+        self.watcher.wait(self.watcher.generation, 0.5)
+        with self.watcher.condition:
+            self.watcher.signals.add('test_signal')
+        self.assertFalse(check_for_signal('test_signal'))
+        end = time.time() + 5.0
+        while 'test_signal' in self.watcher.signals and time.time() < end:
+            time.sleep(0.01)
+        self.assertNotIn('test_signal', self.watcher.signals)
+
+    def test_new_watcher_after_fork(self):
+        with mock.patch.object(self.watcher, 'close') as close, \
+                mock.patch('mycroft.util.signal.os.getpid', return_value=-1):
+            watcher = get_signal_watcher()
+        self.assertTrue(close.called)
+        self.assertIsNot(watcher, self.watcher)
+        self.watcher.stop()
+        watcher.stop()
+        watcher.join(5.0)
+        self.assertIsNot(get_signal_watcher(), watcher)
+
+
 if __name__ == "__main__":
     unittest.main()